@@ -0,0 +1,197 @@
+"""
+Benchmark of matching configuration rules on a 200-node workflow.
+
+Compares rules scanned one by one, with a regex built per check as before, to
+the rules compiled by WorkflowComparisonConfig. Times building the graph, which
+filters the parameters of every node, and comparing the parameters of every
+node with those of a slightly changed copy.
+
+Usage: uv run python -m benchmarks.rule_matcher_benchmark [--nodes 200]
+"""
+
+import argparse
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config_loader import (
+    ParameterComparisonRule,
+    WorkflowComparisonConfig,
+    _get_param_path_matching_pattern,
+    load_config,
+)
+from src.cost_functions import compare_parameters
+from src.graph_builder import build_workflow_graph
+
+NODE_TYPES = [f"n8n-nodes-base.type{i}" for i in range(20)]
+
+
+class LinearRulesConfig(WorkflowComparisonConfig):
+    """Config checking rules one by one, as before they were compiled"""
+
+    def should_ignore_node(self, node: Dict) -> bool:
+        if node.get("type") in self.ignored_node_types:
+            return True
+        return any(rule.matches(node) for rule in self.ignored_node_rules)
+
+    def should_ignore_parameter(self, node_type: str, param_path: str) -> bool:
+        if param_path.split(".")[-1] in self.ignored_global_parameters:
+            return True
+        if node_type in self.ignored_node_type_parameters:
+            if param_path in self.ignored_node_type_parameters[node_type]:
+                return True
+            for ignored_path in self.ignored_node_type_parameters[node_type]:
+                if _matches(param_path, ignored_path):
+                    return True
+        return any(_matches(param_path, p) for p in self.ignored_parameter_paths)
+
+    def get_parameter_rule(self, param_path: str) -> Optional[ParameterComparisonRule]:
+        for rule in self.parameter_rules:
+            if _matches(param_path, rule.parameter):
+                return rule
+        return None
+
+
+def _matches(path: str, pattern: str) -> bool:
+    return bool(re.match(f"^{_get_param_path_matching_pattern(pattern)}$", path))
+
+
+def make_config(config_class: type) -> WorkflowComparisonConfig:
+    """
+    Create a config with the rules of the strict preset and many more.
+
+    Args:
+        config_class: Class of the config to create
+
+    Returns:
+        Config with about a hundred rules
+    """
+    config = config_class._from_dict(load_config("preset:strict").to_dict())
+    config.ignored_global_parameters = {"position", "id", "notes", "color"}
+    config.ignored_parameter_paths = [f"**.ignored{i}" for i in range(30)] + [
+        "options.advanced.**"
+    ]
+    config.ignored_node_type_parameters = {
+        node_type: {f"options.*.field{i}" for i in range(5)} for node_type in NODE_TYPES
+    }
+    config.parameter_rules = [
+        ParameterComparisonRule(parameter=f"options.*.metric{i}", type="numeric")
+        for i in range(40)
+    ] + [ParameterComparisonRule(parameter="options.temperature", type="numeric")]
+    return config
+
+
+def make_workflow(node_count: int, changed: bool = False) -> Dict[str, Any]:
+    """
+    Create a chain workflow of nodes with nested parameters.
+
+    Args:
+        node_count: Number of nodes
+        changed: Whether to change some parameter values
+
+    Returns:
+        Workflow dictionary
+    """
+    nodes: List[Dict[str, Any]] = []
+    for i in range(node_count):
+        parameters: Dict[str, Any] = {
+            "url": f"https://example.com/{i}",
+            "method": "POST",
+            "position": [i, i],
+            "options": {
+                "temperature": 0.7 + (0.05 if changed and i % 3 == 0 else 0.0),
+                "llm": {f"metric{j}": j for j in range(0, 40, 8)},
+                "ui": {f"field{j}": j for j in range(5)},
+                "advanced": {"retries": 3, "timeout": 1000},
+            },
+            "headers": {f"header{j}": f"value{j}" for j in range(10)},
+        }
+        nodes.append(
+            {
+                "id": str(i),
+                "name": f"Node {i}",
+                "type": NODE_TYPES[i % len(NODE_TYPES)],
+                "parameters": parameters,
+            }
+        )
+
+    return {
+        "name": "Benchmark",
+        "nodes": nodes,
+        "connections": {
+            f"Node {i}": {
+                "main": [[{"node": f"Node {i + 1}", "type": "main", "index": 0}]]
+            }
+            for i in range(node_count - 1)
+        },
+    }
+
+
+def measure(fn: Callable[[], Any], runs: int = 5) -> float:
+    """Return the best time in seconds over the runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(
+    config: WorkflowComparisonConfig,
+    workflow: Dict[str, Any],
+    changed_workflow: Dict[str, Any],
+) -> tuple[float, float]:
+    """
+    Time building the graph of a workflow and comparing the parameters of its nodes.
+
+    Args:
+        config: Config with the rules to match
+        workflow: Workflow to build the graph of
+        changed_workflow: Workflow with the same nodes to compare parameters with
+
+    Returns:
+        Tuple of (build_time, compare_time) in seconds
+    """
+    g1 = build_workflow_graph(workflow, config)
+    g2 = build_workflow_graph(changed_workflow, config)
+
+    def compare() -> None:
+        for node in g1.nodes:
+            data1, data2 = g1.nodes[node], g2.nodes[node]
+            compare_parameters(
+                data1["parameters"], data2["parameters"], data1["type"], config
+            )
+
+    return measure(lambda: build_workflow_graph(workflow, config)), measure(compare)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=200)
+    args = parser.parse_args()
+
+    workflow = make_workflow(args.nodes)
+    changed_workflow = make_workflow(args.nodes, changed=True)
+
+    print(f"Nodes: {args.nodes}")
+    print(f"{'config':<10} {'build graph (ms)':>18} {'compare params (ms)':>20}")
+
+    results = {}
+    for name, config_class in (
+        ("linear", LinearRulesConfig),
+        ("compiled", WorkflowComparisonConfig),
+    ):
+        results[name] = run(make_config(config_class), workflow, changed_workflow)
+        build_time, compare_time = results[name]
+        print(f"{name:<10} {build_time * 1e3:>18.2f} {compare_time * 1e3:>20.2f}")
+
+    linear, compiled = results["linear"], results["compiled"]
+    print(
+        f"{'speedup':<10} {linear[0] / compiled[0]:>17.1f}x "
+        f"{linear[1] / compiled[1]:>19.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Batch workflow comparison over a process pool.
+
+Compares many generated/ground truth pairs, streaming one JSON line per pair
+as it completes, followed by a final line with aggregate statistics.
+
+The manifest is either:
+    - a JSONL file, one pair per line:
+      {"id": "case-1", "generated": "a.json", "ground_truth": "b.json"}
+      with paths relative to the manifest, and "id" defaulting to the line number
+    - a directory with a subdirectory per pair, holding generated.json and
+      ground_truth.json, with the subdirectory name as id
+
+Options:
+    --config PATH          Path to custom config file (.yaml or .json)
+    --preset NAME          Use built-in preset (strict|standard|lenient)
+    --workers N            Number of worker processes [default: CPU count]
+    --timeout SECONDS      Timeout per pair [default: 60]
+    --output PATH          Write results to a file instead of stdout
+    --help                 Show this help message
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+import numpy as np
+
+from src.config_loader import WorkflowComparisonConfig, load_config
+from src.graph_builder import build_workflow_graph
+from src.similarity import calculate_graph_edit_distance
+
+DEFAULT_TIMEOUT = 60.0
+PRIORITIES = ("critical", "major", "minor")
+
+# Config of the worker process, loaded once by _init_worker
+_worker_config: Optional[WorkflowComparisonConfig] = None
+
+
+class PairTimeoutError(BaseException):
+    """
+    Raised in a worker when comparing a pair exceeds its timeout.
+
+    Derives from BaseException, like KeyboardInterrupt, so that the fallbacks
+    catching Exception while calculating the GED do not swallow it.
+    """
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Compare many pairs of n8n workflows using graph edit distance",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Compare the pairs of a JSONL manifest
+  python -m src.batch_compare pairs.jsonl --preset strict > results.jsonl
+
+  # Compare the pairs of a directory, one subdirectory per pair
+  python -m src.batch_compare eval-cases/ --workers 8 --timeout 30 --output results.jsonl
+        """,
+    )
+
+    parser.add_argument(
+        "manifest", help="JSONL file of pairs, or directory of pair subdirectories"
+    )
+    parser.add_argument(
+        "--config", help="Path to custom configuration file (.yaml or .json)"
+    )
+    parser.add_argument(
+        "--preset",
+        choices=["strict", "standard", "lenient"],
+        help="Use built-in configuration preset",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Timeout in seconds per pair (default: {DEFAULT_TIMEOUT:.0f})",
+    )
+    parser.add_argument("--output", help="Write results to a file instead of stdout")
+
+    return parser.parse_args()
+
+
+def load_manifest(path: str) -> List[Dict[str, str]]:
+    """
+    Load the pairs to compare from a JSONL manifest or a directory.
+
+    Args:
+        path: Path to JSONL manifest, or to directory of pair subdirectories
+
+    Returns:
+        List of pairs with 'id', 'generated' and 'ground_truth' paths
+
+    Raises:
+        ValueError: If the manifest is missing or invalid
+    """
+    manifest = Path(path)
+
+    if manifest.is_dir():
+        return [
+            {
+                "id": case.name,
+                "generated": str(case / "generated.json"),
+                "ground_truth": str(case / "ground_truth.json"),
+            }
+            for case in sorted(manifest.iterdir())
+            if case.is_dir()
+        ]
+
+    if not manifest.exists():
+        raise ValueError(f"Manifest not found: {path}")
+
+    pairs = []
+    with open(manifest) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                pairs.append(
+                    {
+                        "id": str(entry.get("id", line_number)),
+                        "generated": str(manifest.parent / entry["generated"]),
+                        "ground_truth": str(manifest.parent / entry["ground_truth"]),
+                    }
+                )
+            except (json.JSONDecodeError, KeyError, AttributeError) as e:
+                raise ValueError(
+                    f"Invalid manifest entry on line {line_number}: {e!r}"
+                ) from e
+
+    return pairs
+
+
+def _init_worker(config_source: Optional[str]) -> None:
+    """Load the configuration once per worker process"""
+    global _worker_config
+    _worker_config = load_config(config_source)
+
+    # Let the parent handle Ctrl+C and shut the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+
+def _raise_timeout(signum, frame):
+    raise PairTimeoutError()
+
+
+def compare_pair(pair: Dict[str, str], timeout: Optional[float]) -> Dict[str, Any]:
+    """
+    Compare a pair of workflows in a worker process.
+
+    The timeout is enforced with SIGALRM where available, so it is not enforced
+    on Windows. The timer is disarmed within the try catching PairTimeoutError,
+    so that it firing as the comparison completes cannot escape to the pool.
+
+    Args:
+        pair: Pair with 'id', 'generated' and 'ground_truth' paths
+        timeout: Timeout in seconds, or None for no timeout
+
+    Returns:
+        Result of the comparison, or with 'error' if it failed
+    """
+    assert _worker_config is not None, "Worker not initialized"
+    config = _worker_config
+
+    result: Dict[str, Any] = dict(pair)
+    start_time = time.monotonic()
+
+    try:
+        try:
+            if timeout and hasattr(signal, "SIGALRM"):
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+
+            with open(pair["generated"]) as f:
+                generated = json.load(f)
+            with open(pair["ground_truth"]) as f:
+                ground_truth = json.load(f)
+
+            g1 = build_workflow_graph(generated, config)
+            g2 = build_workflow_graph(ground_truth, config)
+            comparison = calculate_graph_edit_distance(g1, g2, config)
+        finally:
+            if timeout and hasattr(signal, "SIGALRM"):
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+        result.update(
+            {
+                "similarity_score": comparison["similarity_score"],
+                "edit_cost": comparison["edit_cost"],
+                "max_possible_cost": comparison["max_possible_cost"],
+                "is_exact": comparison["is_exact"],
+                "top_edits": [
+                    {k: v for k, v in edit.items() if k != "parameter_diff"}
+                    for edit in comparison["top_edits"]
+                ],
+            }
+        )
+    except PairTimeoutError:
+        result["error"] = f"Comparison timed out after {timeout}s"
+        result["timed_out"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["duration"] = round(time.monotonic() - start_time, 3)
+    return result
+
+
+def aggregate_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Calculate aggregate statistics of a batch.
+
+    Args:
+        results: Results of compare_pair
+
+    Returns:
+        Dictionary with:
+            - pairs, compared, failed, timed_out, exact: Counts of pairs
+            - similarity: Mean, min, percentiles and max of similarity scores,
+              or None if no pair was compared
+            - edits_by_priority: Number of edits of each priority
+    """
+    compared = [result for result in results if "error" not in result]
+    scores = np.array([result["similarity_score"] for result in compared])
+
+    edits_by_priority = dict.fromkeys(PRIORITIES, 0)
+    for result in compared:
+        for edit in result["top_edits"]:
+            edits_by_priority[edit["priority"]] += 1
+
+    similarity = None
+    if len(scores):
+        p50, p90, p95 = np.percentile(scores, [50, 90, 95])
+        similarity = {
+            "mean": float(scores.mean()),
+            "min": float(scores.min()),
+            "p50": float(p50),
+            "p90": float(p90),
+            "p95": float(p95),
+            "max": float(scores.max()),
+        }
+
+    return {
+        "pairs": len(results),
+        "compared": len(compared),
+        "failed": len(results) - len(compared),
+        "timed_out": sum(1 for result in results if result.get("timed_out")),
+        "exact": sum(1 for result in compared if result["is_exact"]),
+        "similarity": similarity,
+        "edits_by_priority": edits_by_priority,
+    }
+
+
+def run_batch(
+    pairs: List[Dict[str, str]],
+    output: TextIO,
+    config_source: Optional[str] = None,
+    workers: Optional[int] = None,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+) -> Dict[str, Any]:
+    """
+    Compare pairs over a process pool, writing a JSON line per result as it completes.
+
+    If a worker process dies, e.g. killed for running out of memory, the pool
+    is broken, and the pairs not yet compared are reported as failed.
+
+    Args:
+        pairs: Pairs to compare, as returned by load_manifest
+        output: Stream to write results to
+        config_source: Configuration to load in each worker, as for load_config
+        workers: Number of worker processes, defaulting to the CPU count
+        timeout: Timeout in seconds per pair, or None for no timeout
+
+    Returns:
+        Aggregate statistics, as returned by aggregate_results, also written
+        as the last line under 'summary'
+    """
+    start_time = time.monotonic()
+    results = []
+
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(config_source,),
+    ) as executor:
+        futures = {executor.submit(compare_pair, pair, timeout): pair for pair in pairs}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                result = dict(futures[future])
+                result["error"] = f"{type(e).__name__}: {e}"
+            results.append(result)
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+    summary = aggregate_results(results)
+    summary["duration"] = round(time.monotonic() - start_time, 3)
+    output.write(json.dumps({"summary": summary}) + "\n")
+    output.flush()
+
+    return summary
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+
+    if args.config:
+        config_source = args.config
+    elif args.preset:
+        config_source = f"preset:{args.preset}"
+    else:
+        config_source = None  # Default (standard)
+
+    # Load the configuration once here to fail before starting workers
+    try:
+        load_config(config_source)
+    except Exception as e:
+        print(f"Error loading configuration: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        pairs = load_manifest(args.manifest)
+    except Exception as e:
+        print(f"Error loading manifest: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        summary = run_batch(
+            pairs, output, config_source, args.workers, args.timeout or None
+        )
+    finally:
+        if args.output:
+            output.close()
+
+    print(
+        f"Compared {summary['compared']}/{summary['pairs']} pairs "
+        f"({summary['failed']} failed) in {summary['duration']:.1f}s",
+        file=sys.stderr,
+    )
+
+    # Always exit with 0 - let the caller interpret the similarity scores
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nInterrupted by user", file=sys.stderr)
+        sys.exit(130)
@@ -100,6 +100,7 @@ def format_output_json(
         "similarity_percentage": f"{result['similarity_score'] * 100:.1f}%",
         "edit_cost": result["edit_cost"],
         "max_possible_cost": result["max_possible_cost"],
+        "is_exact": result["is_exact"],
         "top_edits": result["top_edits"],
         "metadata": metadata,
     }
@@ -190,6 +191,7 @@ def format_output_summary(
     lines.append(f"Overall Similarity: {similarity_pct:.1f}%")
     lines.append(
         f"Edit Cost:          {result['edit_cost']:.1f} / {result['max_possible_cost']:.1f}"
+        + ("" if result["is_exact"] else " (approximate)")
     )
     lines.append("")
 
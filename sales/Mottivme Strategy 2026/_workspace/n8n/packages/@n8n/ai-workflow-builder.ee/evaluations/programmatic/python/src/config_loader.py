@@ -4,7 +4,8 @@ Supports loading from YAML, JSON, and built-in presets.
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Set
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Any, Set
 from pathlib import Path
 import yaml
 import json
@@ -27,6 +28,27 @@ def _get_param_path_matching_pattern(pattern: str) -> str:
     return regex_pattern
 
 
+@lru_cache(maxsize=None)
+def _compile_param_path_pattern(pattern: str) -> re.Pattern:
+    """Compile a glob-like pattern to a regex matching whole parameter paths"""
+    return re.compile(f"^{_get_param_path_matching_pattern(pattern)}$")
+
+
+def _combine_param_path_patterns(patterns: Iterable[str]) -> Optional[re.Pattern]:
+    """
+    Combine glob-like patterns into one regex matching whole parameter paths.
+    Each pattern is a named group rule0, rule1, etc., in order, so that
+    Match.lastgroup tells the first pattern matching a path.
+    """
+    alternatives = [
+        f"(?P<rule{i}>{_get_param_path_matching_pattern(pattern)})"
+        for i, pattern in enumerate(patterns)
+    ]
+    if not alternatives:
+        return None
+    return re.compile(f"^(?:{'|'.join(alternatives)})$")
+
+
 @dataclass
 class NodeIgnoreRule:
     """Rule for ignoring nodes during comparison"""
@@ -61,8 +83,7 @@ class ParameterComparisonRule:
 
     def matches_parameter(self, param_path: str) -> bool:
         """Check if this rule applies to a parameter path"""
-        regex_pattern = _get_param_path_matching_pattern(self.parameter)
-        return bool(re.match(f"^{regex_pattern}$", param_path))
+        return bool(_compile_param_path_pattern(self.parameter).match(param_path))
 
 
 @dataclass
@@ -92,9 +113,137 @@ class ExemptionRule:
         return match
 
 
+class CompiledRules:
+    """
+    Rules of a configuration compiled for fast matching.
+
+    Parameter path patterns are combined into one regex per set of rules, and
+    rules for node types are indexed by type, so that checking a parameter or
+    node does not scan every rule. Rules keep their order, so the first rule
+    matching still wins.
+    """
+
+    def __init__(self, config: "WorkflowComparisonConfig"):
+        # Nodes
+        self.ignored_node_types = set(config.ignored_node_types) | {
+            rule.node_type for rule in config.ignored_node_rules if rule.node_type
+        }
+        self.ignored_node_names = {
+            rule.name for rule in config.ignored_node_rules if rule.name
+        }
+        self.ignored_node_patterns = [
+            re.compile(rule.pattern)
+            for rule in config.ignored_node_rules
+            if rule.pattern
+        ]
+
+        # Parameters
+        self.ignored_global_parameters = set(config.ignored_global_parameters)
+        self.ignored_node_type_parameters = {
+            node_type: (set(paths), _combine_param_path_patterns(paths))
+            for node_type, paths in config.ignored_node_type_parameters.items()
+        }
+        self.ignored_parameter_paths = _combine_param_path_patterns(
+            config.ignored_parameter_paths
+        )
+        self.parameter_rules = list(config.parameter_rules)
+        self.parameter_rule_pattern = _combine_param_path_patterns(
+            rule.parameter for rule in self.parameter_rules
+        )
+
+        # Exemptions, as (index, rule) to keep their order. Rules matching by
+        # node type only are indexed by it, the others are checked for every node.
+        self.exemptions = {
+            context: self._index_exemptions(exemptions)
+            for context, exemptions in (
+                ("generated", config.optional_in_generated),
+                ("ground_truth", config.optional_in_ground_truth),
+            )
+        }
+
+        # Similarity groups of each node type
+        self.node_type_groups: Dict[str, Set[str]] = {}
+        for group_name, types in config.similarity_groups.items():
+            for node_type in types:
+                self.node_type_groups.setdefault(node_type, set()).add(group_name)
+
+    @staticmethod
+    def _index_exemptions(
+        exemptions: List["ExemptionRule"],
+    ) -> tuple[
+        Dict[str, List[tuple[int, "ExemptionRule"]]], List[tuple[int, "ExemptionRule"]]
+    ]:
+        by_node_type: Dict[str, List[tuple[int, ExemptionRule]]] = {}
+        by_name: List[tuple[int, ExemptionRule]] = []
+        for i, exemption in enumerate(exemptions):
+            if exemption.name_pattern:
+                by_name.append((i, exemption))
+            elif exemption.node_type:
+                by_node_type.setdefault(exemption.node_type, []).append((i, exemption))
+        return by_node_type, by_name
+
+    def should_ignore_node(self, node: Dict) -> bool:
+        if node.get("type") in self.ignored_node_types:
+            return True
+        if node.get("name") in self.ignored_node_names:
+            return True
+        name = node.get("name", "")
+        return any(pattern.match(name) for pattern in self.ignored_node_patterns)
+
+    def should_ignore_parameter(self, node_type: str, param_path: str) -> bool:
+        param_name = param_path.rsplit(".", 1)[-1]
+        if param_name in self.ignored_global_parameters:
+            return True
+
+        node_type_parameters = self.ignored_node_type_parameters.get(node_type)
+        if node_type_parameters:
+            paths, pattern = node_type_parameters
+            if param_path in paths or (pattern and pattern.match(param_path)):
+                return True
+
+        return bool(
+            self.ignored_parameter_paths
+            and self.ignored_parameter_paths.match(param_path)
+        )
+
+    def get_parameter_rule(
+        self, param_path: str
+    ) -> Optional["ParameterComparisonRule"]:
+        if not self.parameter_rule_pattern:
+            return None
+        match = self.parameter_rule_pattern.match(param_path)
+        if not match or not match.lastgroup:
+            return None
+        return self.parameter_rules[int(match.lastgroup.removeprefix("rule"))]
+
+    def get_exemption_penalty(self, node: Dict, context: str) -> Optional[float]:
+        by_node_type, by_name = self.exemptions[context]
+        node_type = node.get("type")
+        candidates = by_name
+        if isinstance(node_type, str) and node_type in by_node_type:
+            candidates = sorted(by_name + by_node_type[node_type], key=lambda c: c[0])
+
+        for _, exemption in candidates:
+            if exemption.matches(node):
+                return exemption.penalty
+
+        return None
+
+    def are_node_types_similar(self, type1: str, type2: str) -> bool:
+        groups1 = self.node_type_groups.get(type1)
+        groups2 = self.node_type_groups.get(type2)
+        return bool(groups1 and groups2 and not groups1.isdisjoint(groups2))
+
+
 @dataclass
 class WorkflowComparisonConfig:
-    """Complete configuration for workflow comparison"""
+    """
+    Complete configuration for workflow comparison.
+
+    Rules are compiled when loaded, or on first use for a config built in code.
+    After changing rules of a config already compiled, e.g. adding to
+    ignored_node_types, call compile_rules() for the change to take effect.
+    """
 
     version: str = "1.0"
     name: str = "default"
@@ -136,54 +285,43 @@ class WorkflowComparisonConfig:
     ignored_connection_types: Set[str] = field(default_factory=set)
     equivalent_connection_types: List[List[str]] = field(default_factory=list)
 
+    # GED search
+    ged_timeout: Optional[float] = None
+    ged_exact_node_limit: Optional[int] = None
+
     # Output config
     max_edits: int = 15
     group_by: str = "priority"
     include_explanations: bool = True
     include_suggestions: bool = True
 
-    def should_ignore_node(self, node: Dict) -> bool:
-        """Check if node should be ignored"""
-        # Check node type
-        if node.get("type") in self.ignored_node_types:
-            return True
+    # Rules compiled for fast matching
+    _compiled_rules: Optional[CompiledRules] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
-        # Check node rules
-        for rule in self.ignored_node_rules:
-            if rule.matches(node):
-                return True
+    @property
+    def _rules(self) -> CompiledRules:
+        if self._compiled_rules is None:
+            self.compile_rules()
+        assert self._compiled_rules is not None
+        return self._compiled_rules
 
-        return False
+    def compile_rules(self) -> None:
+        """Compile ignore rules, parameter rules, exemptions and similarity groups"""
+        self._compiled_rules = CompiledRules(self)
+
+    def should_ignore_node(self, node: Dict) -> bool:
+        """Check if node should be ignored"""
+        return self._rules.should_ignore_node(node)
 
     def should_ignore_parameter(self, node_type: str, param_path: str) -> bool:
         """Check if parameter should be ignored"""
-        # Global parameters
-        param_name = param_path.split(".")[-1]
-        if param_name in self.ignored_global_parameters:
-            return True
-
-        # Node type specific
-        if node_type in self.ignored_node_type_parameters:
-            if param_path in self.ignored_node_type_parameters[node_type]:
-                return True
-            # Check wildcards
-            for ignored_path in self.ignored_node_type_parameters[node_type]:
-                if self._matches_path_pattern(param_path, ignored_path):
-                    return True
-
-        # Parameter path patterns
-        for pattern in self.ignored_parameter_paths:
-            if self._matches_path_pattern(param_path, pattern):
-                return True
-
-        return False
+        return self._rules.should_ignore_parameter(node_type, param_path)
 
     def get_parameter_rule(self, param_path: str) -> Optional[ParameterComparisonRule]:
         """Get comparison rule for parameter"""
-        for rule in self.parameter_rules:
-            if rule.matches_parameter(param_path):
-                return rule
-        return None
+        return self._rules.get_parameter_rule(param_path)
 
     def get_exemption_penalty(
         self,
@@ -191,30 +329,18 @@ class WorkflowComparisonConfig:
         context: str,  # 'generated' or 'ground_truth'
     ) -> Optional[float]:
         """Get exemption penalty for a node, if applicable"""
-        exemptions = (
-            self.optional_in_generated
-            if context == "generated"
-            else self.optional_in_ground_truth
+        return self._rules.get_exemption_penalty(
+            node, "generated" if context == "generated" else "ground_truth"
         )
 
-        for exemption in exemptions:
-            if exemption.matches(node):
-                return exemption.penalty
-
-        return None
-
     @staticmethod
     def _matches_path_pattern(path: str, pattern: str) -> bool:
         """Check if path matches pattern (supports ** and *)"""
-        regex_pattern = _get_param_path_matching_pattern(pattern)
-        return bool(re.match(f"^{regex_pattern}$", path))
+        return bool(_compile_param_path_pattern(pattern).match(path))
 
     def are_node_types_similar(self, type1: str, type2: str) -> bool:
         """Check if two node types are in the same similarity group"""
-        for group_name, types in self.similarity_groups.items():
-            if type1 in types and type2 in types:
-                return True
-        return False
+        return self._rules.are_node_types_similar(type1, type2)
 
     def to_dict(self) -> Dict:
         """Convert config to dictionary for serialization"""
@@ -244,6 +370,10 @@ class WorkflowComparisonConfig:
                 },
             },
             "similarity_groups": self.similarity_groups,
+            "search": {
+                "timeout": self.ged_timeout,
+                "exact_node_limit": self.ged_exact_node_limit,
+            },
             "max_edits": self.max_edits,
         }
 
@@ -335,6 +465,11 @@ class WorkflowComparisonConfig:
         )
         config.equivalent_connection_types = connections.get("equivalent_types", [])
 
+        # GED search
+        search = data.get("search", {})
+        config.ged_timeout = search.get("timeout")
+        config.ged_exact_node_limit = search.get("exact_node_limit")
+
         # Output config
         output = data.get("output", {})
         config.max_edits = output.get("max_edits", 15)
@@ -342,6 +477,9 @@ class WorkflowComparisonConfig:
         config.include_explanations = output.get("include_explanations", True)
         config.include_suggestions = output.get("include_suggestions", True)
 
+        # Compile now, for invalid rules to fail on loading
+        config.compile_rules()
+
         return config
 
     @classmethod
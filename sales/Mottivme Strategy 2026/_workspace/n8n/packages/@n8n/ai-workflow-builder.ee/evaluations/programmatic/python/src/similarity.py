@@ -2,8 +2,14 @@
 Calculate workflow similarity using graph edit distance.
 """
 
+import sys
+import time
+from dataclasses import dataclass
+
 import networkx as nx
-from typing import Dict, List, Any, Optional
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from typing import Callable, Dict, List, Any, Optional
 from src.config_loader import WorkflowComparisonConfig
 from src.cost_functions import (
     node_substitution_cost,
@@ -33,6 +39,8 @@ def calculate_graph_edit_distance(
             - edit_cost: Total cost of edits
             - max_possible_cost: Theoretical maximum cost
             - top_edits: List of most important edit operations
+            - is_exact: Whether edit_cost is the exact GED, or the cost of the
+              best edit path found within the time budget
     """
     # Handle empty graphs
     if g1.number_of_nodes() == 0 and g2.number_of_nodes() == 0:
@@ -41,6 +49,7 @@ def calculate_graph_edit_distance(
             "edit_cost": 0.0,
             "max_possible_cost": 0.0,
             "top_edits": [],
+            "is_exact": True,
         }
 
     # Relabel graphs to use structural IDs instead of node names
@@ -48,16 +57,19 @@ def calculate_graph_edit_distance(
     g1_relabeled, g1_mapping = _relabel_graph_by_structure(g1)
     g2_relabeled, g2_mapping = _relabel_graph_by_structure(g2)
 
-    # Create cost function closures with config
+    # Compute all node costs once, as the search asks for the same ones over and over
+    node_costs = _NodeCostMatrix.compute(g1_relabeled, g2_relabeled, config)
+
+    # Create cost function closures looking up the precomputed costs
     # NetworkX passes node ATTRIBUTE DICTS, not node names
     def node_subst_cost(n1_attrs, n2_attrs):
-        return node_substitution_cost(n1_attrs, n2_attrs, config)
+        return node_costs.substitution[n1_attrs["_cost_index"], n2_attrs["_cost_index"]]
 
     def node_del_cost(n_attrs):
-        return node_deletion_cost(n_attrs, config)
+        return node_costs.deletion[n_attrs["_cost_index"]]
 
     def node_ins_cost(n_attrs):
-        return node_insertion_cost(n_attrs, config)
+        return node_costs.insertion[n_attrs["_cost_index"]]
 
     # Edge match function - returns True if edges are equivalent
     # This is better than cost functions for preventing false positives
@@ -77,54 +89,61 @@ def calculate_graph_edit_distance(
 
         return False
 
-    # Calculate GED using NetworkX
-    # Note: This can be slow for large graphs, but workflow graphs are typically small
+    # Calculate GED starting from a fast bipartite approximation, refined toward the
+    # exact GED while the time budget lasts, if any. The exact search is exponential
+    # in the number of nodes, so it is skipped for graphs above the node limit, if any.
     try:
-        # Use optimize_edit_paths with edge_match instead of edge cost functions
-        # This prevents false positive edge insertions/deletions
-        edit_path_generator = nx.optimize_edit_paths(
-            g1_relabeled,
-            g2_relabeled,
-            node_subst_cost=node_subst_cost,
-            node_del_cost=node_del_cost,
-            node_ins_cost=node_ins_cost,
-            edge_match=edge_match,
-            upper_bound=None,  # Calculate exact
+        node_edit_path, edge_edit_path, edit_cost = _approximate_edit_path(
+            g1_relabeled, g2_relabeled, node_costs, edge_match
         )
-
-        # Get the best (first) edit path
-        best_edit_path = None
-        for node_edit_path, edge_edit_path, cost in edit_path_generator:
-            best_edit_path = (node_edit_path, edge_edit_path, cost)
-            break  # Take the first (best) path
-
-        if not best_edit_path:
-            # Fallback to basic calculation
-            edit_cost = _calculate_basic_edit_cost(g1, g2, config)
-            node_edit_path = []
-            edge_edit_path = []
-        else:
-            node_edit_path, edge_edit_path, edit_cost = best_edit_path
-
-        # Extract and rank edit operations
-        # Use the actual edit path from NetworkX if available
-        if best_edit_path:
-            edit_ops = _extract_operations_from_path(
-                node_edit_path,
-                edge_edit_path,
+        is_exact = False
+
+        node_count = max(g1.number_of_nodes(), g2.number_of_nodes())
+        if (
+            config.ged_exact_node_limit is None
+            or node_count <= config.ged_exact_node_limit
+        ):
+            start_time = time.monotonic()
+
+            # Use optimize_edit_paths with edge_match instead of edge cost functions
+            # This prevents false positive edge insertions/deletions
+            # Each path it yields is cheaper than the previous one, so the last is the best
+            for path in nx.optimize_edit_paths(
                 g1_relabeled,
                 g2_relabeled,
-                config,
-                g1_mapping,
-                g2_mapping,
+                node_subst_cost=node_subst_cost,
+                node_del_cost=node_del_cost,
+                node_ins_cost=node_ins_cost,
+                edge_match=edge_match,
+                upper_bound=edit_cost,
+                timeout=config.ged_timeout,
+            ):
+                if path[2] < edit_cost:
+                    node_edit_path, edge_edit_path, edit_cost = path
+
+            # The search stops early without telling once the timeout is met
+            is_exact = (
+                config.ged_timeout is None
+                or time.monotonic() - start_time < config.ged_timeout
             )
-        else:
-            edit_ops = []
+
+        # Extract and rank edit operations
+        edit_ops = _extract_operations_from_path(
+            node_edit_path,
+            edge_edit_path,
+            g1_relabeled,
+            g2_relabeled,
+            config,
+            node_costs,
+            g1_mapping,
+            g2_mapping,
+        )
     except Exception as e:
         # Fallback if NetworkX GED fails
-        print(f"Warning: GED calculation failed, using fallback: {e}")
+        print(f"Warning: GED calculation failed, using fallback: {e}", file=sys.stderr)
         edit_cost = _calculate_basic_edit_cost(g1, g2, config)
         edit_ops = []
+        is_exact = False
 
     # Calculate theoretical maximum cost
     max_cost = _calculate_max_cost(g1, g2, config)
@@ -141,9 +160,151 @@ def calculate_graph_edit_distance(
         "edit_cost": edit_cost,
         "max_possible_cost": max_cost,
         "top_edits": sorted(edit_ops, key=lambda x: x["cost"], reverse=True),
+        "is_exact": is_exact,
     }
 
 
+@dataclass
+class _NodeCostMatrix:
+    """Costs of all node edit operations between two graphs, indexed by node"""
+
+    index1: Dict[str, int]
+    index2: Dict[str, int]
+    substitution: np.ndarray  # g1 nodes x g2 nodes
+    deletion: np.ndarray  # g1 nodes
+    insertion: np.ndarray  # g2 nodes
+
+    @classmethod
+    def compute(
+        cls, g1: nx.DiGraph, g2: nx.DiGraph, config: WorkflowComparisonConfig
+    ) -> "_NodeCostMatrix":
+        """
+        Compute the cost of every node substitution, deletion and insertion.
+
+        Each node is annotated with its index as the `_cost_index` attribute, so
+        that costs can be looked up from the attribute dicts NetworkX passes.
+
+        Args:
+            g1: First graph (relabeled)
+            g2: Second graph (relabeled)
+            config: Configuration
+
+        Returns:
+            Cost matrix of the two graphs
+        """
+        index1 = {node: i for i, node in enumerate(g1.nodes)}
+        index2 = {node: j for j, node in enumerate(g2.nodes)}
+        substitution = np.array(
+            [
+                [
+                    node_substitution_cost(data1, data2, config)
+                    for data2 in g2.nodes.values()
+                ]
+                for data1 in g1.nodes.values()
+            ],
+            dtype=float,
+        ).reshape(len(index1), len(index2))
+        deletion = np.array(
+            [node_deletion_cost(data, config) for data in g1.nodes.values()],
+            dtype=float,
+        )
+        insertion = np.array(
+            [node_insertion_cost(data, config) for data in g2.nodes.values()],
+            dtype=float,
+        )
+
+        for graph, index in ((g1, index1), (g2, index2)):
+            for node, i in index.items():
+                graph.nodes[node]["_cost_index"] = i
+
+        return cls(index1, index2, substitution, deletion, insertion)
+
+
+def _approximate_edit_path(
+    g1: nx.DiGraph,
+    g2: nx.DiGraph,
+    node_costs: _NodeCostMatrix,
+    edge_match: Callable[[Dict, Dict], bool],
+) -> tuple[List[tuple], List[tuple], float]:
+    """
+    Approximate the GED by an optimal assignment of nodes (bipartite GED).
+
+    Nodes are matched by solving the assignment problem over a square cost matrix
+    with substitutions in the top left, deletions and insertions on the diagonals
+    of the top right and bottom left, and zeros in the bottom right. The cost of
+    each node includes an estimate of the edges it would need edited, based on the
+    difference in degrees. Edges are then edited as the node matching implies.
+
+    Args:
+        g1: First graph
+        g2: Second graph
+        node_costs: Precomputed node costs
+        edge_match: Check if two edges match
+
+    Returns:
+        Tuple of (node_edit_path, edge_edit_path, cost) in the format of
+        nx.optimize_edit_paths, whose cost is an upper bound of the exact GED
+    """
+    nodes1 = list(node_costs.index1)
+    nodes2 = list(node_costs.index2)
+    n, m = len(nodes1), len(nodes2)
+
+    subst_costs = node_costs.substitution
+    del_costs = node_costs.deletion
+    ins_costs = node_costs.insertion
+
+    # Edges cost 1 to edit, as in nx.optimize_edit_paths with edge_match.
+    # Each edge is shared by two nodes, so each node accounts for half of it.
+    in1 = np.array([g1.in_degree(u) for u in nodes1]).reshape(n, 1)
+    out1 = np.array([g1.out_degree(u) for u in nodes1]).reshape(n, 1)
+    in2 = np.array([g2.in_degree(v) for v in nodes2]).reshape(1, m)
+    out2 = np.array([g2.out_degree(v) for v in nodes2]).reshape(1, m)
+
+    cost_matrix = np.zeros((n + m, m + n))
+    cost_matrix[:n, :m] = subst_costs + (abs(in1 - in2) + abs(out1 - out2)) / 2
+    cost_matrix[:n, m:] = np.inf
+    cost_matrix[n:, :m] = np.inf
+    np.fill_diagonal(cost_matrix[:n, m:], del_costs + (in1 + out1).ravel() / 2)
+    np.fill_diagonal(cost_matrix[n:, :m], ins_costs + (in2 + out2).ravel() / 2)
+
+    rows, cols = linear_sum_assignment(cost_matrix)
+
+    node_edit_path: List[tuple] = []
+    cost = 0.0
+    for i, j in zip(rows, cols):
+        if i < n and j < m:
+            node_edit_path.append((nodes1[i], nodes2[j]))
+            cost += subst_costs[i, j]
+        elif i < n:
+            node_edit_path.append((nodes1[i], None))
+            cost += del_costs[i]
+        elif j < m:
+            node_edit_path.append((None, nodes2[j]))
+            cost += ins_costs[j]
+
+    # Keep edges between matched nodes, delete the rest and insert the missing ones
+    node_mapping = {u: v for u, v in node_edit_path if u is not None}
+    edge_edit_path: List[tuple] = []
+    matched_edges = set()
+    for e1 in g1.edges:
+        e2 = (node_mapping[e1[0]], node_mapping[e1[1]])
+        if g2.has_edge(*e2):
+            edge_edit_path.append((e1, e2))
+            matched_edges.add(e2)
+            if not edge_match(g1.edges[e1], g2.edges[e2]):
+                cost += 1
+        else:
+            edge_edit_path.append((e1, None))
+            cost += 1
+
+    for e2 in g2.edges:
+        if e2 not in matched_edges:
+            edge_edit_path.append((None, e2))
+            cost += 1
+
+    return node_edit_path, edge_edit_path, float(cost)
+
+
 def _calculate_basic_edit_cost(
     g1: nx.DiGraph, g2: nx.DiGraph, config: WorkflowComparisonConfig
 ) -> float:
@@ -226,6 +387,7 @@ def _extract_operations_from_path(
     g1: nx.DiGraph,
     g2: nx.DiGraph,
     config: WorkflowComparisonConfig,
+    node_costs: _NodeCostMatrix,
     g1_name_mapping: Dict[str, str],
     g2_name_mapping: Dict[str, str],
 ) -> List[Dict[str, Any]]:
@@ -240,6 +402,7 @@ def _extract_operations_from_path(
         edge_edit_path: List of edge edit tuples ((u1, v1), (u2, v2))
         g1, g2: Relabeled graphs
         config: Configuration
+        node_costs: Precomputed node costs of the graphs
         g1_name_mapping, g2_name_mapping: Mappings to original names
 
     Returns:
@@ -261,7 +424,7 @@ def _extract_operations_from_path(
             # Node insertion (v in g2 is inserted)
             node_data = g2.nodes[v]
             display_name = get_display_name(v, g2_name_mapping, g2)
-            cost = node_insertion_cost(node_data, config)
+            cost = float(node_costs.insertion[node_costs.index2[v]])
             if cost > 0:
                 operations.append(
                     {
@@ -278,7 +441,7 @@ def _extract_operations_from_path(
             # Node deletion (u in g1 is deleted)
             node_data = g1.nodes[u]
             display_name = get_display_name(u, g1_name_mapping, g1)
-            cost = node_deletion_cost(node_data, config)
+            cost = float(node_costs.deletion[node_costs.index1[u]])
             if cost > 0:
                 operations.append(
                     {
@@ -296,7 +459,9 @@ def _extract_operations_from_path(
             node1_data = g1.nodes[u]
             node2_data = g2.nodes[v]
             display_name = get_display_name(u, g1_name_mapping, g1)
-            cost = node_substitution_cost(node1_data, node2_data, config)
+            cost = float(
+                node_costs.substitution[node_costs.index1[u], node_costs.index2[v]]
+            )
             if cost > 0:
                 type1 = node1_data.get("type", "unknown")
                 type2 = node2_data.get("type", "unknown")
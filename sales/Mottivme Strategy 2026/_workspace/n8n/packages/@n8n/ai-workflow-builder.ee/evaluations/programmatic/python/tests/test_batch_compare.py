@@ -0,0 +1,174 @@
+"""
+Tests for batch_compare module.
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.batch_compare import aggregate_results, load_manifest, run_batch
+
+EXAMPLES = Path(__file__).parent.parent / "example_workflows"
+
+
+def test_load_manifest_jsonl(tmp_path):
+    """Test loading pairs from JSONL, with paths relative to the manifest"""
+    manifest = tmp_path / "pairs.jsonl"
+    manifest.write_text(
+        '{"id": "same", "generated": "a.json", "ground_truth": "b.json"}\n'
+        "\n"
+        '{"generated": "cases/c.json", "ground_truth": "/abs/d.json"}\n'
+    )
+
+    pairs = load_manifest(str(manifest))
+
+    assert pairs == [
+        {
+            "id": "same",
+            "generated": str(tmp_path / "a.json"),
+            "ground_truth": str(tmp_path / "b.json"),
+        },
+        {
+            "id": "3",
+            "generated": str(tmp_path / "cases" / "c.json"),
+            "ground_truth": "/abs/d.json",
+        },
+    ]
+
+
+def test_load_manifest_invalid_line(tmp_path):
+    """Test that invalid manifest entries are reported with their line"""
+    manifest = tmp_path / "pairs.jsonl"
+    manifest.write_text('{"generated": "a.json"}\n')
+
+    with pytest.raises(ValueError, match="line 1"):
+        load_manifest(str(manifest))
+
+
+def test_load_manifest_directory(tmp_path):
+    """Test loading pairs from a directory with a subdirectory per pair"""
+    (tmp_path / "case-b").mkdir()
+    (tmp_path / "case-a").mkdir()
+    (tmp_path / "README.md").write_text("")
+
+    pairs = load_manifest(str(tmp_path))
+
+    assert [pair["id"] for pair in pairs] == ["case-a", "case-b"]
+    assert pairs[0]["generated"] == str(tmp_path / "case-a" / "generated.json")
+    assert pairs[0]["ground_truth"] == str(tmp_path / "case-a" / "ground_truth.json")
+
+
+def test_run_batch_streams_results_and_summary(tmp_path):
+    """Test comparing pairs over the pool, including a pair that fails"""
+    for case, generated in (
+        ("identical", "simple_workflow.json"),
+        ("wrong", "generated_wrong.json"),
+    ):
+        (tmp_path / case).mkdir()
+        shutil.copy(EXAMPLES / generated, tmp_path / case / "generated.json")
+        shutil.copy(
+            EXAMPLES / "simple_workflow.json", tmp_path / case / "ground_truth.json"
+        )
+    (tmp_path / "missing").mkdir()
+
+    output = io.StringIO()
+    summary = run_batch(
+        load_manifest(str(tmp_path)), output, "preset:standard", workers=2
+    )
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    results = {line["id"]: line for line in lines[:-1]}
+
+    assert lines[-1] == {"summary": summary}
+    assert results["identical"]["similarity_score"] == 1.0
+    assert results["identical"]["is_exact"] is True
+    assert results["wrong"]["similarity_score"] < 1.0
+    assert "FileNotFoundError" in results["missing"]["error"]
+    assert summary["pairs"] == 3
+    assert summary["compared"] == 2
+    assert summary["failed"] == 1
+    assert summary["similarity"]["max"] == 1.0
+    assert sum(summary["edits_by_priority"].values()) == len(
+        results["wrong"]["top_edits"]
+    )
+
+
+def test_run_batch_times_out_pair(tmp_path):
+    """Test that a pair exceeding its timeout is reported as timed out"""
+    manifest = tmp_path / "pairs.jsonl"
+    manifest.write_text(
+        json.dumps(
+            {
+                "generated": str(EXAMPLES / "multi_trigger.json"),
+                "ground_truth": str(EXAMPLES / "multi_trigger_missing_node.json"),
+            }
+        )
+    )
+
+    output = io.StringIO()
+    summary = run_batch(load_manifest(str(manifest)), output, workers=1, timeout=1e-6)
+
+    result = json.loads(output.getvalue().splitlines()[0])
+    assert result["timed_out"] is True
+    assert summary["timed_out"] == 1
+    assert summary["similarity"] is None
+
+
+def _exit_worker(*args):
+    os._exit(1)
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="Workers only inherit the patched module when forked",
+)
+def test_run_batch_reports_pairs_of_broken_pool(tmp_path, monkeypatch):
+    """Test that pairs are reported as failed when a worker process dies"""
+    monkeypatch.setattr("src.batch_compare.build_workflow_graph", _exit_worker)
+    pairs = [
+        {
+            "id": f"case-{i}",
+            "generated": str(EXAMPLES / "simple_workflow.json"),
+            "ground_truth": str(EXAMPLES / "simple_workflow.json"),
+        }
+        for i in range(3)
+    ]
+
+    output = io.StringIO()
+    summary = run_batch(pairs, output, workers=1)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert lines[-1] == {"summary": summary}
+    assert {line["id"] for line in lines[:-1]} == {"case-0", "case-1", "case-2"}
+    assert all("BrokenProcessPool" in line["error"] for line in lines[:-1])
+    assert summary["pairs"] == 3
+    assert summary["failed"] == 3
+
+
+def test_aggregate_results():
+    """Test aggregate statistics of similarity scores and edits"""
+    results = [
+        {
+            "similarity_score": score,
+            "is_exact": True,
+            "top_edits": [{"priority": "critical"}, {"priority": "minor"}],
+        }
+        for score in (0.2, 0.4, 0.6, 0.8)
+    ] + [{"error": "boom"}]
+
+    summary = aggregate_results(results)
+
+    assert summary["pairs"] == 5
+    assert summary["compared"] == 4
+    assert summary["failed"] == 1
+    assert summary["exact"] == 4
+    assert summary["similarity"]["mean"] == pytest.approx(0.5)
+    assert summary["similarity"]["p50"] == pytest.approx(0.5)
+    assert summary["similarity"]["min"] == 0.2
+    assert summary["edits_by_priority"] == {"critical": 4, "major": 0, "minor": 4}
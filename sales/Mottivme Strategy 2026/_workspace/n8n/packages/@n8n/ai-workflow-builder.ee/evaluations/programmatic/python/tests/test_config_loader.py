@@ -0,0 +1,147 @@
+"""
+Tests for config_loader module.
+"""
+
+import copy
+import pickle
+
+from src.config_loader import (
+    ExemptionRule,
+    NodeIgnoreRule,
+    ParameterComparisonRule,
+    WorkflowComparisonConfig,
+)
+
+
+def test_parameter_rule_first_match_wins():
+    """Test that the first parameter rule matching a path is returned"""
+    config = WorkflowComparisonConfig()
+    config.parameter_rules = [
+        ParameterComparisonRule(parameter="options.*.temperature", type="numeric"),
+        ParameterComparisonRule(parameter="options.**", type="exact"),
+        ParameterComparisonRule(parameter="options.temperature", type="numeric"),
+    ]
+
+    assert (
+        config.get_parameter_rule("options.llm.temperature")
+        is (config.parameter_rules[0])
+    )
+    assert (
+        config.get_parameter_rule("options.temperature") is (config.parameter_rules[1])
+    )
+    assert (
+        config.get_parameter_rule("options.llm.model.temperature")
+        is (config.parameter_rules[1])
+    )
+    assert config.get_parameter_rule("temperature") is None
+
+
+def test_should_ignore_parameter_patterns():
+    """Test ignoring parameters by name, node type paths and path patterns"""
+    config = WorkflowComparisonConfig()
+    config.ignored_global_parameters = {"position"}
+    config.ignored_node_type_parameters = {"test.node": {"options.*.color", "id"}}
+    config.ignored_parameter_paths = ["**.credentials"]
+
+    assert config.should_ignore_parameter("other.node", "options.position")
+    assert config.should_ignore_parameter("test.node", "id")
+    assert config.should_ignore_parameter("test.node", "options.ui.color")
+    assert not config.should_ignore_parameter("other.node", "options.ui.color")
+    assert not config.should_ignore_parameter("test.node", "options.ui.theme.color")
+    assert config.should_ignore_parameter("other.node", "auth.credentials")
+    assert not config.should_ignore_parameter("other.node", "credentials.id")
+
+
+def test_exemptions_keep_their_order():
+    """Test that exemptions by node type and by name pattern are checked in order"""
+    config = WorkflowComparisonConfig()
+    config.optional_in_generated = [
+        ExemptionRule(name_pattern="Note", penalty=1.0),
+        ExemptionRule(node_type="test.node", penalty=2.0, when={"disabled": True}),
+        ExemptionRule(node_type="test.node", penalty=3.0),
+        ExemptionRule(name_pattern=".*", penalty=4.0),
+    ]
+
+    assert (
+        config.get_exemption_penalty({"name": "Note", "type": "test.node"}, "generated")
+        == 1.0
+    )
+    assert (
+        config.get_exemption_penalty(
+            {"name": "A", "type": "test.node", "disabled": True}, "generated"
+        )
+        == 2.0
+    )
+    assert (
+        config.get_exemption_penalty({"name": "A", "type": "test.node"}, "generated")
+        == 3.0
+    )
+    assert (
+        config.get_exemption_penalty({"name": "A", "type": "other"}, "generated") == 4.0
+    )
+    assert (
+        config.get_exemption_penalty({"name": "A", "type": "test.node"}, "ground_truth")
+        is None
+    )
+
+
+def test_rules_are_recompiled_after_changes():
+    """Test that rules changed in place take effect after compile_rules()"""
+    config = WorkflowComparisonConfig()
+    node = {"name": "Sticky", "type": "n8n-nodes-base.stickyNote"}
+    assert not config.should_ignore_node(node)
+
+    config.ignored_node_types.add("n8n-nodes-base.stickyNote")
+    config.compile_rules()
+    assert config.should_ignore_node(node)
+
+    config.ignored_node_types.clear()
+    config.ignored_node_rules.append(NodeIgnoreRule(pattern="Stick"))
+    config.compile_rules()
+    assert config.should_ignore_node(node)
+
+    config.similarity_groups["agents"] = ["a.agent", "b.agent"]
+    config.compile_rules()
+    assert config.are_node_types_similar("a.agent", "b.agent")
+    assert not config.are_node_types_similar("a.agent", "c.agent")
+
+
+def test_compiled_config_can_be_copied_and_pickled():
+    """Test that a config keeps its rules through deepcopy and pickle"""
+    config = WorkflowComparisonConfig._from_dict(
+        {
+            "ignore": {
+                "node_types": ["n8n-nodes-base.stickyNote"],
+                "parameter_paths": ["options.advanced.**"],
+            }
+        }
+    )
+    node = {"name": "Sticky", "type": "n8n-nodes-base.stickyNote"}
+
+    for copied in (copy.deepcopy(config), pickle.loads(pickle.dumps(config))):
+        assert copied.should_ignore_node(node)
+        assert copied.should_ignore_parameter("test.node", "options.advanced.retries")
+
+        copied.ignored_node_types.clear()
+        copied.compile_rules()
+        assert not copied.should_ignore_node(node)
+
+    assert config.should_ignore_node(node)
+
+
+def test_from_dict_compiles_rules():
+    """Test that rules loaded from a dictionary are used"""
+    config = WorkflowComparisonConfig._from_dict(
+        {
+            "ignore": {"parameter_paths": ["options.advanced.**"]},
+            "parameter_comparison": {
+                "numeric_tolerance": [
+                    {"parameter": "options.temperature", "tolerance": 0.1}
+                ]
+            },
+        }
+    )
+
+    assert config.should_ignore_parameter("test.node", "options.advanced.retries")
+    rule = config.get_parameter_rule("options.temperature")
+    assert rule is not None and rule.type == "numeric"
@@ -2,6 +2,8 @@
 Tests for similarity module.
 """
 
+from itertools import pairwise
+
 from src.graph_builder import build_workflow_graph
 from src.similarity import calculate_graph_edit_distance
 from src.config_loader import WorkflowComparisonConfig
@@ -326,3 +328,120 @@ def test_trigger_insertion_is_critical():
         edit["priority"] == "critical" and edit["type"] == "node_insert"
         for edit in result["top_edits"]
     )
+
+
+def _chain_workflow(node_types):
+    """Build a workflow of nodes of the given types connected in a chain"""
+    names = [f"Node{i}" for i in range(len(node_types))]
+    return {
+        "name": "Chain",
+        "nodes": [
+            {"id": str(i), "name": name, "type": node_type, "parameters": {"i": i}}
+            for i, (name, node_type) in enumerate(zip(names, node_types))
+        ],
+        "connections": {
+            source: {"main": [[{"node": target, "type": "main", "index": 0}]]}
+            for source, target in pairwise(names)
+        },
+    }
+
+
+def test_small_workflows_are_compared_exactly():
+    """Test that the exact search runs for workflows within the node limit"""
+    workflow1 = _chain_workflow(["a.node", "b.node", "c.node", "a.node"])
+    workflow2 = _chain_workflow(["a.node", "b.node", "d.node", "a.node", "b.node"])
+
+    config = WorkflowComparisonConfig()
+    g1 = build_workflow_graph(workflow1, config)
+    g2 = build_workflow_graph(workflow2, config)
+
+    result = calculate_graph_edit_distance(g1, g2, config)
+
+    assert result["is_exact"] is True
+    assert any(edit["type"] == "node_insert" for edit in result["top_edits"])
+
+
+def test_search_is_exact_by_default():
+    """Test that the exact search has no node limit or timeout unless configured"""
+    node_types = ["a.node", "b.node", "c.node", "d.node"] * 10
+    workflow1 = _chain_workflow(node_types)
+    workflow2 = _chain_workflow(node_types[:-1])
+
+    config = WorkflowComparisonConfig()
+    g1 = build_workflow_graph(workflow1, config)
+    g2 = build_workflow_graph(workflow2, config)
+
+    result = calculate_graph_edit_distance(g1, g2, config)
+
+    assert config.ged_timeout is None
+    assert config.ged_exact_node_limit is None
+    assert result["is_exact"] is True
+
+
+def test_large_workflows_are_approximated():
+    """Test that workflows above the node limit skip the exact search"""
+    node_types = ["a.node", "b.node", "c.node", "d.node"] * 10
+    workflow1 = _chain_workflow(node_types)
+    workflow2 = _chain_workflow(node_types[:-1])
+
+    config = WorkflowComparisonConfig()
+    config.ged_exact_node_limit = 20
+    g1 = build_workflow_graph(workflow1, config)
+    g2 = build_workflow_graph(workflow2, config)
+
+    result = calculate_graph_edit_distance(g1, g2, config)
+
+    # The approximation still finds the single missing node and connection
+    assert result["is_exact"] is False
+    assert result["similarity_score"] > 0.95
+    assert [edit["type"] for edit in result["top_edits"]] == [
+        "node_delete",
+        "edge_delete",
+    ]
+
+
+def test_timeout_returns_best_path_found():
+    """Test that the exact search returns the best path found once the timeout is met"""
+    workflow1 = _chain_workflow(["a.node", "b.node", "c.node"] * 4)
+    workflow2 = _chain_workflow(["a.node", "b.node", "c.node", "d.node"] * 3)
+
+    config = WorkflowComparisonConfig()
+    g1 = build_workflow_graph(workflow1, config)
+    g2 = build_workflow_graph(workflow2, config)
+    exact_result = calculate_graph_edit_distance(g1, g2, config)
+
+    config.ged_timeout = 1e-6
+    result = calculate_graph_edit_distance(g1, g2, config)
+
+    assert exact_result["is_exact"] is True
+    assert result["is_exact"] is False
+    assert result["edit_cost"] >= exact_result["edit_cost"]
+    assert 0.0 <= result["similarity_score"] <= exact_result["similarity_score"]
+
+
+def test_node_costs_are_computed_once(monkeypatch):
+    """Test that each node cost is computed once, before the search"""
+    import src.similarity
+
+    calls = []
+    node_substitution_cost = src.similarity.node_substitution_cost
+
+    def counting_substitution_cost(node1_data, node2_data, config):
+        calls.append((node1_data["_original_name"], node2_data["_original_name"]))
+        return node_substitution_cost(node1_data, node2_data, config)
+
+    monkeypatch.setattr(
+        src.similarity, "node_substitution_cost", counting_substitution_cost
+    )
+
+    workflow1 = _chain_workflow(["a.node", "b.node", "c.node", "a.node"])
+    workflow2 = _chain_workflow(["a.node", "b.node", "d.node", "a.node", "b.node"])
+
+    config = WorkflowComparisonConfig()
+    g1 = build_workflow_graph(workflow1, config)
+    g2 = build_workflow_graph(workflow2, config)
+
+    result = calculate_graph_edit_distance(g1, g2, config)
+
+    assert result["is_exact"] is True
+    assert len(calls) == len(set(calls)) == 4 * 5
@@ -0,0 +1,108 @@
+"""Micro-benchmark of per-item tasks running small scripts, with and without code cache.
+
+Without cache, each subprocess wraps and compiles the code before running it. With
+cache, the runner passes the marshalled code object, which the subprocess only loads.
+
+Usage: uv run python -m benchmarks.code_cache_benchmark [--items 10]
+"""
+
+import argparse
+import functools
+import marshal
+import os
+import sys
+
+from benchmarks.json_codec_benchmark import format_row, measure
+from src.code_cache import CodeCache
+from src.config.security_config import SecurityConfig
+from src.task_analyzer import TaskAnalyzer
+from src.task_executor import TaskExecutor
+
+SCRIPTS = {
+    "one-liner": "return {'total': _item['json']['price'] * 2}",
+    "10 lines": (
+        "price = _item['json']['price']\n"
+        "quantity = _item['json'].get('quantity', 1)\n"
+        "discount = 0.1 if quantity > 10 else 0\n"
+        "subtotal = price * quantity\n"
+        "total = subtotal * (1 - discount)\n"
+        "tags = [t.upper() for t in _item['json'].get('tags', [])]\n"
+        "label = f'{quantity} x {price}'\n"
+        "if total > 1000:\n"
+        "    tags.append('LARGE')\n"
+        "return {'total': total, 'tags': tags, 'label': label}"
+    ),
+    "50 lines": "\n".join(
+        [f"value_{i} = _item['json']['price'] + {i}" for i in range(49)]
+        + ["return {'total': value_48}"]
+    ),
+}
+
+
+def run_cached(
+    code: str,
+    items: list,
+    devnull: int,
+    filtered_builtins: dict,
+    marshalled_code: bytes,
+) -> None:
+    TaskExecutor._run_per_item(
+        code, items, devnull, filtered_builtins, marshal.loads(marshalled_code)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10)
+    args = parser.parse_args()
+
+    items = [
+        {"json": {"price": i, "quantity": i, "tags": ["a"]}} for i in range(args.items)
+    ]
+    security_config = SecurityConfig(
+        stdlib_allow=set(),
+        external_allow=set(),
+        builtins_deny=set(),
+        runner_env_deny=True,
+    )
+    filtered_builtins = TaskExecutor._filter_builtins(security_config)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+
+    print(f"Items per task: {args.items}")
+    print(format_row(["script", "compile (us)", "cached (us)", "speedup"]))
+
+    for name, code in SCRIPTS.items():
+        marshalled_code = CodeCache().get(
+            TaskAnalyzer.hash_code(code), code, "per_item"
+        )
+        assert marshalled_code is not None
+
+        # subprocess compiling the code itself, as without cache
+        uncached = functools.partial(
+            TaskExecutor._run_per_item, code, items, devnull, filtered_builtins
+        )
+
+        # subprocess loading the code object compiled by the runner
+        cached = functools.partial(
+            run_cached, code, items, devnull, filtered_builtins, marshalled_code
+        )
+
+        uncached_time = measure(uncached)
+        cached_time = measure(cached)
+        print(
+            format_row(
+                [
+                    name,
+                    f"{uncached_time * 1e6:.1f}",
+                    f"{cached_time * 1e6:.1f}",
+                    f"{uncached_time / cached_time:.1f}x",
+                ]
+            )
+        )
+
+    os.close(devnull)
+    sys.stderr = sys.__stderr__  # replaced by the executor to capture user errors
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Micro-benchmark of JSON encoding and decoding for messages from 1 KB to 100 MB.
+
+Compares stdlib json, as used before, with the codec selected by `JsonCodec`.
+Install orjson or msgspec to compare against a fast backend.
+
+Usage: uv run python -m benchmarks.json_codec_benchmark [--max-size-mb 100]
+"""
+
+import argparse
+import functools
+import json
+import time
+from dataclasses import asdict
+from typing import Any, Callable
+
+from src.json_codec import JsonCodec
+from src.message_serde import MessageSerde
+from src.message_types.runner import RunnerTaskDone
+
+SIZES = [
+    1024,
+    10 * 1024,
+    100 * 1024,
+    1024 * 1024,
+    10 * 1024 * 1024,
+    100 * 1024 * 1024,
+]
+
+ITEM = {
+    "json": {
+        "id": 12345,
+        "name": "Zoë Example",
+        "email": "zoe@example.com",
+        "active": True,
+        "score": 98.6,
+        "tags": ["alpha", "beta", "gamma"],
+        "address": {"city": "Berlin", "zip": "10115"},
+    }
+}
+
+
+def make_items(size: int) -> list[dict[str, Any]]:
+    item_size = len(json.dumps(ITEM))
+    return [ITEM] * max(1, size // item_size)
+
+
+def stdlib_dumps(items: list[dict[str, Any]]) -> bytes:
+    return json.dumps(items, default=str, ensure_ascii=False).encode()
+
+
+def stdlib_serialize(message: RunnerTaskDone) -> str:
+    # as `MessageSerde.serialize_runner_message` did before using `JsonCodec`
+    data = asdict(message)
+    camel_case_data = {MessageSerde._snake_to_camel_case(k): v for k, v in data.items()}
+    return json.dumps(camel_case_data)
+
+
+def measure(fn: Callable[[], Any], budget: float = 1.0) -> float:
+    """Return the best time in seconds over repeated runs within a time budget."""
+
+    best = float("inf")
+    deadline = time.perf_counter() + budget
+    runs = 0
+    while runs < 3 or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+        runs += 1
+        if runs >= 1000:
+            break
+    return best
+
+
+def format_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size // (1024 * 1024)} MB"
+    return f"{size // 1024} KB"
+
+
+def format_row(cells: list[str]) -> str:
+    return " | ".join(cell.rjust(12) for cell in cells)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-size-mb", type=int, default=100)
+    args = parser.parse_args()
+
+    sizes = [size for size in SIZES if size <= args.max_size_mb * 1024 * 1024]
+
+    print(f"Codec: {JsonCodec.name}")
+    print(format_row(["size", "op", "json (ms)", f"{JsonCodec.name} (ms)", "speedup"]))
+
+    for size in sizes:
+        items = make_items(size)
+        message = RunnerTaskDone(task_id="task", data={"result": items})
+        encoded = JsonCodec.dumps(items)
+
+        benchmarks = [
+            (
+                "dumps",
+                functools.partial(stdlib_dumps, items),
+                functools.partial(JsonCodec.dumps, items),
+            ),
+            (
+                "loads",
+                functools.partial(json.loads, encoded),
+                functools.partial(JsonCodec.loads, encoded),
+            ),
+            (
+                "serialize",
+                functools.partial(stdlib_serialize, message),
+                functools.partial(MessageSerde.serialize_runner_message, message),
+            ),
+        ]
+
+        for op, baseline, candidate in benchmarks:
+            baseline_time = measure(baseline)
+            candidate_time = measure(candidate)
+            print(
+                format_row(
+                    [
+                        format_size(size),
+                        op,
+                        f"{baseline_time * 1000:.3f}",
+                        f"{candidate_time * 1000:.3f}",
+                        f"{baseline_time / candidate_time:.1f}x",
+                    ]
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Load and latency benchmark of a real runner, driven over websockets by a local task broker.
+
+Starts a runner subprocess per concurrency level and measures tasks per second and
+p50/p95/p99 task latency across item counts, payload sizes, node modes, and cold
+versus warm validation and code caches. Results are written as JSON, to compare
+runner versions.
+
+Usage: uv run python -m benchmarks.runner_benchmark [--output runner-benchmark.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tomllib
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from src.constants import ENV_MAX_CONCURRENCY, ENV_TASK_TIMEOUT
+from src.json_codec import JsonCodec
+from src.nanoid import nanoid
+from tests.fixtures.local_task_broker import LocalTaskBroker, WebsocketMessage
+from tests.fixtures.task_runner_manager import TaskRunnerManager
+
+PROJECT_ROOT = Path(__file__).parent.parent
+TASK_TIMEOUT = 60  # seconds
+RESULT_SCHEMA_VERSION = 1
+
+CODE = {
+    "all_items": "return [{'json': {**item['json'], 'processed': True}} for item in _items]",
+    "per_item": "return {**_item['json'], 'processed': True}",
+}
+
+
+@dataclass
+class Scenario:
+    concurrency: int
+    item_count: int
+    payload_bytes: int  # per item
+    node_mode: str
+    cache: str  # "cold" or "warm"
+
+
+@dataclass
+class ScenarioResult:
+    tasks: int
+    errors: int
+    duration_s: float
+    tasks_per_second: float
+    latency_ms: dict[str, float]
+
+
+class BenchmarkBroker(LocalTaskBroker):
+    """Local task broker that hands out each offer once and resolves a future per task."""
+
+    def __init__(self):
+        super().__init__(max_msg_size=0)
+        self.offers: asyncio.Queue[tuple[str, float]] = asyncio.Queue()
+        self.task_futures: dict[str, asyncio.Future[WebsocketMessage]] = {}
+
+    async def _handle_message(self, connection_id: str, message: WebsocketMessage):
+        match message.get("type"):
+            case "runner:taskoffer":
+                valid_until = time.monotonic() + message["validFor"] / 1000
+                self.offers.put_nowait((message["offerId"], valid_until))
+            case "runner:taskdone" | "runner:taskerror" | "runner:taskrejected":
+                future = self.task_futures.pop(message["taskId"], None)
+                if future and not future.done():
+                    future.set_result(message)
+            case _:
+                await super()._handle_message(connection_id, message)
+
+        # keep memory flat over many tasks with large results
+        self.received_messages.clear()
+
+    async def run_task(self, task_settings: dict[str, Any]) -> WebsocketMessage:
+        """Run a task to completion, retrying on rejection, and return its final message."""
+
+        while True:
+            offer_id = await self._next_offer()
+            task_id = nanoid()
+            self.task_settings[task_id] = task_settings
+            future = asyncio.get_running_loop().create_future()
+            self.task_futures[task_id] = future
+
+            connection_id = next(iter(self.connections))
+            await self.send_to_connection(
+                connection_id,
+                {
+                    "type": "broker:taskofferaccept",
+                    "taskId": task_id,
+                    "offerId": offer_id,
+                },
+            )
+
+            message = await future
+            del self.task_settings[task_id]
+            self.rpc_messages.pop(task_id, None)
+
+            if message["type"] != "runner:taskrejected":
+                return message
+
+    async def _next_offer(self) -> str:
+        while True:
+            offer_id, valid_until = await self.offers.get()
+            if valid_until > time.monotonic():
+                return offer_id
+
+
+def make_task_settings(scenario: Scenario) -> dict[str, Any]:
+    code = CODE[scenario.node_mode]
+    if scenario.cache == "cold":
+        code = f"# {nanoid()}\n{code}"  # unique source, so every cache misses
+
+    return {
+        "code": code,
+        "nodeMode": "runOnceForAllItems"
+        if scenario.node_mode == "all_items"
+        else "runOnceForEachItem",
+        "items": [
+            {"json": {"index": i, "payload": "x" * scenario.payload_bytes}}
+            for i in range(scenario.item_count)
+        ],
+        "continueOnFail": False,
+    }
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method="inclusive")[int(p) - 1]
+
+
+async def run_scenario(
+    broker: BenchmarkBroker, scenario: Scenario, task_count: int, warmup: int
+) -> ScenarioResult:
+    warm_settings = make_task_settings(scenario)
+
+    def next_settings() -> dict[str, Any]:
+        if scenario.cache == "warm":
+            return warm_settings
+        return make_task_settings(scenario)
+
+    for _ in range(warmup):
+        await broker.run_task(next_settings())
+
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(task_count))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            task_settings = next_settings()
+            start = time.perf_counter()
+            message = await broker.run_task(task_settings)
+            latencies.append(time.perf_counter() - start)
+            if message["type"] == "runner:taskerror":
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(scenario.concurrency)))
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return ScenarioResult(
+        tasks=task_count,
+        errors=errors,
+        duration_s=round(duration, 4),
+        tasks_per_second=round(task_count / duration, 2),
+        latency_ms={
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "mean": round(statistics.fmean(latencies) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        },
+    )
+
+
+def get_git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=PROJECT_ROOT,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_runner_version() -> str:
+    with open(PROJECT_ROOT / "pyproject.toml", "rb") as f:
+        return tomllib.load(f)["project"]["version"]
+
+
+def parse_list(value: str, cast=int) -> list:
+    return [cast(part.strip()) for part in value.split(",") if part.strip()]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,4", type=parse_list)
+    parser.add_argument("--items", default="1,100", type=parse_list)
+    parser.add_argument("--payload-bytes", default="100,10000", type=parse_list)
+    parser.add_argument(
+        "--node-modes",
+        default="all_items,per_item",
+        type=lambda value: parse_list(value, str),
+    )
+    parser.add_argument(
+        "--cache", default="cold,warm", type=lambda value: parse_list(value, str)
+    )
+    parser.add_argument("--tasks", type=int, default=50, help="tasks per scenario")
+    parser.add_argument("--warmup", type=int, default=3, help="tasks per scenario")
+    parser.add_argument("--output", default="runner-benchmark.json")
+    args = parser.parse_args()
+
+    broker = BenchmarkBroker()
+    await broker.start()
+
+    results = []
+
+    try:
+        for concurrency in args.concurrency:
+            manager = TaskRunnerManager(
+                task_broker_url=broker.get_url(),
+                custom_env={
+                    ENV_MAX_CONCURRENCY: str(concurrency),
+                    ENV_TASK_TIMEOUT: str(TASK_TIMEOUT),
+                },
+            )
+            await manager.start()
+
+            try:
+                for item_count, payload_bytes, node_mode, cache in itertools.product(
+                    args.items, args.payload_bytes, args.node_modes, args.cache
+                ):
+                    scenario = Scenario(
+                        concurrency, item_count, payload_bytes, node_mode, cache
+                    )
+                    result = await run_scenario(
+                        broker, scenario, args.tasks, args.warmup
+                    )
+                    results.append({**asdict(scenario), **asdict(result)})
+                    print(
+                        f"{scenario}: {result.tasks_per_second} tasks/s, "
+                        f"p50 {result.latency_ms['p50']} ms, "
+                        f"p99 {result.latency_ms['p99']} ms, "
+                        f"{result.errors} errors"
+                    )
+            finally:
+                await manager.stop()
+    finally:
+        await broker.stop()
+
+    report = {
+        "schema_version": RESULT_SCHEMA_VERSION,
+        "runner_version": get_runner_version(),
+        "git_commit": get_git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "json_codec": JsonCodec.name,
+        "tasks_per_scenario": args.tasks,
+        "scenarios": results,
+    }
+
+    await asyncio.to_thread(Path(args.output).write_text, json.dumps(report, indent=2))
+
+    print(f"Wrote {len(results)} scenarios to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
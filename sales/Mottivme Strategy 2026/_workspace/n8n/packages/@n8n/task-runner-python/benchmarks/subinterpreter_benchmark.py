@@ -0,0 +1,137 @@
+"""Benchmark of the subinterpreter execution backend against the process backend.
+
+Measures start latency, as the time to run a trivial task end to end one at a time,
+and throughput, as tasks per second with tasks running on several threads at once.
+The process backend forks a subprocess per task, and the subinterpreter backend runs
+tasks in a warm pool of subinterpreters. Spawning a subinterpreter, as on a cold pool
+or after recycling, is measured separately.
+
+Usage: uv run python -m benchmarks.subinterpreter_benchmark [--items 10] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.json_codec_benchmark import format_row, measure
+from src.code_cache import CodeCache
+from src.config.security_config import SecurityConfig
+from src.process_supervisor import ProcessSupervisor
+from src.subinterpreter_pool import SubinterpreterPool
+from src.task_analyzer import TaskAnalyzer
+from src.task_executor import TaskExecutor
+
+CODE = "return {'total': _item['json']['price'] * 2}"
+TASK_TIMEOUT = 60  # seconds
+PIPE_READER_TIMEOUT = 3.0  # seconds
+THROUGHPUT_DURATION = 3.0  # seconds per backend
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    if not SubinterpreterPool.is_supported():
+        parser.exit(1, "Subinterpreters are not supported by this Python build\n")
+
+    items = [{"json": {"price": i}} for i in range(args.items)]
+    security_config = SecurityConfig(
+        stdlib_allow=set(),
+        external_allow=set(),
+        builtins_deny=set(),
+        runner_env_deny=True,
+    )
+    code_hash = TaskAnalyzer.hash_code(CODE)
+    marshalled_code = CodeCache().get(code_hash, CODE, "per_item")
+
+    pool = SubinterpreterPool(
+        size=args.concurrency,
+        max_tasks_per_interpreter=1_000_000,
+        security_config=security_config,
+    )
+    pool.start()
+
+    def run_in_process():
+        process, read_conn, write_conn, shared_items = TaskExecutor.create_process(
+            code=CODE,
+            node_mode="per_item",
+            items=items,
+            security_config=security_config,
+            marshalled_code=marshalled_code,
+        )
+        # a loop per task, as the benchmark runs tasks on several threads at once
+        asyncio.run(
+            ProcessSupervisor.execute_process(
+                process=process,
+                read_conn=read_conn,
+                write_conn=write_conn,
+                task_timeout=TASK_TIMEOUT,
+                pipe_reader_timeout=PIPE_READER_TIMEOUT,
+                continue_on_fail=False,
+                shared_items=shared_items,
+            )
+        )
+
+    def run_in_subinterpreter():
+        pool.execute_task(
+            interpreter=pool.acquire(),
+            code=CODE,
+            code_hash=code_hash,
+            node_mode="per_item",
+            items=items,
+            task_timeout=TASK_TIMEOUT,
+            pipe_reader_timeout=PIPE_READER_TIMEOUT,
+            continue_on_fail=False,
+            marshalled_code=marshalled_code,
+        )
+
+    def spawn_subinterpreter():
+        pool._retire_interpreter(pool._spawn_interpreter())
+
+    backends = {"process": run_in_process, "subinterpreter": run_in_subinterpreter}
+
+    try:
+        print(f"Items per task: {args.items}, concurrency: {args.concurrency}")
+        print(format_row(["backend", "latency (ms)", "tasks/s"]))
+
+        for name, run in backends.items():
+            run()  # warm up, e.g. forkserver start
+
+            latency = measure(run)
+            tasks_per_second = measure_throughput(run, args.concurrency)
+
+            print(format_row([name, f"{latency * 1e3:.2f}", f"{tasks_per_second:.0f}"]))
+
+        spawn_time = measure(spawn_subinterpreter)
+        print(
+            f"Subinterpreter spawn, on cold pool or recycling: {spawn_time * 1e3:.1f} ms"
+        )
+    finally:
+        pool.stop()
+
+
+def measure_throughput(run, concurrency: int) -> float:
+    """Return tasks per second with `concurrency` threads running tasks back to back."""
+
+    deadline = time.perf_counter() + THROUGHPUT_DURATION
+
+    def run_until_deadline() -> int:
+        tasks = 0
+        while time.perf_counter() < deadline:
+            run()
+            tasks += 1
+        return tasks
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_until_deadline) for _ in range(concurrency)]
+        tasks = sum(future.result() for future in futures)
+
+    return tasks / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
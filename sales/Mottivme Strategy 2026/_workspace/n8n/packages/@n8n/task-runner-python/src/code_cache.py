@@ -0,0 +1,59 @@
+import marshal
+import threading
+from collections import OrderedDict
+
+from src.message_types.broker import NodeMode
+from src.task_executor import TaskExecutor
+from src.constants import MAX_CODE_CACHE_SIZE
+
+CodeCacheKey = tuple[str, NodeMode]  # (code_hash, node_mode)
+
+
+class CodeCache:
+    """LRU cache of compiled task code, marshalled to be passed to subprocesses.
+
+    The same Code node runs with identical source many times, so compiling once in the
+    runner spares each subprocess from wrapping and compiling the code.
+    """
+
+    def __init__(self, max_size: int = MAX_CODE_CACHE_SIZE):
+        self.max_size = max_size
+        self._cache: OrderedDict[CodeCacheKey, bytes] = OrderedDict()
+        self._lock = threading.Lock()  # misses compile in threads
+
+    def get_cached(self, code_hash: str, node_mode: NodeMode) -> bytes | None:
+        """Get the marshalled code object if cached, without compiling it."""
+
+        cache_key = (code_hash, node_mode)
+
+        with self._lock:
+            marshalled_code = self._cache.get(cache_key)
+            if marshalled_code is not None:
+                self._cache.move_to_end(cache_key)
+
+        return marshalled_code
+
+    def get(self, code_hash: str, raw_code: str, node_mode: NodeMode) -> bytes | None:
+        """Get the marshalled code object, compiling it on a miss.
+
+        Returns None if the code fails to compile, for the subprocess to report the error.
+        """
+
+        marshalled_code = self.get_cached(code_hash, node_mode)
+        if marshalled_code is not None:
+            return marshalled_code
+
+        try:
+            compiled_code = TaskExecutor.compile_code(raw_code, node_mode)
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            return None
+
+        marshalled_code = marshal.dumps(compiled_code)
+
+        with self._lock:
+            if len(self._cache) >= self.max_size:
+                self._cache.popitem(last=False)
+
+            self._cache[(code_hash, node_mode)] = marshalled_code
+
+        return marshalled_code
@@ -0,0 +1,150 @@
+import os
+from dataclasses import dataclass, field
+
+from src.resource_usage import read_rss
+from src.constants import (
+    ADAPTIVE_CONCURRENCY_CPU_HIGH,
+    ADAPTIVE_CONCURRENCY_CPU_LOW,
+    ADAPTIVE_CONCURRENCY_MEMORY_RESERVE,
+    ADAPTIVE_CONCURRENCY_REASON_CPU,
+    ADAPTIVE_CONCURRENCY_REASON_HEADROOM,
+    ADAPTIVE_CONCURRENCY_REASON_MEMORY,
+    ADAPTIVE_CONCURRENCY_TASK_MEMORY,
+    CGROUP_MEMORY_CURRENT_PATH,
+    CGROUP_MEMORY_MAX_PATH,
+    PROC_MEMINFO_PATH,
+    PROC_STAT_PATH,
+)
+
+
+@dataclass
+class HostSample:
+    cpu_utilization: float = 0.0  # 0 to 1, across all cores
+    available_memory: int = 0  # bytes
+    total_memory: int = 0  # bytes
+    task_memory: list[int] = field(default_factory=list)  # RSS per task subprocess
+
+
+class HostSampler:
+    """Samples host CPU and memory from `/proc`, and from cgroup v2 limits when in a container."""
+
+    def __init__(self):
+        self.last_cpu_times: tuple[int, int] | None = None  # (busy, total) jiffies
+
+    @staticmethod
+    def is_supported() -> bool:
+        return os.path.exists(PROC_STAT_PATH) and os.path.exists(PROC_MEMINFO_PATH)
+
+    def sample(self, pids: list[int]) -> HostSample:
+        available_memory, total_memory = self._read_memory()
+
+        return HostSample(
+            cpu_utilization=self._read_cpu_utilization(),
+            available_memory=available_memory,
+            total_memory=total_memory,
+            task_memory=[rss for pid in pids if (rss := read_rss(pid))],
+        )
+
+    def _read_cpu_utilization(self) -> float:
+        """Utilization since the previous sample, from the aggregate `cpu` line of `/proc/stat`."""
+
+        with open(PROC_STAT_PATH) as f:
+            times = [int(value) for value in f.readline().split()[1:]]
+
+        idle = times[3] + (times[4] if len(times) > 4 else 0)  # idle + iowait
+        total = sum(times)
+        busy = total - idle
+
+        last_cpu_times = self.last_cpu_times
+        self.last_cpu_times = (busy, total)
+
+        if last_cpu_times is None or total <= last_cpu_times[1]:
+            return 0.0
+
+        return (busy - last_cpu_times[0]) / (total - last_cpu_times[1])
+
+    def _read_memory(self) -> tuple[int, int]:
+        meminfo = {}
+        with open(PROC_MEMINFO_PATH) as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                meminfo[key] = int(value.split()[0]) * 1024  # kB
+
+        total_memory = meminfo["MemTotal"]
+        available_memory = meminfo.get("MemAvailable", meminfo["MemFree"])
+
+        # container memory limit is what the OOM killer enforces
+        try:
+            with open(CGROUP_MEMORY_MAX_PATH) as f:
+                memory_max = f.read().strip()
+            with open(CGROUP_MEMORY_CURRENT_PATH) as f:
+                memory_current = int(f.read().strip())
+        except (OSError, ValueError):
+            return available_memory, total_memory
+
+        if memory_max == "max":
+            return available_memory, total_memory
+
+        cgroup_total = int(memory_max)
+        return (
+            min(available_memory, max(0, cgroup_total - memory_current)),
+            min(total_memory, cgroup_total),
+        )
+
+
+class ConcurrencyController:
+    """Adapts how many tasks the runner takes on to host load, within min and max bounds.
+
+    Raises the limit by one task while CPU is below target and available memory fits
+    another task, sized by the average RSS of running tasks. Lowers it by one task when
+    CPU is saturated, and halves it when available memory runs below the reserve, as
+    running out of memory gets tasks killed.
+    """
+
+    def __init__(
+        self,
+        min_concurrency: int,
+        max_concurrency: int,
+        sampler: HostSampler | None = None,
+    ):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = min_concurrency
+        self.sampler = sampler or HostSampler()
+        self.last_sample = HostSample()
+
+    def update(self, pids: list[int]) -> str | None:
+        """Sample the host and adjust the limit, returning the reason if it changed."""
+
+        sample = self.sampler.sample(pids)
+        self.last_sample = sample
+
+        task_memory = (
+            sum(sample.task_memory) // len(sample.task_memory)
+            if sample.task_memory
+            else ADAPTIVE_CONCURRENCY_TASK_MEMORY
+        )
+        memory_headroom = (
+            sample.available_memory
+            - sample.total_memory * ADAPTIVE_CONCURRENCY_MEMORY_RESERVE
+        )
+
+        if memory_headroom < 0:
+            new_limit, reason = self.limit // 2, ADAPTIVE_CONCURRENCY_REASON_MEMORY
+        elif sample.cpu_utilization > ADAPTIVE_CONCURRENCY_CPU_HIGH:
+            new_limit, reason = self.limit - 1, ADAPTIVE_CONCURRENCY_REASON_CPU
+        elif (
+            sample.cpu_utilization < ADAPTIVE_CONCURRENCY_CPU_LOW
+            and memory_headroom >= task_memory
+        ):
+            new_limit, reason = self.limit + 1, ADAPTIVE_CONCURRENCY_REASON_HEADROOM
+        else:
+            return None
+
+        new_limit = max(self.min_concurrency, min(self.max_concurrency, new_limit))
+
+        if new_limit == self.limit:
+            return None
+
+        self.limit = new_limit
+        return reason
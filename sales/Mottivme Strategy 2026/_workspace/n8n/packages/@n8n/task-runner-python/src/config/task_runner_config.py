@@ -1,28 +1,76 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from src.env import read_bool_env, read_int_env, read_str_env
 from src.errors import ConfigurationError
 from src.constants import (
     BUILTINS_DENY_DEFAULT,
     DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_DEFERRED_TASKS,
+    DEFAULT_MIN_CONCURRENCY,
     DEFAULT_MAX_PAYLOAD_SIZE,
+    DEFAULT_PERSISTENT_VALIDATION_CACHE_SIZE,
+    DEFAULT_PER_ITEM_MAX_SHARDS,
+    DEFAULT_PER_ITEM_MIN_SHARD_SIZE,
+    DEFAULT_PRINT_MAX_BYTES,
+    DEFAULT_PRINT_RATE_LIMIT,
     DEFAULT_TASK_BROKER_URI,
     DEFAULT_TASK_TIMEOUT,
+    DEFAULT_TASK_CPU_LIMIT,
+    DEFAULT_TASK_MEMORY_LIMIT,
     DEFAULT_AUTO_SHUTDOWN_TIMEOUT,
+    DEFAULT_EXECUTION_BACKEND,
     DEFAULT_SHUTDOWN_TIMEOUT,
+    DEFAULT_WORKER_POOL_SIZE,
+    DEFAULT_WORKER_MAX_TASKS,
+    DEFAULT_WORKFLOW_MAX_CONCURRENCY,
+    DEFAULT_WEBSOCKET_COMPRESSION_MEMORY_LEVEL,
+    DEFAULT_WEBSOCKET_COMPRESSION_MIN_SIZE,
+    DEFAULT_WEBSOCKET_COMPRESSION_WINDOW_BITS,
+    ENV_ADAPTIVE_CONCURRENCY,
     ENV_BLOCK_RUNNER_ENV_ACCESS,
     ENV_BUILTINS_DENY,
+    ENV_EXECUTION_BACKEND,
+    ENV_SUBINTERPRETER_REDUCED_ISOLATION,
     ENV_EXTERNAL_ALLOW,
+    ENV_FORKSERVER_PRELOAD,
     ENV_GRANT_TOKEN,
     ENV_MAX_CONCURRENCY,
+    ENV_MAX_DEFERRED_TASKS,
+    ENV_METRICS_WORKFLOW_LABELS,
     ENV_MAX_PAYLOAD_SIZE,
+    ENV_MIN_CONCURRENCY,
+    ENV_PER_ITEM_MAX_SHARDS,
+    ENV_PROFILE,
+    ENV_PROFILE_DIR,
+    ENV_PROFILE_WORKFLOWS,
+    ENV_PER_ITEM_MIN_SHARD_SIZE,
+    ENV_PRINT_MAX_BYTES,
+    ENV_PRINT_RATE_LIMIT,
     ENV_STDLIB_ALLOW,
     ENV_TASK_BROKER_URI,
     ENV_TASK_TIMEOUT,
+    ENV_TASK_CPU_LIMIT,
+    ENV_TASK_MEMORY_LIMIT,
+    ENV_VALIDATION_CACHE_PATH,
+    ENV_VALIDATION_CACHE_SIZE,
     ENV_AUTO_SHUTDOWN_TIMEOUT,
     ENV_GRACEFUL_SHUTDOWN_TIMEOUT,
+    ENV_WORKER_POOL_SIZE,
+    ENV_WORKER_MAX_TASKS,
+    ENV_WORKFLOW_MAX_CONCURRENCY,
+    ENV_WORKFLOW_WEIGHTS,
+    ENV_WEBSOCKET_COMPRESSION,
+    ENV_WEBSOCKET_COMPRESSION_MEMORY_LEVEL,
+    ENV_WEBSOCKET_COMPRESSION_MIN_SIZE,
+    ENV_WEBSOCKET_COMPRESSION_WINDOW_BITS,
+    EXECUTION_BACKEND_SUBINTERPRETER,
+    EXECUTION_BACKENDS,
     PIPE_MSG_MAX_SIZE,
+    PROFILE_MODE_CPU,
+    PROFILE_MODES,
     TYPICAL_PAYLOAD_RATIO,
+    WEBSOCKET_COMPRESSION_MEMORY_LEVEL_RANGE,
+    WEBSOCKET_COMPRESSION_WINDOW_BITS_RANGE,
     PARSE_THROUGHPUT_BYTES_PER_SEC,
     PIPE_READER_JOIN_TIMEOUT_SAFETY_BUFFER,
 )
@@ -47,6 +95,22 @@ def parse_allowlist(allowlist_str: str, list_name: str) -> set[str]:
     return modules
 
 
+def parse_weights(weights_str: str, list_name: str) -> dict[str, int]:
+    """Parse comma-separated `key:weight` pairs, e.g. `wf-1:3,wf-2:2`."""
+
+    weights = {}
+
+    for pair in parse_allowlist(weights_str, list_name):
+        key, _, weight = pair.rpartition(":")
+        if not key or not weight.isdigit() or int(weight) <= 0:
+            raise ConfigurationError(
+                f"Invalid entry '{pair}' in {list_name}, expected 'id:weight' with positive integer weight"
+            )
+        weights[key.strip()] = int(weight)
+
+    return weights
+
+
 @dataclass
 class TaskRunnerConfig:
     grant_token: str
@@ -61,11 +125,64 @@ class TaskRunnerConfig:
     builtins_deny: set[str]
     env_deny: bool
     pipe_reader_timeout: float
+    forkserver_preload: set[str] = field(default_factory=set)
+    worker_pool_size: int = DEFAULT_WORKER_POOL_SIZE
+    worker_max_tasks: int = DEFAULT_WORKER_MAX_TASKS
+    validation_cache_path: str = ""
+    validation_cache_size: int = DEFAULT_PERSISTENT_VALIDATION_CACHE_SIZE
+    per_item_max_shards: int = DEFAULT_PER_ITEM_MAX_SHARDS
+    per_item_min_shard_size: int = DEFAULT_PER_ITEM_MIN_SHARD_SIZE
+    print_rate_limit: int = DEFAULT_PRINT_RATE_LIMIT
+    print_max_bytes: int = DEFAULT_PRINT_MAX_BYTES
+    adaptive_concurrency: bool = False
+    min_concurrency: int = DEFAULT_MIN_CONCURRENCY
+    task_memory_limit: int = DEFAULT_TASK_MEMORY_LIMIT
+    task_cpu_limit: int = DEFAULT_TASK_CPU_LIMIT
+    workflow_max_concurrency: int = DEFAULT_WORKFLOW_MAX_CONCURRENCY
+    workflow_weights: dict[str, int] = field(default_factory=dict)
+    max_deferred_tasks: int = DEFAULT_MAX_DEFERRED_TASKS
+    metrics_workflow_labels: bool = False
+    profile_modes: set[str] = field(default_factory=set)
+    profile_workflows: set[str] = field(default_factory=set)
+    profile_dir: str = ""
+    execution_backend: str = DEFAULT_EXECUTION_BACKEND
+    websocket_compression: bool = True
+    websocket_compression_window_bits: int = DEFAULT_WEBSOCKET_COMPRESSION_WINDOW_BITS
+    websocket_compression_memory_level: int = DEFAULT_WEBSOCKET_COMPRESSION_MEMORY_LEVEL
+    websocket_compression_min_size: int = DEFAULT_WEBSOCKET_COMPRESSION_MIN_SIZE
 
     @property
     def is_auto_shutdown_enabled(self) -> bool:
         return self.auto_shutdown_timeout > 0
 
+    @property
+    def is_worker_pool_enabled(self) -> bool:
+        return self.worker_pool_size > 0
+
+    @property
+    def is_subinterpreter_backend_enabled(self) -> bool:
+        return self.execution_backend == EXECUTION_BACKEND_SUBINTERPRETER
+
+    @property
+    def is_persistent_validation_cache_enabled(self) -> bool:
+        return self.validation_cache_path != ""
+
+    @property
+    def is_per_item_sharding_enabled(self) -> bool:
+        return self.per_item_max_shards > 1
+
+    @property
+    def is_adaptive_concurrency_enabled(self) -> bool:
+        return self.adaptive_concurrency and self.min_concurrency < self.max_concurrency
+
+    @property
+    def is_workflow_scheduling_enabled(self) -> bool:
+        return self.workflow_max_concurrency > 0 or self.max_deferred_tasks > 0
+
+    @property
+    def is_profiling_enabled(self) -> bool:
+        return len(self.profile_modes) > 0
+
     @classmethod
     def from_env(cls):
         grant_token = read_str_env(ENV_GRANT_TOKEN, "")
@@ -102,6 +219,178 @@ class TaskRunnerConfig:
                 f"Max payload size of {max_payload_size} bytes exceeds pipe message limit of {PIPE_MSG_MAX_SIZE} bytes. Reduce {ENV_MAX_PAYLOAD_SIZE}."
             )
 
+        external_allow = parse_allowlist(
+            read_str_env(ENV_EXTERNAL_ALLOW, ""), ENV_EXTERNAL_ALLOW
+        )
+
+        # Preload external allowlist by default, unless wildcard as it cannot be enumerated
+        forkserver_preload = parse_allowlist(
+            read_str_env(
+                ENV_FORKSERVER_PRELOAD, ",".join(sorted(external_allow - {"*"}))
+            ),
+            ENV_FORKSERVER_PRELOAD,
+        )
+        if "*" in forkserver_preload:
+            raise ConfigurationError(
+                f"Wildcard '*' is not supported in {ENV_FORKSERVER_PRELOAD}, list modules explicitly"
+            )
+
+        worker_pool_size = read_int_env(ENV_WORKER_POOL_SIZE, DEFAULT_WORKER_POOL_SIZE)
+        if worker_pool_size < 0:
+            raise ConfigurationError(
+                f"Worker pool size must be non-negative, got {worker_pool_size}"
+            )
+
+        worker_max_tasks = read_int_env(ENV_WORKER_MAX_TASKS, DEFAULT_WORKER_MAX_TASKS)
+        if worker_max_tasks <= 0:
+            raise ConfigurationError(
+                f"Worker max tasks must be positive, got {worker_max_tasks}"
+            )
+
+        validation_cache_size = read_int_env(
+            ENV_VALIDATION_CACHE_SIZE, DEFAULT_PERSISTENT_VALIDATION_CACHE_SIZE
+        )
+        if validation_cache_size <= 0:
+            raise ConfigurationError(
+                f"Validation cache size must be positive, got {validation_cache_size}"
+            )
+
+        per_item_max_shards = read_int_env(
+            ENV_PER_ITEM_MAX_SHARDS, DEFAULT_PER_ITEM_MAX_SHARDS
+        )
+        if per_item_max_shards <= 0:
+            raise ConfigurationError(
+                f"Per-item max shards must be positive, got {per_item_max_shards}"
+            )
+
+        per_item_min_shard_size = read_int_env(
+            ENV_PER_ITEM_MIN_SHARD_SIZE, DEFAULT_PER_ITEM_MIN_SHARD_SIZE
+        )
+        if per_item_min_shard_size <= 0:
+            raise ConfigurationError(
+                f"Per-item min shard size must be positive, got {per_item_min_shard_size}"
+            )
+
+        print_rate_limit = read_int_env(ENV_PRINT_RATE_LIMIT, DEFAULT_PRINT_RATE_LIMIT)
+        if print_rate_limit <= 0:
+            raise ConfigurationError(
+                f"Print rate limit must be positive, got {print_rate_limit}"
+            )
+
+        print_max_bytes = read_int_env(ENV_PRINT_MAX_BYTES, DEFAULT_PRINT_MAX_BYTES)
+        if print_max_bytes <= 0:
+            raise ConfigurationError(
+                f"Print max bytes must be positive, got {print_max_bytes}"
+            )
+
+        max_concurrency = read_int_env(ENV_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY)
+
+        min_concurrency = read_int_env(ENV_MIN_CONCURRENCY, DEFAULT_MIN_CONCURRENCY)
+        if min_concurrency <= 0:
+            raise ConfigurationError(
+                f"Min concurrency must be positive, got {min_concurrency}"
+            )
+        if min_concurrency > max_concurrency:
+            raise ConfigurationError(
+                f"Min concurrency of {min_concurrency} exceeds max concurrency of {max_concurrency}. Reduce {ENV_MIN_CONCURRENCY}."
+            )
+
+        task_memory_limit = read_int_env(
+            ENV_TASK_MEMORY_LIMIT, DEFAULT_TASK_MEMORY_LIMIT
+        )
+        if task_memory_limit < 0:
+            raise ConfigurationError(
+                f"Task memory limit must be non-negative, got {task_memory_limit}"
+            )
+
+        task_cpu_limit = read_int_env(ENV_TASK_CPU_LIMIT, DEFAULT_TASK_CPU_LIMIT)
+        if task_cpu_limit < 0:
+            raise ConfigurationError(
+                f"Task CPU limit must be non-negative, got {task_cpu_limit}"
+            )
+
+        workflow_max_concurrency = read_int_env(
+            ENV_WORKFLOW_MAX_CONCURRENCY, DEFAULT_WORKFLOW_MAX_CONCURRENCY
+        )
+        if workflow_max_concurrency < 0:
+            raise ConfigurationError(
+                f"Workflow max concurrency must be non-negative, got {workflow_max_concurrency}"
+            )
+
+        max_deferred_tasks = read_int_env(
+            ENV_MAX_DEFERRED_TASKS, DEFAULT_MAX_DEFERRED_TASKS
+        )
+        if max_deferred_tasks < 0:
+            raise ConfigurationError(
+                f"Max deferred tasks must be non-negative, got {max_deferred_tasks}"
+            )
+
+        profile_workflows = parse_allowlist(
+            read_str_env(ENV_PROFILE_WORKFLOWS, ""), ENV_PROFILE_WORKFLOWS
+        )
+
+        # Listing workflows to profile enables CPU profiling by default
+        profile_modes = parse_allowlist(
+            read_str_env(ENV_PROFILE, PROFILE_MODE_CPU if profile_workflows else ""),
+            ENV_PROFILE,
+        )
+        if unknown_modes := profile_modes - PROFILE_MODES:
+            raise ConfigurationError(
+                f"Unknown profile modes in {ENV_PROFILE}: {', '.join(sorted(unknown_modes))}. "
+                f"Supported modes: {', '.join(sorted(PROFILE_MODES))}"
+            )
+
+        execution_backend = read_str_env(
+            ENV_EXECUTION_BACKEND, DEFAULT_EXECUTION_BACKEND
+        ).strip()
+        if execution_backend not in EXECUTION_BACKENDS:
+            raise ConfigurationError(
+                f"Unknown execution backend in {ENV_EXECUTION_BACKEND}: {execution_backend}. "
+                f"Supported backends: {', '.join(sorted(EXECUTION_BACKENDS))}"
+            )
+
+        # user code in a subinterpreter shares the runner process and cannot always be killed
+        if execution_backend == EXECUTION_BACKEND_SUBINTERPRETER and not read_bool_env(
+            ENV_SUBINTERPRETER_REDUCED_ISOLATION, False
+        ):
+            raise ConfigurationError(
+                f"The {EXECUTION_BACKEND_SUBINTERPRETER} execution backend runs user code "
+                f"in the runner process, set {ENV_SUBINTERPRETER_REDUCED_ISOLATION}=true "
+                "to accept the reduced isolation"
+            )
+
+        websocket_compression_window_bits = read_int_env(
+            ENV_WEBSOCKET_COMPRESSION_WINDOW_BITS,
+            DEFAULT_WEBSOCKET_COMPRESSION_WINDOW_BITS,
+        )
+        if (
+            websocket_compression_window_bits
+            not in WEBSOCKET_COMPRESSION_WINDOW_BITS_RANGE
+        ):
+            raise ConfigurationError(
+                f"Websocket compression window bits must be between 9 and 15, got {websocket_compression_window_bits}"
+            )
+
+        websocket_compression_memory_level = read_int_env(
+            ENV_WEBSOCKET_COMPRESSION_MEMORY_LEVEL,
+            DEFAULT_WEBSOCKET_COMPRESSION_MEMORY_LEVEL,
+        )
+        if (
+            websocket_compression_memory_level
+            not in WEBSOCKET_COMPRESSION_MEMORY_LEVEL_RANGE
+        ):
+            raise ConfigurationError(
+                f"Websocket compression memory level must be between 1 and 9, got {websocket_compression_memory_level}"
+            )
+
+        websocket_compression_min_size = read_int_env(
+            ENV_WEBSOCKET_COMPRESSION_MIN_SIZE, DEFAULT_WEBSOCKET_COMPRESSION_MIN_SIZE
+        )
+        if websocket_compression_min_size < 0:
+            raise ConfigurationError(
+                f"Websocket compression min size must be non-negative, got {websocket_compression_min_size}"
+            )
+
         # Calculate pipe reader timeout based on configured max payload size (3s for default 1 GiB)
         typical_payload = max_payload_size * TYPICAL_PAYLOAD_RATIO
         pipe_reader_timeout = (
@@ -111,7 +400,7 @@ class TaskRunnerConfig:
         return cls(
             grant_token=grant_token,
             task_broker_uri=read_str_env(ENV_TASK_BROKER_URI, DEFAULT_TASK_BROKER_URI),
-            max_concurrency=read_int_env(ENV_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+            max_concurrency=max_concurrency,
             max_payload_size=max_payload_size,
             task_timeout=task_timeout,
             auto_shutdown_timeout=auto_shutdown_timeout,
@@ -119,9 +408,7 @@ class TaskRunnerConfig:
             stdlib_allow=parse_allowlist(
                 read_str_env(ENV_STDLIB_ALLOW, ""), ENV_STDLIB_ALLOW
             ),
-            external_allow=parse_allowlist(
-                read_str_env(ENV_EXTERNAL_ALLOW, ""), ENV_EXTERNAL_ALLOW
-            ),
+            external_allow=external_allow,
             builtins_deny=set(
                 module.strip()
                 for module in read_str_env(
@@ -130,4 +417,31 @@ class TaskRunnerConfig:
             ),
             env_deny=read_bool_env(ENV_BLOCK_RUNNER_ENV_ACCESS, True),
             pipe_reader_timeout=pipe_reader_timeout,
+            forkserver_preload=forkserver_preload,
+            worker_pool_size=worker_pool_size,
+            worker_max_tasks=worker_max_tasks,
+            validation_cache_path=read_str_env(ENV_VALIDATION_CACHE_PATH, ""),
+            validation_cache_size=validation_cache_size,
+            per_item_max_shards=per_item_max_shards,
+            per_item_min_shard_size=per_item_min_shard_size,
+            print_rate_limit=print_rate_limit,
+            print_max_bytes=print_max_bytes,
+            adaptive_concurrency=read_bool_env(ENV_ADAPTIVE_CONCURRENCY, False),
+            min_concurrency=min_concurrency,
+            task_memory_limit=task_memory_limit,
+            task_cpu_limit=task_cpu_limit,
+            workflow_max_concurrency=workflow_max_concurrency,
+            workflow_weights=parse_weights(
+                read_str_env(ENV_WORKFLOW_WEIGHTS, ""), ENV_WORKFLOW_WEIGHTS
+            ),
+            max_deferred_tasks=max_deferred_tasks,
+            metrics_workflow_labels=read_bool_env(ENV_METRICS_WORKFLOW_LABELS, False),
+            profile_modes=profile_modes,
+            profile_workflows=profile_workflows,
+            profile_dir=read_str_env(ENV_PROFILE_DIR, ""),
+            execution_backend=execution_backend,
+            websocket_compression=read_bool_env(ENV_WEBSOCKET_COMPRESSION, True),
+            websocket_compression_window_bits=websocket_compression_window_bits,
+            websocket_compression_memory_level=websocket_compression_memory_level,
+            websocket_compression_min_size=websocket_compression_min_size,
         )
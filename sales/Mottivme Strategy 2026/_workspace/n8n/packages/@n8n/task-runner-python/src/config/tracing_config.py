@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+from src.env import read_bool_env, read_str_env
+from src.constants import ENV_N8N_VERSION, ENV_TRACING_ENABLED
+
+
+@dataclass
+class TracingConfig:
+    enabled: bool
+    n8n_version: str
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=read_bool_env(ENV_TRACING_ENABLED, False),
+            n8n_version=read_str_env(ENV_N8N_VERSION, ""),
+        )
@@ -1,6 +1,7 @@
 from src.errors import (
     ConfigurationError,
     TaskCancelledError,
+    TaskResultTooLargeError,
     TaskRuntimeError,
     TaskTimeoutError,
     SecurityViolationError,
@@ -30,25 +31,85 @@ DEFAULT_MAX_PAYLOAD_SIZE = 1024 * 1024 * 1024  # 1 GiB
 DEFAULT_TASK_TIMEOUT = 60  # seconds
 DEFAULT_AUTO_SHUTDOWN_TIMEOUT = 0  # seconds
 DEFAULT_SHUTDOWN_TIMEOUT = 10  # seconds
-OFFER_INTERVAL = 0.25  # 250ms
 OFFER_VALIDITY = 5000  # ms
 OFFER_VALIDITY_MAX_JITTER = 500  # ms
 OFFER_VALIDITY_LATENCY_BUFFER = 0.1  # 100ms
 MAX_VALIDATION_CACHE_SIZE = 500  # cached validation results
+MAX_CODE_CACHE_SIZE = 500  # cached compiled code objects
+DEFAULT_PERSISTENT_VALIDATION_CACHE_SIZE = 10_000  # cached validation results
+VALIDATION_CACHE_DB_TIMEOUT = 1  # seconds to wait for other runners' writes
+VALIDATION_CACHE_TOUCH_BATCH_SIZE = 100  # cache hits whose recency is written at once
+DEFAULT_WORKER_POOL_SIZE = 0  # workers, 0 disables the worker pool
+DEFAULT_WORKER_MAX_TASKS = 100  # tasks per worker before recycling
+DEFAULT_PER_ITEM_MAX_SHARDS = 1  # subprocesses per per-item task, 1 disables sharding
+DEFAULT_PER_ITEM_MIN_SHARD_SIZE = 1_000  # items per shard, at minimum
+DEFAULT_PRINT_RATE_LIMIT = 100  # print() calls forwarded per second per task
+DEFAULT_PRINT_MAX_BYTES = 1024 * 1024  # 1 MiB of print output forwarded per task
+DEFAULT_TASK_MEMORY_LIMIT = 0  # bytes per task subprocess, 0 to disable
+DEFAULT_TASK_CPU_LIMIT = 0  # CPU seconds per task subprocess, 0 to disable
+TASK_RESOURCE_SAMPLE_INTERVAL = 0.1  # seconds between samples of a task subprocess
+WORKER_RETIRE_TIMEOUT = 1  # seconds
+RUNNER_EXTRA_THREADS = (
+    4  # threads beyond max concurrency, for spawning and stopping subprocesses
+)
+RUNNER_THREAD_NAME_PREFIX = "task-runner"
+
+# Workflow scheduling
+DEFAULT_WORKFLOW_MAX_CONCURRENCY = 0  # running tasks per workflow, 0 for no quota
+DEFAULT_MAX_DEFERRED_TASKS = 0  # tasks accepted beyond concurrency, to run when fair
+DEFAULT_WORKFLOW_WEIGHT = 1
+
+# Profiling
+PROFILE_MODE_CPU = "cpu"
+PROFILE_MODE_MEMORY = "memory"
+PROFILE_MODES = {PROFILE_MODE_CPU, PROFILE_MODE_MEMORY}
+PROFILE_TOP_N = 15  # functions and lines in profile summary
+PROFILE_TRACEMALLOC_FRAMES = 1  # frames stored per allocation
+
+# Tracing
+TRACE_SPAN_TASK = "task"
+TRACE_SPAN_USER_CODE = "user_code"
+TRACE_SPAN_SERIALIZE = "serialize"
+TRACING_SERVICE_NAME = "n8n-task-runner-python"
+
+# Execution backends
+EXECUTION_BACKEND_PROCESS = "process"
+EXECUTION_BACKEND_SUBINTERPRETER = "subinterpreter"
+EXECUTION_BACKENDS = {EXECUTION_BACKEND_PROCESS, EXECUTION_BACKEND_SUBINTERPRETER}
+DEFAULT_EXECUTION_BACKEND = EXECUTION_BACKEND_PROCESS
+SUBINTERPRETER_STOP_TIMEOUT = 1  # seconds for interrupted user code to return
+SUBINTERPRETER_INTERRUPT_INTERVAL = 0.1  # seconds between interrupts of user code
+SUBINTERPRETER_UNSUPPORTED_ERROR = "does not support loading in subinterpreters"
+SUBINTERPRETER_UNSAFE_MODULES = {"numpy", "pandas", "tracemalloc"}  # known unsupported
+SUBINTERPRETER_MAX_ABANDONED = (
+    2  # abandoned subinterpreters before restarting the runner
+)
 
 # Executor
 EXECUTOR_USER_OUTPUT_KEY = "__n8n_internal_user_output__"
-EXECUTOR_CIRCULAR_REFERENCE_KEY = "__n8n_internal_circular_ref__"
 EXECUTOR_ALL_ITEMS_FILENAME = "<all_items_task_execution>"
 EXECUTOR_PER_ITEM_FILENAME = "<per_item_task_execution>"
 EXECUTOR_FILENAMES = {EXECUTOR_ALL_ITEMS_FILENAME, EXECUTOR_PER_ITEM_FILENAME}
 SIGTERM_EXIT_CODE = -15
 SIGKILL_EXIT_CODE = -9
+SIGXCPU_EXIT_CODE = -24
+MEMORY_LIMIT_EXIT_CODE = 3  # subprocess exceeded its address space limit
+SHARED_ITEMS_MEMFD_NAME = "n8n-task-items"
+JSON_CODEC_ORJSON = "orjson"
+JSON_CODEC_MSGSPEC = "msgspec"
+JSON_CODEC_STDLIB = "json"
 PIPE_MSG_PREFIX_LENGTH = 4  # bytes
+PIPE_FRAME_BATCH_SIZE = 1024 * 1024  # bytes of result items per frame
 PIPE_MSG_MAX_SIZE = (
     2 ** (PIPE_MSG_PREFIX_LENGTH * 8) - 1
 )  # bytes (~4 GiB with 4-byte prefix)
 
+# Print stream
+PRINT_STREAM_MAX_FRAME_SIZE = 256 * 1024  # bytes of formatted args per print() call
+PRINT_STREAM_READ_SIZE = 64 * 1024  # bytes
+PRINT_STREAM_FLUSH_INTERVAL = 0.1  # seconds to batch print output for
+PRINT_STREAM_BURST = 100  # print() calls forwarded at once before rate limiting
+
 # Pipe reader join timeout
 TYPICAL_PAYLOAD_RATIO = 0.1  # assume typical size is 10% of max payload
 PARSE_THROUGHPUT_BYTES_PER_SEC = 100_000_000  # 100 MB/s
@@ -57,10 +118,62 @@ PIPE_READER_JOIN_TIMEOUT_SAFETY_BUFFER = 2.0  # seconds
 # Broker
 DEFAULT_TASK_BROKER_URI = "http://127.0.0.1:5679"
 TASK_BROKER_WS_PATH = "/runners/_ws"
+DEFAULT_WEBSOCKET_COMPRESSION_WINDOW_BITS = 15  # 9 to 15, larger compresses better
+DEFAULT_WEBSOCKET_COMPRESSION_MEMORY_LEVEL = 5  # 1 to 9, larger compresses better
+DEFAULT_WEBSOCKET_COMPRESSION_MIN_SIZE = 1024  # bytes, smaller messages sent as is
+WEBSOCKET_COMPRESSION_WINDOW_BITS_RANGE = range(9, 16)
+WEBSOCKET_COMPRESSION_MEMORY_LEVEL_RANGE = range(1, 10)
+
+# Adaptive concurrency
+DEFAULT_MIN_CONCURRENCY = 1  # tasks
+ADAPTIVE_CONCURRENCY_INTERVAL = 1  # seconds between samples
+ADAPTIVE_CONCURRENCY_CPU_HIGH = 0.9  # utilization above which to lower the limit
+ADAPTIVE_CONCURRENCY_CPU_LOW = 0.7  # utilization below which to raise the limit
+ADAPTIVE_CONCURRENCY_MEMORY_RESERVE = 0.1  # share of memory to keep available
+ADAPTIVE_CONCURRENCY_TASK_MEMORY = 100 * 1024 * 1024  # bytes per task until sampled
+ADAPTIVE_CONCURRENCY_REASON_CPU = "cpu"
+ADAPTIVE_CONCURRENCY_REASON_MEMORY = "memory"
+ADAPTIVE_CONCURRENCY_REASON_HEADROOM = "headroom"
+PROC_STAT_PATH = "/proc/stat"
+PROC_MEMINFO_PATH = "/proc/meminfo"
+CGROUP_MEMORY_MAX_PATH = "/sys/fs/cgroup/memory.max"
+CGROUP_MEMORY_CURRENT_PATH = "/sys/fs/cgroup/memory.current"
 
 # Health check
 DEFAULT_HEALTH_CHECK_SERVER_HOST = "127.0.0.1"
 DEFAULT_HEALTH_CHECK_SERVER_PORT = 5681
+HEALTH_CHECK_FIRST_BYTE_TIMEOUT = 0.05  # seconds, for TCP probes that send nothing
+HEALTH_CHECK_REQUEST_TIMEOUT = 1  # seconds
+METRICS_PATH = "/metrics"
+
+# Metrics
+METRICS_PREFIX = "n8n_python_runner_"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_DURATION_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)  # seconds
+METRICS_SIZE_BUCKETS = tuple(1024 * 4**i for i in range(11))  # 1 KiB to 1 GiB
+METRICS_PHASE_VALIDATE = "validate"
+METRICS_PHASE_SPAWN = "spawn"
+METRICS_PHASE_EXECUTE = "execute"
+METRICS_PHASE_PIPE_READ = "pipe_read"
+METRICS_PHASE_SEND = "send"
+METRICS_REJECTION_OFFER_EXPIRED = "offer_expired"
+METRICS_REJECTION_AT_CAPACITY = "at_capacity"
+METRICS_REJECTION_WORKFLOW_QUOTA = "workflow_quota"
 
 # Env vars
 ENV_TASK_BROKER_URI = "N8N_RUNNERS_TASK_BROKER_URI"
@@ -73,12 +186,41 @@ ENV_GRACEFUL_SHUTDOWN_TIMEOUT = "N8N_RUNNERS_GRACEFUL_SHUTDOWN_TIMEOUT"
 ENV_STDLIB_ALLOW = "N8N_RUNNERS_STDLIB_ALLOW"
 ENV_EXTERNAL_ALLOW = "N8N_RUNNERS_EXTERNAL_ALLOW"
 ENV_BUILTINS_DENY = "N8N_RUNNERS_BUILTINS_DENY"
+ENV_FORKSERVER_PRELOAD = "N8N_RUNNERS_FORKSERVER_PRELOAD"
+ENV_VALIDATION_CACHE_PATH = "N8N_RUNNERS_VALIDATION_CACHE_PATH"
+ENV_VALIDATION_CACHE_SIZE = "N8N_RUNNERS_VALIDATION_CACHE_SIZE"
+ENV_WORKER_POOL_SIZE = "N8N_RUNNERS_WORKER_POOL_SIZE"
+ENV_WORKER_MAX_TASKS = "N8N_RUNNERS_WORKER_MAX_TASKS"
+ENV_PER_ITEM_MAX_SHARDS = "N8N_RUNNERS_PER_ITEM_MAX_SHARDS"
+ENV_PER_ITEM_MIN_SHARD_SIZE = "N8N_RUNNERS_PER_ITEM_MIN_SHARD_SIZE"
+ENV_PRINT_RATE_LIMIT = "N8N_RUNNERS_PRINT_RATE_LIMIT"
+ENV_PRINT_MAX_BYTES = "N8N_RUNNERS_PRINT_MAX_BYTES"
+ENV_TASK_MEMORY_LIMIT = "N8N_RUNNERS_TASK_MEMORY_LIMIT"
+ENV_TASK_CPU_LIMIT = "N8N_RUNNERS_TASK_CPU_LIMIT"
+ENV_WORKFLOW_MAX_CONCURRENCY = "N8N_RUNNERS_WORKFLOW_MAX_CONCURRENCY"
+ENV_WORKFLOW_WEIGHTS = "N8N_RUNNERS_WORKFLOW_WEIGHTS"
+ENV_MAX_DEFERRED_TASKS = "N8N_RUNNERS_MAX_DEFERRED_TASKS"
+ENV_METRICS_WORKFLOW_LABELS = "N8N_RUNNERS_METRICS_WORKFLOW_LABELS"
+ENV_PROFILE = "N8N_RUNNERS_PROFILE"
+ENV_PROFILE_WORKFLOWS = "N8N_RUNNERS_PROFILE_WORKFLOWS"
+ENV_PROFILE_DIR = "N8N_RUNNERS_PROFILE_DIR"
+ENV_EXECUTION_BACKEND = "N8N_RUNNERS_EXECUTION_BACKEND"
+ENV_SUBINTERPRETER_REDUCED_ISOLATION = "N8N_RUNNERS_SUBINTERPRETER_REDUCED_ISOLATION"
+ENV_WEBSOCKET_COMPRESSION = "N8N_RUNNERS_WEBSOCKET_COMPRESSION"
+ENV_WEBSOCKET_COMPRESSION_WINDOW_BITS = "N8N_RUNNERS_WEBSOCKET_COMPRESSION_WINDOW_BITS"
+ENV_WEBSOCKET_COMPRESSION_MEMORY_LEVEL = (
+    "N8N_RUNNERS_WEBSOCKET_COMPRESSION_MEMORY_LEVEL"
+)
+ENV_WEBSOCKET_COMPRESSION_MIN_SIZE = "N8N_RUNNERS_WEBSOCKET_COMPRESSION_MIN_SIZE"
+ENV_ADAPTIVE_CONCURRENCY = "N8N_RUNNERS_ADAPTIVE_CONCURRENCY"
+ENV_MIN_CONCURRENCY = "N8N_RUNNERS_MIN_CONCURRENCY"
 ENV_HEALTH_CHECK_SERVER_ENABLED = "N8N_RUNNERS_HEALTH_CHECK_SERVER_ENABLED"
 ENV_HEALTH_CHECK_SERVER_HOST = "N8N_RUNNERS_HEALTH_CHECK_SERVER_HOST"
 ENV_HEALTH_CHECK_SERVER_PORT = "N8N_RUNNERS_HEALTH_CHECK_SERVER_PORT"
 ENV_LAUNCHER_LOG_LEVEL = "N8N_RUNNERS_LAUNCHER_LOG_LEVEL"
 ENV_BLOCK_RUNNER_ENV_ACCESS = "N8N_BLOCK_RUNNER_ENV_ACCESS"
 ENV_SENTRY_DSN = "N8N_SENTRY_DSN"
+ENV_TRACING_ENABLED = "N8N_RUNNERS_TRACING_ENABLED"
 ENV_N8N_VERSION = "N8N_VERSION"
 ENV_ENVIRONMENT = "ENVIRONMENT"
 ENV_DEPLOYMENT_NAME = "DEPLOYMENT_NAME"
@@ -90,6 +232,7 @@ IGNORED_ERROR_TYPES = (
     ConfigurationError,
     TaskRuntimeError,
     TaskCancelledError,
+    TaskResultTooLargeError,
     TaskTimeoutError,
     SecurityViolationError,
     WebsocketConnectionError,
@@ -99,13 +242,47 @@ IGNORED_ERROR_TYPES = (
 # Logging
 LOG_FORMAT = "%(asctime)s.%(msecs)03d\t%(levelname)s\t%(message)s"
 LOG_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
-LOG_TASK_COMPLETE = 'Completed task {task_id} in {duration} ({result_size}) for node "{node_name}" ({node_id}) in workflow "{workflow_name}" ({workflow_id})'
+LOG_TASK_COMPLETE = 'Completed task {task_id} in {duration} ({result_size}{resource_usage}) for node "{node_name}" ({node_id}) in workflow "{workflow_name}" ({workflow_id})'
+LOG_TASK_DEFERRED = "Deferred task {task_id} of workflow {workflow_id}, with {running} tasks of the workflow running and {deferred} tasks deferred"
+LOG_TASK_PROFILED = "Profiling task {task_id} ({modes})"
+LOG_TASK_SHARDED = (
+    "Running task {task_id} in {shard_count} shards of {shard_sizes} items"
+)
+LOG_TASK_PRINT_FAILED = "Failed to send print output of task {task_id}: {error}"
 LOG_TASK_CANCEL = 'Cancelled task {task_id} for node "{node_name}" ({node_id}) in workflow "{workflow_name}" ({workflow_id})'
 LOG_TASK_CANCEL_UNKNOWN = (
     "Received cancel for unknown task: {task_id}. Discarding message."
 )
 LOG_TASK_CANCEL_WAITING = "Cancelled task {task_id} (waiting for settings)"
+LOG_FORKSERVER_PRELOADED = "Preloaded {count} modules into forkserver in {duration}"
+LOG_FORKSERVER_PRELOAD_MISSING = (
+    "Module '{module}' set for preloading is not installed. Skipping preload."
+)
+LOG_WORKER_POOL_STARTED = (
+    "Started worker pool with {size} workers (recycled after {max_tasks} tasks)"
+)
+LOG_WORKER_SPAWN_FAILED = "Failed to spawn replacement worker: {error}"
+LOG_SUBINTERPRETER_POOL_STARTED = "Started subinterpreter pool with {size} subinterpreters (recycled after {max_tasks} tasks)"
+LOG_SUBINTERPRETERS_UNAVAILABLE = (
+    "Subinterpreters are unavailable, continuing with process backend: {reason}"
+)
+SUBINTERPRETERS_UNSUPPORTED_REASON = "not supported by this Python build"
+LOG_SUBINTERPRETER_FALLBACK = (
+    "Running task {task_id} in a subprocess instead of a subinterpreter: {reason}"
+)
+LOG_SUBINTERPRETER_ABANDONED = "Subinterpreter {interpreter_id} did not stop within {timeout}s of interrupting user code, replacing it"
+LOG_SUBINTERPRETERS_MAX_ABANDONED = "{count} abandoned subinterpreters still run user code, shutting down for the runner to be restarted"
+LOG_SUBINTERPRETERS_EXIT_ABANDONED = "Exiting without finalizing, as {count} abandoned subinterpreters still run user code"
+LOG_VALIDATION_CACHE_UNAVAILABLE = "Failed to open persistent validation cache at {path}, continuing without it: {error}"
+LOG_VALIDATION_CACHE_ERROR = (
+    "Persistent validation cache failed, treating as miss: {error}"
+)
+LOG_CONCURRENCY_LIMIT_CHANGED = "Changed concurrency limit from {old_limit} to {new_limit} ({reason}): CPU at {cpu:.0%}, {available_memory} MiB memory available, {task_memory} MiB in {task_count} tasks"
+LOG_ADAPTIVE_CONCURRENCY_UNAVAILABLE = "Adaptive concurrency needs {path} to sample the host, continuing with fixed concurrency of {max_concurrency}"
+LOG_JSON_CODEC = "Using {codec} for JSON encoding and decoding"
 LOG_SENTRY_MISSING = "Sentry is enabled but sentry-sdk is not installed. Install with: uv sync --all-extras"
+LOG_TRACING_MISSING = "Tracing is enabled but opentelemetry-sdk is not installed. Install with: uv sync --all-extras"
+LOG_TRACING_SETUP_FAILED = "Failed to initialize tracing: {error}"
 LOG_PIPE_READER_TIMEOUT_TRIGGERED = (
     "Pipe reader thread did not finish reading within {timeout}s. "
     "Closing pipe to unblock. Task may fail if data was not fully read. "
@@ -120,6 +297,7 @@ TASK_REJECTED_REASON_OFFER_EXPIRED = (
     "Offer expired - not accepted within validity window"
 )
 TASK_REJECTED_REASON_AT_CAPACITY = "No open task slots - runner already at capacity"
+TASK_REJECTED_REASON_WORKFLOW_QUOTA = "Workflow already running its max of {quota} tasks on this runner, with no room to defer more"
 
 # Security
 BUILTINS_DENY_DEFAULT = "eval,exec,compile,open,input,breakpoint,getattr,object,type,vars,setattr,delattr,hasattr,dir,memoryview,__build_class__,globals,locals,license,help,credits,copyright"
@@ -3,11 +3,15 @@ from .invalid_pipe_msg_content_error import InvalidPipeMsgContentError
 from .invalid_pipe_msg_length_error import InvalidPipeMsgLengthError
 from .no_idle_timeout_handler_error import NoIdleTimeoutHandlerError
 from .security_violation_error import SecurityViolationError
+from .subinterpreter_unsupported_error import SubinterpreterUnsupportedError
 from .task_cancelled_error import TaskCancelledError
+from .task_cpu_limit_error import TaskCpuLimitError
 from .task_killed_error import TaskKilledError
+from .task_memory_limit_error import TaskMemoryLimitError
 from .task_missing_error import TaskMissingError
 from .task_result_missing_error import TaskResultMissingError
 from .task_result_read_error import TaskResultReadError
+from .task_result_too_large_error import TaskResultTooLargeError
 from .task_subprocess_failed_error import TaskSubprocessFailedError
 from .task_runtime_error import TaskRuntimeError
 from .task_timeout_error import TaskTimeoutError
@@ -19,12 +23,16 @@ __all__ = [
     "InvalidPipeMsgLengthError",
     "NoIdleTimeoutHandlerError",
     "SecurityViolationError",
+    "SubinterpreterUnsupportedError",
     "TaskCancelledError",
+    "TaskCpuLimitError",
     "TaskKilledError",
+    "TaskMemoryLimitError",
     "TaskMissingError",
     "TaskSubprocessFailedError",
     "TaskResultMissingError",
     "TaskResultReadError",
+    "TaskResultTooLargeError",
     "TaskRuntimeError",
     "TaskTimeoutError",
     "WebsocketConnectionError",
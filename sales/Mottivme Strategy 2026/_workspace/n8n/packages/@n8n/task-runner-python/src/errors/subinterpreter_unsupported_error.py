@@ -0,0 +1,6 @@
+class SubinterpreterUnsupportedError(Exception):
+    """Raised when a task cannot run in a subinterpreter, so is run in a subprocess instead."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Task cannot run in a subinterpreter: {reason}")
+        self.reason = reason
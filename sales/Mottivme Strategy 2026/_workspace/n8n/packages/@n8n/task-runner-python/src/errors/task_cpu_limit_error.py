@@ -0,0 +1,9 @@
+class TaskCpuLimitError(Exception):
+    """Raised when a task subprocess exceeds its CPU time limit (SIGXCPU)."""
+
+    def __init__(self, cpu_limit: int):
+        super().__init__(
+            f"Task exceeded the CPU time limit of {cpu_limit} {'second' if cpu_limit == 1 else 'seconds'}. "
+            "Reduce the computation done by the code or increase N8N_RUNNERS_TASK_CPU_LIMIT."
+        )
+        self.cpu_limit = cpu_limit
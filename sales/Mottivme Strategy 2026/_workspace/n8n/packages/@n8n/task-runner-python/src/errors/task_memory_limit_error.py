@@ -0,0 +1,9 @@
+class TaskMemoryLimitError(Exception):
+    """Raised when a task subprocess exceeds its memory limit and is stopped early."""
+
+    def __init__(self, memory_limit: int):
+        super().__init__(
+            f"Task exceeded the memory limit of {memory_limit // (1024 * 1024)} MiB. "
+            "Reduce the memory used by the code or increase N8N_RUNNERS_TASK_MEMORY_LIMIT."
+        )
+        self.memory_limit = memory_limit
@@ -0,0 +1,9 @@
+class TaskResultTooLargeError(Exception):
+    """Raised when the result sent by a task subprocess exceeds the max payload size."""
+
+    def __init__(self, max_payload_size: int):
+        super().__init__(
+            f"Task result exceeds the max payload size of {max_payload_size} bytes. "
+            "Reduce the size of the output or increase N8N_RUNNERS_MAX_PAYLOAD."
+        )
+        self.max_payload_size = max_payload_size
@@ -1,8 +1,16 @@
 import asyncio
 import errno
 import logging
+from typing import Callable
 
 from src.config.health_check_config import HealthCheckConfig
+from src.metrics import metrics
+from src.constants import (
+    HEALTH_CHECK_FIRST_BYTE_TIMEOUT,
+    HEALTH_CHECK_REQUEST_TIMEOUT,
+    METRICS_CONTENT_TYPE,
+    METRICS_PATH,
+)
 
 HEALTH_CHECK_RESPONSE = (
     b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: 2\r\n\r\nOK"
@@ -13,6 +21,9 @@ class HealthCheckServer:
     def __init__(self):
         self.server: asyncio.Server | None = None
         self.logger = logging.getLogger(__name__)
+        self.routes: dict[str, Callable[[], bytes]] = {
+            METRICS_PATH: self._metrics_response,
+        }
 
     async def start(self, config: HealthCheckConfig) -> None:
         try:
@@ -38,13 +49,48 @@ class HealthCheckServer:
             self.logger.info("Health check server stopped")
 
     async def _handle_request(
-        self, _reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
     ) -> None:
         try:
-            writer.write(HEALTH_CHECK_RESPONSE)
+            path = await self._read_path(reader)
+            route = self.routes.get(path)
+            writer.write(route() if route else HEALTH_CHECK_RESPONSE)
             await writer.drain()
         except Exception:
             pass
         finally:
             writer.close()
             await writer.wait_closed()
+
+    async def _read_path(self, reader: asyncio.StreamReader) -> str | None:
+        """Read the path from the request line, e.g. `GET /metrics HTTP/1.1`."""
+
+        try:
+            # TCP probes send nothing, so answer them as health check without waiting long
+            first_byte = await asyncio.wait_for(
+                reader.read(1), timeout=HEALTH_CHECK_FIRST_BYTE_TIMEOUT
+            )
+            if not first_byte:
+                return None
+
+            request_line = first_byte + await asyncio.wait_for(
+                reader.readline(), timeout=HEALTH_CHECK_REQUEST_TIMEOUT
+            )
+        except (TimeoutError, ValueError):
+            return None
+
+        parts = request_line.decode("latin-1").split()
+        if len(parts) < 2:
+            return None
+
+        return parts[1].split("?", 1)[0]
+
+    def _metrics_response(self) -> bytes:
+        body = metrics.render().encode("utf-8")
+        headers = (
+            "HTTP/1.1 200 OK\r\n"
+            f"Content-Type: {METRICS_CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        )
+        return headers.encode("latin-1") + body
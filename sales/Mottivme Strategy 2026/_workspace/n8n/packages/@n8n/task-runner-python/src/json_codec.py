@@ -0,0 +1,84 @@
+import json
+from typing import Any, Callable
+
+from src.constants import (
+    JSON_CODEC_MSGSPEC,
+    JSON_CODEC_ORJSON,
+    JSON_CODEC_STDLIB,
+)
+
+type JsonData = bytes | bytearray | str
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, default=str, ensure_ascii=False).encode("utf-8")
+
+
+def _stdlib_loads(data: JsonData) -> Any:
+    return json.loads(data)
+
+
+def _select_backend() -> tuple[str, Callable[[Any], bytes], Callable[[JsonData], Any]]:
+    try:
+        import orjson
+
+        # without passthrough, orjson would encode datetimes and dataclasses natively
+        options = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+        def orjson_dumps(value: Any) -> bytes:
+            return orjson.dumps(value, default=str, option=options)
+
+        return JSON_CODEC_ORJSON, orjson_dumps, orjson.loads
+    except ImportError:
+        pass
+
+    try:
+        import msgspec
+
+        # msgspec encodes datetimes, sets, etc. natively, which would not match
+        # `default=str`, so msgspec is used for decoding only
+        return JSON_CODEC_MSGSPEC, _stdlib_dumps, msgspec.json.Decoder().decode
+    except ImportError:
+        pass
+
+    return JSON_CODEC_STDLIB, _stdlib_dumps, _stdlib_loads
+
+
+_BACKEND_NAME, _backend_dumps, _backend_loads = _select_backend()
+
+
+class JsonCodec:
+    """Encodes and decodes JSON with orjson or msgspec if installed, else with stdlib json.
+
+    Output matches `json.dumps(value, default=str, ensure_ascii=False)` encoded as UTF-8,
+    except that with orjson:
+
+    - output is compact
+    - NaN and infinity are encoded as `null` instead of `NaN` and `Infinity`, which
+      are not valid JSON
+    - enum members are encoded as their value instead of as `str(member)`, e.g.
+      `1` instead of `"Color.RED"`, as orjson encodes enums natively
+
+    Values a fast backend rejects, e.g. integers over 64 bits or NaN literals, fall back
+    to stdlib json.
+    """
+
+    name = _BACKEND_NAME
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        try:
+            return _backend_dumps(value)
+        except TypeError:
+            return _stdlib_dumps(value)
+
+    @staticmethod
+    def loads(data: JsonData) -> Any:
+        try:
+            return _backend_loads(data)
+        except ValueError:
+            return _stdlib_loads(data)
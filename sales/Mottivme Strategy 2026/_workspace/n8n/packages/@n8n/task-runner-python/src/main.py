@@ -1,11 +1,16 @@
 import asyncio
 import logging
+import os
 import sys
 import platform
 
-from src.constants import ERROR_WINDOWS_NOT_SUPPORTED
+from src.constants import (
+    ERROR_WINDOWS_NOT_SUPPORTED,
+    LOG_SUBINTERPRETERS_EXIT_ABANDONED,
+)
 from src.config.health_check_config import HealthCheckConfig
 from src.config.sentry_config import SentryConfig
+from src.config.tracing_config import TracingConfig
 from src.config.task_runner_config import TaskRunnerConfig
 from src.errors import ConfigurationError
 from src.logs import setup_logging
@@ -25,6 +30,14 @@ async def main():
 
         sentry = setup_sentry(sentry_config)
 
+    tracing_exporter = None
+    tracing_config = TracingConfig.from_env()
+
+    if tracing_config.enabled:
+        from src.tracing_exporter import setup_tracing
+
+        tracing_exporter = setup_tracing(tracing_config)
+
     try:
         health_check_config = HealthCheckConfig.from_env()
     except ConfigurationError as e:
@@ -51,8 +64,9 @@ async def main():
     task_runner = TaskRunner(task_runner_config)
     logger.info("Starting runner...")
 
-    shutdown = Shutdown(task_runner, health_check_server, sentry)
+    shutdown = Shutdown(task_runner, health_check_server, sentry, tracing_exporter)
     task_runner.on_idle_timeout = shutdown.start_auto_shutdown
+    task_runner.on_subinterpreters_abandoned = shutdown.start_shutdown
 
     try:
         await task_runner.start()
@@ -61,6 +75,18 @@ async def main():
         await shutdown.start_shutdown()
 
     exit_code = await shutdown.wait_for_shutdown()
+
+    pool = task_runner.subinterpreter_pool
+    if pool and pool.abandoned_interpreters:
+        # finalizing aborts while a subinterpreter still runs user code
+        logger.warning(
+            LOG_SUBINTERPRETERS_EXIT_ABANDONED.format(
+                count=len(pool.abandoned_interpreters)
+            )
+        )
+        logging.shutdown()
+        os._exit(exit_code)
+
     sys.exit(exit_code)
 
 
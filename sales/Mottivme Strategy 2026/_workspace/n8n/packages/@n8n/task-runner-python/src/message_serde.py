@@ -1,7 +1,8 @@
-import json
-from dataclasses import asdict
+from dataclasses import fields
+from functools import cache
 from typing import cast
 
+from src.json_codec import JsonCodec, JsonData
 from src.message_types.broker import NodeMode, TaskSettings
 from src.constants import (
     BROKER_INFO_REQUEST,
@@ -113,8 +114,8 @@ class MessageSerde:
     """Responsible for deserializing incoming messages and serializing outgoing messages."""
 
     @staticmethod
-    def deserialize_broker_message(data: str) -> BrokerMessage:
-        message_dict = json.loads(data)
+    def deserialize_broker_message(data: JsonData) -> BrokerMessage:
+        message_dict = JsonCodec.loads(data)
         message_type = message_dict.get("type")
 
         if message_type not in MESSAGE_TYPE_MAP:
@@ -123,12 +124,23 @@ class MessageSerde:
         return MESSAGE_TYPE_MAP[message_type](message_dict)
 
     @staticmethod
-    def serialize_runner_message(message: RunnerMessage) -> str:
-        data = asdict(message)
+    def serialize_runner_message(message: RunnerMessage) -> bytes:
+        """Serialize a message into UTF-8 encoded JSON, to be sent as a text frame."""
+
+        # shallow, unlike `asdict()`, as runner messages hold no nested dataclasses
         camel_case_data = {
-            MessageSerde._snake_to_camel_case(k): v for k, v in data.items()
+            camel_case_key: getattr(message, key)
+            for key, camel_case_key in MessageSerde._camel_case_keys(type(message))
         }
-        return json.dumps(camel_case_data)
+        return JsonCodec.dumps(camel_case_data)
+
+    @staticmethod
+    @cache
+    def _camel_case_keys(message_type: type) -> tuple[tuple[str, str], ...]:
+        return tuple(
+            (f.name, MessageSerde._snake_to_camel_case(f.name))
+            for f in fields(message_type)
+        )
 
     @staticmethod
     def _snake_to_camel_case(snake_case_str: str) -> str:
@@ -1,6 +1,6 @@
 from typing import Any, TypedDict
 
-from src.message_types.broker import Items
+from src.message_types.broker import Items, NodeMode
 
 PrintArgs = list[list[Any]]  # Args to all `print()` calls in a Python code task
 
@@ -12,9 +12,16 @@ class TaskErrorInfo(TypedDict):
     stderr: str
 
 
+class TaskTimings(TypedDict):
+    start_time: int  # ns since epoch, when user code started
+    user_code: int  # ns running user code
+    serialize: int  # ns serializing result items
+
+
 class PipeResultMessage(TypedDict):
     result: Items
     print_args: PrintArgs
+    timings: TaskTimings
 
 
 class PipeErrorMessage(TypedDict):
@@ -23,3 +30,10 @@ class PipeErrorMessage(TypedDict):
 
 
 PipeMessage = PipeResultMessage | PipeErrorMessage
+
+
+class PipeTaskMessage(TypedDict):
+    code: str
+    code_hash: str
+    node_mode: NodeMode
+    items: Items
@@ -0,0 +1,288 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from src.constants import (
+    METRICS_DURATION_BUCKETS,
+    METRICS_PREFIX,
+    METRICS_SIZE_BUCKETS,
+)
+
+LabelValue = str | None
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+
+    pairs = ",".join(
+        f'{key}="{_escape_label_value(value)}"' for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric(ABC):
+    """Base for metrics with at most one label, rendered in Prometheus text format."""
+
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, label_name: str | None = None):
+        self.name = METRICS_PREFIX + name
+        self.help_text = help_text
+        self.label_name = label_name
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self._render_samples(),
+        ]
+
+    def _labels(self, label_value: LabelValue) -> dict[str, str]:
+        if self.label_name is None or label_value is None:
+            return {}
+        return {self.label_name: label_value}
+
+    @abstractmethod
+    def _render_samples(self) -> list[str]: ...
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, label_name: str | None = None):
+        super().__init__(name, help_text, label_name)
+        self.values: dict[LabelValue, float] = {}
+
+    def inc(self, label_value: LabelValue = None, amount: float = 1) -> None:
+        self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def get(self, label_value: LabelValue = None) -> float:
+        return self.values.get(label_value, 0)
+
+    def _render_samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self._labels(label_value))} {_format_value(value)}"
+            for label_value, value in self.values.items()
+        ]
+
+
+class Gauge(Metric):
+    """Gauge whose value is read from a function when rendered.
+
+    With a label, the function returns the value per label value, and the gauge has no
+    samples until a function is set.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, label_name: str | None = None):
+        super().__init__(name, help_text, label_name)
+        self.read_value: Callable[[], float | dict[str, float]] = (
+            (lambda: {}) if label_name else (lambda: 0)
+        )
+
+    def set_function(self, read_value: Callable[[], float | dict[str, float]]) -> None:
+        self.read_value = read_value
+
+    def _render_samples(self) -> list[str]:
+        value = self.read_value()
+
+        if not isinstance(value, dict):
+            return [f"{self.name} {_format_value(value)}"]
+
+        return [
+            f"{self.name}{_format_labels(self._labels(label_value))} {_format_value(sample)}"
+            for label_value, sample in value.items()
+        ]
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: tuple[float, ...],
+        label_name: str | None = None,
+    ):
+        super().__init__(name, help_text, label_name)
+        self.buckets = buckets
+        self.bucket_counts: dict[LabelValue, list[int]] = {}
+        self.sums: dict[LabelValue, float] = {}
+        self.counts: dict[LabelValue, int] = {}
+
+    def observe(self, value: float, label_value: LabelValue = None) -> None:
+        if label_value not in self.bucket_counts:
+            self.bucket_counts[label_value] = [0] * len(self.buckets)
+            self.sums[label_value] = 0
+            self.counts[label_value] = 0
+
+        bucket_counts = self.bucket_counts[label_value]
+        for i, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                bucket_counts[i] += 1
+
+        self.sums[label_value] += value
+        self.counts[label_value] += 1
+
+    def _render_samples(self) -> list[str]:
+        lines = []
+
+        for label_value, bucket_counts in self.bucket_counts.items():
+            labels = self._labels(label_value)
+
+            for upper_bound, count in zip(self.buckets, bucket_counts):
+                bucket_labels = _format_labels(
+                    {**labels, "le": _format_value(upper_bound)}
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+
+            inf_labels = _format_labels({**labels, "le": "+Inf"})
+            lines.append(f"{self.name}_bucket{inf_labels} {self.counts[label_value]}")
+            lines.append(
+                f"{self.name}_sum{_format_labels(labels)} {_format_value(self.sums[label_value])}"
+            )
+            lines.append(
+                f"{self.name}_count{_format_labels(labels)} {self.counts[label_value]}"
+            )
+
+        return lines
+
+
+class RunnerMetrics:
+    """Metrics of the task runner, updated from the event loop and served at `/metrics`."""
+
+    def __init__(self):
+        self.task_phase_duration = Histogram(
+            "task_phase_duration_seconds",
+            "Duration of each phase of a task.",
+            METRICS_DURATION_BUCKETS,
+            label_name="phase",
+        )
+        self.task_result_size = Histogram(
+            "task_result_size_bytes",
+            "Size of task results read from subprocesses.",
+            METRICS_SIZE_BUCKETS,
+        )
+        self.subprocess_spawn_duration = Histogram(
+            "subprocess_spawn_duration_seconds",
+            "Time taken to start a task subprocess.",
+            METRICS_DURATION_BUCKETS,
+        )
+        self.running_tasks = Gauge("running_tasks", "Tasks currently running.")
+        self.open_offers = Gauge("open_offers", "Task offers currently open.")
+        self.task_rejections = Counter(
+            "task_rejections_total", "Tasks rejected, by reason.", label_name="reason"
+        )
+        self.validation_cache_hits = Counter(
+            "validation_cache_hits_total", "Code validations served from cache."
+        )
+        self.validation_cache_misses = Counter(
+            "validation_cache_misses_total", "Code validations not found in cache."
+        )
+        self.persistent_validation_cache_hits = Counter(
+            "persistent_validation_cache_hits_total",
+            "Code validations served from the on-disk cache.",
+        )
+        self.persistent_validation_cache_misses = Counter(
+            "persistent_validation_cache_misses_total",
+            "Code validations not found in the on-disk cache.",
+        )
+        self.validation_cache_hit_ratio = Gauge(
+            "validation_cache_hit_ratio", "Share of code validations served from cache."
+        )
+        self.validation_cache_hit_ratio.set_function(self._get_cache_hit_ratio)
+        self.deferred_tasks = Gauge(
+            "deferred_tasks", "Tasks deferred to share slots fairly across workflows."
+        )
+        self.workflow_running_tasks = Gauge(
+            "workflow_running_tasks",
+            "Tasks currently running, by workflow, when scheduling across workflows.",
+            label_name="workflow_id",
+        )
+        self.concurrency_limit = Gauge(
+            "concurrency_limit", "Tasks the runner currently accepts at once."
+        )
+        self.concurrency_adjustments = Counter(
+            "concurrency_adjustments_total",
+            "Changes to the adaptive concurrency limit, by reason.",
+            label_name="reason",
+        )
+        self.host_cpu_utilization = Gauge(
+            "host_cpu_utilization", "Host CPU utilization at the last sample."
+        )
+        self.host_memory_available = Gauge(
+            "host_memory_available_bytes", "Host memory available at the last sample."
+        )
+        self.task_memory_rss = Gauge(
+            "task_memory_rss_bytes",
+            "Resident memory of running task subprocesses at the last sample.",
+        )
+        self.websocket_compression_input = Counter(
+            "websocket_compression_input_bytes_total",
+            "Bytes of messages to the broker before compression.",
+        )
+        self.websocket_compression_output = Counter(
+            "websocket_compression_output_bytes_total",
+            "Bytes of messages to the broker after compression.",
+        )
+        self.websocket_compression_saved = Gauge(
+            "websocket_compression_saved_bytes",
+            "Bytes saved by compressing messages to the broker.",
+        )
+        self.websocket_compression_saved.set_function(self._get_compression_saved)
+
+    def render(self) -> str:
+        metrics: list[Metric] = [
+            self.task_phase_duration,
+            self.task_result_size,
+            self.subprocess_spawn_duration,
+            self.running_tasks,
+            self.open_offers,
+            self.task_rejections,
+            self.validation_cache_hits,
+            self.validation_cache_misses,
+            self.persistent_validation_cache_hits,
+            self.persistent_validation_cache_misses,
+            self.validation_cache_hit_ratio,
+            self.deferred_tasks,
+            self.workflow_running_tasks,
+            self.concurrency_limit,
+            self.concurrency_adjustments,
+            self.host_cpu_utilization,
+            self.host_memory_available,
+            self.task_memory_rss,
+            self.websocket_compression_input,
+            self.websocket_compression_output,
+            self.websocket_compression_saved,
+        ]
+        lines = [line for metric in metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def _get_cache_hit_ratio(self) -> float:
+        hits = self.validation_cache_hits.get()
+        total = hits + self.validation_cache_misses.get()
+        return hits / total if total else 0
+
+    def _get_compression_saved(self) -> float:
+        return (
+            self.websocket_compression_input.get()
+            - self.websocket_compression_output.get()
+        )
+
+
+metrics = RunnerMetrics()
@@ -1,4 +1,4 @@
-import json
+import asyncio
 import os
 import threading
 from typing import cast
@@ -8,7 +8,10 @@ from multiprocessing.connection import Connection
 from src.errors import (
     InvalidPipeMsgContentError,
     InvalidPipeMsgLengthError,
+    TaskResultTooLargeError,
 )
+from src.json_codec import JsonCodec
+from src.message_types.broker import Items
 from src.message_types.pipe import PipeMessage
 from src.constants import PIPE_MSG_PREFIX_LENGTH
 
@@ -18,37 +21,56 @@ type PipeConnection = Connection
 class PipeReader(threading.Thread):
     """Background thread that reads result from pipe."""
 
-    def __init__(self, read_fd: int, read_conn: PipeConnection):
+    def __init__(
+        self,
+        read_fd: int,
+        read_conn: PipeConnection,
+        max_payload_size: int | None = None,
+    ):
         super().__init__()
         self.read_fd = read_fd
         self.read_conn = read_conn
+        self.max_payload_size = max_payload_size
         self.pipe_message: PipeMessage | None = None
         self.message_size: int | None = None  # bytes
         self.error: Exception | None = None
 
     def run(self):
         try:
-            length_bytes = PipeReader._read_exact_bytes(
-                self.read_fd, PIPE_MSG_PREFIX_LENGTH
+            self.pipe_message, self.message_size = PipeReader.read_message(
+                self.read_fd, self.max_payload_size
             )
-            length_int = int.from_bytes(length_bytes, "big")
-            if length_int <= 0:
-                raise InvalidPipeMsgLengthError(length_int)
-            self.message_size = length_int
-            data = PipeReader._read_exact_bytes(self.read_fd, length_int)
-            parsed_msg = json.loads(data.decode("utf-8"))
-            self.pipe_message = self._validate_pipe_message(parsed_msg)
         except Exception as e:
             self.error = e
         finally:
             self.read_conn.close()
 
     @staticmethod
-    def _read_exact_bytes(fd: int, n: int) -> bytes:
+    def read_message(
+        fd: int, max_payload_size: int | None = None
+    ) -> tuple[PipeMessage, int]:
+        """Read a message from file descriptor, returning it with its size in bytes."""
+
+        assembler = PipeMessageAssembler(max_payload_size)
+
+        while True:
+            length_bytes = PipeReader._read_exact_bytes(fd, PIPE_MSG_PREFIX_LENGTH)
+            assembler.add_frame_length(int.from_bytes(length_bytes, "big"))
+
+            data = PipeReader._read_exact_bytes(fd, assembler.frame_length)
+            pipe_message = assembler.add_frame(data)
+            del data
+
+            if pipe_message is not None:
+                return pipe_message, assembler.message_size
+
+    @staticmethod
+    def _read_exact_bytes(fd: int, n: int) -> bytearray:
         """Read exactly n bytes from file descriptor.
 
         Uses os.read() instead of Connection.recv() because recv() pickles.
-        Preallocates bytearray to avoid repeated reallocation.
+        Preallocates bytearray to avoid repeated reallocation, and returns it
+        as is to avoid copying it.
         """
         result = bytearray(n)
         offset = 0
@@ -58,9 +80,10 @@ class PipeReader(threading.Thread):
                 raise EOFError("Pipe closed before reading all data")
             result[offset : offset + len(chunk)] = chunk
             offset += len(chunk)
-        return bytes(result)
+        return result
 
-    def _validate_pipe_message(self, msg) -> PipeMessage:
+    @staticmethod
+    def _validate_pipe_message(msg) -> PipeMessage:
         if not isinstance(msg, dict):
             raise InvalidPipeMsgContentError(f"Expected dict, got {type(msg).__name__}")
 
@@ -86,3 +109,119 @@ class PipeReader(threading.Thread):
             raise InvalidPipeMsgContentError("'error' must be a dict")
 
         return cast(PipeMessage, msg)
+
+
+class PipeMessageAssembler:
+    """Assembles a message from the length-prefixed frames it arrives as.
+
+    Zero or more frames of result items (JSON arrays) are followed by the message
+    itself (JSON object). The payload limit is enforced per frame, before reading it.
+    """
+
+    def __init__(self, max_payload_size: int | None = None):
+        self.max_payload_size = max_payload_size
+        self.items: Items = []
+        self.frame_length = 0  # bytes
+        self.message_size = 0  # bytes
+
+    def add_frame_length(self, length_int: int) -> None:
+        if length_int <= 0:
+            raise InvalidPipeMsgLengthError(length_int)
+
+        self.frame_length = length_int
+        self.message_size += length_int
+
+        if (
+            self.max_payload_size is not None
+            and self.message_size > self.max_payload_size
+        ):
+            raise TaskResultTooLargeError(self.max_payload_size)
+
+    def add_frame(self, data: bytes | bytearray) -> PipeMessage | None:
+        """Decode a frame, returning the message once its final frame is added."""
+
+        frame = JsonCodec.loads(data)
+
+        if isinstance(frame, list):
+            self.items.extend(frame)
+            return None
+
+        pipe_message = PipeReader._validate_pipe_message(frame)
+
+        if "result" in pipe_message and self.items:
+            self.items.extend(pipe_message["result"])
+            pipe_message["result"] = self.items
+
+        return pipe_message
+
+
+class AsyncPipeReader:
+    """Reads result from pipe on the event loop as data arrives, without a thread."""
+
+    def __init__(
+        self,
+        read_conn: PipeConnection,
+        max_payload_size: int | None = None,
+    ):
+        self.read_conn = read_conn
+        self.read_fd = read_conn.fileno()
+        self.assembler = PipeMessageAssembler(max_payload_size)
+        self.pipe_message: PipeMessage | None = None
+        self.message_size: int | None = None  # bytes
+        self.error: Exception | None = None
+        self.loop = asyncio.get_running_loop()
+        self.done: asyncio.Future[None] = self.loop.create_future()
+        self.buffer = bytearray(PIPE_MSG_PREFIX_LENGTH)
+        self.offset = 0
+        self.is_reading_length = True
+
+    def start(self) -> None:
+        os.set_blocking(self.read_fd, False)
+        self.loop.add_reader(self.read_fd, self._on_readable)
+
+    def close(self) -> None:
+        if self.done.done():
+            return
+
+        self.loop.remove_reader(self.read_fd)
+        self.read_conn.close()
+        self.done.set_result(None)
+
+    def _on_readable(self) -> None:
+        try:
+            while not self.done.done():
+                self._read_once()
+        except BlockingIOError:
+            pass  # pipe drained, wait until readable again
+        except Exception as e:
+            self.error = e
+            self.close()
+
+    def _read_once(self) -> None:
+        # read straight into the frame buffer, to avoid copying chunks
+        with memoryview(self.buffer) as view:
+            read_count = os.readv(self.read_fd, [view[self.offset :]])
+
+        if read_count == 0:
+            raise EOFError("Pipe closed before reading all data")
+
+        self.offset += read_count
+        if self.offset < len(self.buffer):
+            return
+
+        self.offset = 0
+
+        if self.is_reading_length:
+            self.assembler.add_frame_length(int.from_bytes(self.buffer, "big"))
+            self.buffer = bytearray(self.assembler.frame_length)
+            self.is_reading_length = False
+            return
+
+        pipe_message = self.assembler.add_frame(self.buffer)
+        self.buffer = bytearray(PIPE_MSG_PREFIX_LENGTH)
+        self.is_reading_length = True
+
+        if pipe_message is not None:
+            self.pipe_message = pipe_message
+            self.message_size = self.assembler.message_size
+            self.close()
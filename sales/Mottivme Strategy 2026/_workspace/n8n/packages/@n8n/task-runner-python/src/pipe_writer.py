@@ -0,0 +1,63 @@
+import os
+import time
+from typing import Any
+
+from src.constants import PIPE_FRAME_BATCH_SIZE, PIPE_MSG_PREFIX_LENGTH
+from src.json_codec import JsonCodec
+
+
+class PipeWriter:
+    """Writes a message to pipe as length-prefixed frames.
+
+    Result items are batched into frames holding a JSON array as they are produced,
+    and the message itself is written last as a frame holding a JSON object. This way
+    the full result is never serialized at once.
+    """
+
+    def __init__(self, write_fd: int):
+        self.write_fd = write_fd
+        self.batch: list[bytes] = []
+        self.batch_size = 0  # bytes
+        self.serialize_time = 0  # ns spent serializing items
+
+    def write_item(self, item: Any) -> None:
+        serialize_start = time.perf_counter_ns()
+        data = JsonCodec.dumps(item)
+        self.serialize_time += time.perf_counter_ns() - serialize_start
+        self.batch.append(data)
+        self.batch_size += len(data)
+
+        if self.batch_size >= PIPE_FRAME_BATCH_SIZE:
+            self.flush_items()
+
+    def flush_items(self) -> None:
+        if not self.batch:
+            return
+
+        data = b"[" + b",".join(self.batch) + b"]"
+        self.batch = []
+        self.batch_size = 0
+
+        PipeWriter._write_frame(self.write_fd, data)
+
+    def write_message(self, message: Any) -> None:
+        """Flush any batched items, then write the message as the final frame."""
+
+        self.flush_items()
+        PipeWriter._write_frame(self.write_fd, JsonCodec.dumps(message))
+
+    @staticmethod
+    def _write_frame(fd: int, data: bytes):
+        length_bytes = len(data).to_bytes(PIPE_MSG_PREFIX_LENGTH, "big")
+        PipeWriter._write_bytes(fd, length_bytes)
+        PipeWriter._write_bytes(fd, data)
+
+    @staticmethod
+    def _write_bytes(fd: int, data: bytes):
+        view = memoryview(data)
+        total_written = 0
+        while total_written < len(data):
+            written = os.write(fd, view[total_written:])
+            if written == 0:
+                raise OSError("Write failed")
+            total_written += written
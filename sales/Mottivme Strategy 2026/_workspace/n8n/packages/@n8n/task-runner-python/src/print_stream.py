@@ -0,0 +1,190 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable
+
+from src.errors import InvalidPipeMsgLengthError
+from src.json_codec import JsonCodec
+from src.message_types.pipe import PrintArgs
+from src.pipe_writer import PipeWriter
+from src.constants import (
+    PIPE_MSG_PREFIX_LENGTH,
+    PRINT_STREAM_BURST,
+    PRINT_STREAM_FLUSH_INTERVAL,
+    PRINT_STREAM_MAX_FRAME_SIZE,
+    PRINT_STREAM_READ_SIZE,
+)
+
+
+class PrintStreamWriter:
+    """Writes the formatted args of each `print()` call in a subprocess as a length-prefixed frame."""
+
+    def __init__(self, write_fd: int):
+        self.write_fd = write_fd
+        self.is_closed = False
+
+    def write(self, formatted_args: list[str]) -> None:
+        if self.is_closed:
+            return
+
+        data = JsonCodec.dumps(formatted_args)
+
+        if len(data) > PRINT_STREAM_MAX_FRAME_SIZE:
+            data = JsonCodec.dumps(
+                [
+                    f"[Print output of {len(data)} bytes exceeds the limit of {PRINT_STREAM_MAX_FRAME_SIZE} bytes]"
+                ]
+            )
+
+        try:
+            PipeWriter._write_frame(self.write_fd, data)
+        except OSError:
+            self.is_closed = True  # runner stopped reading, so drop further output
+
+
+class PrintStream:
+    """Pipe streaming print output from a task subprocess to the runner while the task runs.
+
+    Frames are read on the event loop as they arrive, and the formatted args of each
+    `print()` call are passed to `on_print` with their size in bytes.
+    """
+
+    def __init__(self, on_print: Callable[[list[str], int], None]):
+        # deferred, as the executor imports this module for the subprocess side
+        from src.task_executor import MULTIPROCESSING_CONTEXT
+
+        self.read_conn, self.write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+        self.read_fd = self.read_conn.fileno()
+        self.on_print = on_print
+        self.loop = asyncio.get_running_loop()
+        self.done: asyncio.Future[None] = self.loop.create_future()
+        self.buffer = bytearray()
+
+    def start(self) -> None:
+        os.set_blocking(self.read_fd, False)
+        self.loop.add_reader(self.read_fd, self._on_readable)
+
+    def close_write_end(self) -> None:
+        """Close the runner's copy of the write end, once the subprocess holds its own."""
+
+        self.write_conn.close()
+
+    def close(self) -> None:
+        if self.done.done():
+            return
+
+        self.loop.remove_reader(self.read_fd)
+        self.read_conn.close()
+        self.write_conn.close()
+        self.done.set_result(None)
+
+    def _on_readable(self) -> None:
+        try:
+            while not self.done.done():
+                chunk = os.read(self.read_fd, PRINT_STREAM_READ_SIZE)
+
+                if not chunk:
+                    self.close()  # subprocess exited
+                    return
+
+                self.buffer += chunk
+                self._read_frames()
+        except BlockingIOError:
+            pass  # pipe drained, wait until readable again
+        except Exception:
+            self.close()  # print output is best effort, so never fails the task
+
+    def _read_frames(self) -> None:
+        while len(self.buffer) >= PIPE_MSG_PREFIX_LENGTH:
+            length = int.from_bytes(self.buffer[:PIPE_MSG_PREFIX_LENGTH], "big")
+
+            if length <= 0 or length > PRINT_STREAM_MAX_FRAME_SIZE:
+                raise InvalidPipeMsgLengthError(length)
+
+            end = PIPE_MSG_PREFIX_LENGTH + length
+            if len(self.buffer) < end:
+                return
+
+            formatted_args = JsonCodec.loads(self.buffer[PIPE_MSG_PREFIX_LENGTH:end])
+            del self.buffer[:end]
+
+            self.on_print(formatted_args, length)
+
+
+class PrintForwarder:
+    """Forwards print output of a running task in batches, within a rate limit and a byte budget.
+
+    Up to `PRINT_STREAM_BURST` calls are forwarded at once, then `rate_limit` calls per second.
+    Output beyond either limit is dropped, and reported by a notice once the task finishes.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[PrintArgs], Awaitable[None]],
+        rate_limit: int,
+        max_bytes: int,
+    ):
+        self.send = send
+        self.rate_limit = rate_limit  # print() calls per second
+        self.max_bytes = max_bytes
+        self.tokens = float(PRINT_STREAM_BURST)
+        self.last_refill = time.monotonic()
+        self.forwarded_bytes = 0
+        self.dropped_count = 0
+        self.pending: PrintArgs = []
+        self.flush_requested = asyncio.Event()
+        self.flush_task: asyncio.Task | None = None
+
+    def add(self, formatted_args: list[str], size: int) -> None:
+        if self.forwarded_bytes + size > self.max_bytes or not self._take_token():
+            self.dropped_count += 1
+            return
+
+        self.forwarded_bytes += size
+        self.pending.append(formatted_args)
+
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def finish(self) -> PrintArgs:
+        """Send any pending print output, returning a notice of dropped output if any."""
+
+        self.flush_requested.set()
+
+        if self.flush_task is not None:
+            await self.flush_task
+
+        if self.dropped_count == 0:
+            return []
+
+        return [[f"[Output truncated - {self.dropped_count} more print statements]"]]
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.wait_for(
+                self.flush_requested.wait(), timeout=PRINT_STREAM_FLUSH_INTERVAL
+            )
+        except TimeoutError:
+            pass
+
+        try:
+            # output added while sending is sent next, to keep it in order
+            while self.pending:
+                pending, self.pending = self.pending, []
+                await self.send(pending)
+        finally:
+            self.flush_task = None
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(
+            PRINT_STREAM_BURST,
+            self.tokens + (now - self.last_refill) * self.rate_limit,
+        )
+        self.last_refill = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
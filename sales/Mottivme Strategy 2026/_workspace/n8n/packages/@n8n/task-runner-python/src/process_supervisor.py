@@ -0,0 +1,305 @@
+import asyncio
+import logging
+import time
+
+from multiprocessing.context import ForkServerProcess
+from multiprocessing.connection import Connection
+
+from src.errors import (
+    TaskMemoryLimitError,
+    TaskResultTooLargeError,
+    TaskSubprocessFailedError,
+    TaskTimeoutError,
+)
+from src.message_types.broker import Items
+from src.message_types.pipe import PrintArgs
+from src.metrics import metrics
+from src.pipe_reader import AsyncPipeReader
+from src.print_stream import PrintStream
+from src.resource_usage import (
+    TaskResourceUsage,
+    read_cpu_time,
+    read_parent_pid,
+    read_rss,
+)
+from src.shared_items import SharedItems
+from src.task_executor import TaskExecutor
+from src.tracing import tracer
+from src.constants import (
+    LOG_PIPE_READER_TIMEOUT_TRIGGERED,
+    METRICS_PHASE_EXECUTE,
+    METRICS_PHASE_PIPE_READ,
+    METRICS_PHASE_SPAWN,
+    TASK_RESOURCE_SAMPLE_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+type PipeConnection = Connection
+
+
+class ProcessSupervisor:
+    """Supervises task subprocesses from the event loop, without a thread blocked per task.
+
+    Subprocesses are forked by the forkserver rather than by the runner, so their exit is
+    watched through the process sentinel, which the forkserver writes the exit code to.
+    """
+
+    @staticmethod
+    async def execute_process(
+        process: ForkServerProcess,
+        read_conn: PipeConnection,
+        write_conn: PipeConnection,
+        task_timeout: int,
+        pipe_reader_timeout: float,
+        continue_on_fail: bool,
+        shared_items: SharedItems | None = None,
+        max_payload_size: int | None = None,
+        print_stream: PrintStream | None = None,
+        resource_usage: TaskResourceUsage | None = None,
+        memory_limit: int = 0,
+        cpu_limit: int = 0,
+    ) -> tuple[Items, PrintArgs, int]:
+        """Execute a subprocess for a Python code task.
+
+        If `print_stream` is passed, print output is read from it while the subprocess runs.
+        Resident memory and CPU time are sampled into `resource_usage` while the subprocess
+        runs, and the subprocess is killed as soon as it exceeds a non-zero `memory_limit`.
+        """
+
+        print_args: PrintArgs = []
+        resource_usage = resource_usage or TaskResourceUsage()
+        resource_sampler: asyncio.Task | None = None
+
+        pipe_reader = AsyncPipeReader(read_conn, max_payload_size)
+        pipe_reader.start()
+
+        if print_stream:
+            print_stream.start()
+
+        try:
+            spawn_start = time.perf_counter()
+            with tracer.span(METRICS_PHASE_SPAWN):
+                try:
+                    # forkserver replies within milliseconds, so only briefly holds a thread
+                    await asyncio.to_thread(process.start)
+                except Exception as e:
+                    raise TaskSubprocessFailedError(-1, e)
+                finally:
+                    write_conn.close()
+                    if shared_items:
+                        shared_items.close()  # subprocess holds its own fd
+                    if print_stream:
+                        print_stream.close_write_end()
+
+            resource_sampler = asyncio.create_task(
+                ProcessSupervisor._sample_resources(
+                    process, resource_usage, memory_limit
+                )
+            )
+
+            execute_start = time.perf_counter()
+            spawn_duration = execute_start - spawn_start
+            metrics.subprocess_spawn_duration.observe(spawn_duration)
+            metrics.task_phase_duration.observe(spawn_duration, METRICS_PHASE_SPAWN)
+
+            with tracer.span(METRICS_PHASE_EXECUTE) as execute_span:
+                try:
+                    await asyncio.wait_for(
+                        ProcessSupervisor._wait_for_exit(process), timeout=task_timeout
+                    )
+                except TimeoutError:
+                    await asyncio.to_thread(TaskExecutor.stop_process, process)
+                    raise TaskTimeoutError(task_timeout)
+
+            if resource_usage.memory_limit_exceeded:
+                raise TaskMemoryLimitError(memory_limit)
+
+            pipe_read_start = time.perf_counter()
+            metrics.task_phase_duration.observe(
+                pipe_read_start - execute_start, METRICS_PHASE_EXECUTE
+            )
+
+            with tracer.span(METRICS_PHASE_PIPE_READ):
+                if print_stream:
+                    # forward output printed right before exiting, even if the task failed
+                    try:
+                        await asyncio.wait_for(
+                            asyncio.shield(print_stream.done),
+                            timeout=pipe_reader_timeout,
+                        )
+                    except TimeoutError:
+                        pass
+
+                # reader closing the pipe on exceeding the limit makes the subprocess fail
+                if isinstance(pipe_reader.error, TaskResultTooLargeError):
+                    raise pipe_reader.error
+
+                assert process.exitcode is not None
+                TaskExecutor.raise_for_exit_code(
+                    process.exitcode, memory_limit, cpu_limit
+                )
+
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(pipe_reader.done), timeout=pipe_reader_timeout
+                    )
+                except TimeoutError:
+                    logger.warning(
+                        LOG_PIPE_READER_TIMEOUT_TRIGGERED.format(
+                            timeout=pipe_reader_timeout
+                        )
+                    )
+
+            metrics.task_phase_duration.observe(
+                time.perf_counter() - pipe_read_start, METRICS_PHASE_PIPE_READ
+            )
+
+            execution = TaskExecutor.get_task_result(pipe_reader)
+            tracer.record_timings(execute_span, pipe_reader.pipe_message.get("timings"))
+
+            return execution
+
+        except Exception as e:
+            if continue_on_fail:
+                return [{"json": {"error": str(e)}}], print_args, 0
+            raise
+
+        finally:
+            if resource_sampler:
+                resource_sampler.cancel()
+            pipe_reader.close()
+            if print_stream:
+                print_stream.close()
+
+    @staticmethod
+    async def execute_shards(
+        shards: list[
+            tuple[ForkServerProcess, PipeConnection, PipeConnection, SharedItems | None]
+        ],
+        task_timeout: int,
+        pipe_reader_timeout: float,
+        continue_on_fail: bool,
+        max_payload_size: int | None = None,
+        resource_usage: TaskResourceUsage | None = None,
+        memory_limit: int = 0,
+        cpu_limit: int = 0,
+    ) -> tuple[Items, PrintArgs, int]:
+        """Execute subprocesses for shards of a per-item task in parallel, merging their results in shard order.
+
+        Limits apply to each shard, and `resource_usage` adds up the usage of all shards.
+        """
+
+        shard_usages = [TaskResourceUsage() for _ in shards]
+
+        shard_tasks = [
+            asyncio.create_task(
+                ProcessSupervisor.execute_process(
+                    process=process,
+                    read_conn=read_conn,
+                    write_conn=write_conn,
+                    task_timeout=task_timeout,
+                    pipe_reader_timeout=pipe_reader_timeout,
+                    continue_on_fail=False,
+                    shared_items=shared_items,
+                    max_payload_size=max_payload_size,
+                    resource_usage=shard_usage,
+                    memory_limit=memory_limit,
+                    cpu_limit=cpu_limit,
+                )
+            )
+            for (process, read_conn, write_conn, shared_items), shard_usage in zip(
+                shards, shard_usages
+            )
+        ]
+
+        try:
+            try:
+                shard_results = await asyncio.gather(*shard_tasks)
+            except BaseException:
+                # one shard failing fails the task, so stop the others
+                await asyncio.gather(
+                    *(
+                        asyncio.to_thread(TaskExecutor.stop_process, process)
+                        for process, *_ in shards
+                    )
+                )
+                await asyncio.gather(*shard_tasks, return_exceptions=True)
+                raise
+
+            result: Items = []
+            print_args: PrintArgs = []
+            result_size_bytes = 0
+
+            for shard_result, shard_print_args, shard_size_bytes in shard_results:
+                result.extend(shard_result)
+                print_args.extend(shard_print_args)
+                result_size_bytes += shard_size_bytes
+
+            if max_payload_size is not None and result_size_bytes > max_payload_size:
+                raise TaskResultTooLargeError(max_payload_size)
+
+            return result, print_args, result_size_bytes
+
+        except Exception as e:
+            if continue_on_fail:
+                return [{"json": {"error": str(e)}}], [], 0
+            raise
+
+        finally:
+            if resource_usage:
+                for shard_usage in shard_usages:
+                    resource_usage.add(shard_usage)
+
+    @staticmethod
+    async def _sample_resources(
+        process: ForkServerProcess,
+        resource_usage: TaskResourceUsage,
+        memory_limit: int,
+    ) -> None:
+        """Sample resident memory and CPU time of a subprocess until it exits, killing it on exceeding `memory_limit`.
+
+        As with the address space limit, only memory beyond what the subprocess shares with
+        the forkserver it was forked from, e.g. preloaded modules, counts towards the limit.
+        """
+
+        pid = process.pid
+        assert pid is not None
+
+        parent_pid = read_parent_pid(pid)
+        baseline_rss = (read_rss(parent_pid) if parent_pid else None) or 0
+
+        while True:
+            rss = read_rss(pid)
+            cpu_time = read_cpu_time(pid)
+
+            if rss is None or cpu_time is None:
+                return  # subprocess exited, or no `/proc` to sample
+
+            resource_usage.peak_rss = max(resource_usage.peak_rss, rss)
+            resource_usage.cpu_time = cpu_time
+
+            if memory_limit and rss - baseline_rss > memory_limit:
+                resource_usage.memory_limit_exceeded = True
+                process.kill()
+                return
+
+            await asyncio.sleep(TASK_RESOURCE_SAMPLE_INTERVAL)
+
+    @staticmethod
+    async def _wait_for_exit(process: ForkServerProcess) -> None:
+        loop = asyncio.get_running_loop()
+        exited = loop.create_future()
+        sentinel = process.sentinel
+
+        def on_exit():
+            if not exited.done():
+                exited.set_result(None)
+
+        loop.add_reader(sentinel, on_exit)
+        try:
+            await exited
+        finally:
+            loop.remove_reader(sentinel)
+
+        process.join()  # exit code is ready to read from sentinel, so does not block
@@ -0,0 +1,68 @@
+import os
+from dataclasses import dataclass
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+@dataclass
+class TaskResourceUsage:
+    """Resources used by the subprocesses of a task, sampled by the runner while they run."""
+
+    peak_rss: int = 0  # bytes
+    cpu_time: float = 0.0  # seconds, user and system
+    memory_limit_exceeded: bool = False
+
+    @property
+    def is_sampled(self) -> bool:
+        return self.peak_rss > 0
+
+    def add(self, other: "TaskResourceUsage") -> None:
+        """Add usage of a subprocess running alongside, e.g. another shard."""
+
+        self.peak_rss += other.peak_rss
+        self.cpu_time += other.cpu_time
+        self.memory_limit_exceeded |= other.memory_limit_exceeded
+
+
+def read_rss(pid: int) -> int | None:
+    """Read the resident memory of a process from `/proc`, or None if it has exited."""
+
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_address_space(pid: int) -> int | None:
+    """Read the virtual memory size of a process from `/proc`, or None if unavailable."""
+
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[0]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_parent_pid(pid: int) -> int | None:
+    """Read the parent pid of a process from `/proc`, or None if it has exited."""
+
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # command name in parentheses may contain spaces
+            return int(f.read().rsplit(")", 1)[1].split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_cpu_time(pid: int) -> float | None:
+    """Read user and system CPU time of a process from `/proc`, or None if it has exited."""
+
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # command name in parentheses may contain spaces
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime, stime
+    except (OSError, ValueError, IndexError):
+        return None
@@ -0,0 +1,67 @@
+import os
+from multiprocessing import reduction
+
+from src.json_codec import JsonCodec
+from src.message_types.broker import Items
+from src.constants import SHARED_ITEMS_MEMFD_NAME
+
+
+class SharedItems:
+    """Task input items written once as JSON into an in-memory file (memfd).
+
+    When passed to a subprocess, only the file descriptor is transferred,
+    instead of the whole items list being pickled and rebuilt.
+    """
+
+    def __init__(self, fd: int, size: int):
+        self.fd = fd
+        self.size = size  # bytes
+
+    @staticmethod
+    def is_supported() -> bool:
+        return hasattr(os, "memfd_create")  # Linux only
+
+    @classmethod
+    def create(cls, items: Items) -> "SharedItems":
+        data = JsonCodec.dumps(items)
+
+        fd = os.memfd_create(SHARED_ITEMS_MEMFD_NAME, os.MFD_CLOEXEC)
+        try:
+            view = memoryview(data)
+            total_written = 0
+            while total_written < len(data):
+                total_written += os.pwrite(fd, view[total_written:], total_written)
+        except Exception:
+            os.close(fd)
+            raise
+
+        return cls(fd, len(data))
+
+    def load(self) -> Items:
+        # pread as the fd shares its offset with the runner's fd
+        chunks = []
+        offset = 0
+        while offset < self.size:
+            chunk = os.pread(self.fd, self.size - offset, offset)
+            if not chunk:
+                raise EOFError("Shared items ended before reading all data")
+            chunks.append(chunk)
+            offset += len(chunk)
+
+        data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+        return JsonCodec.loads(data)
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+    def __reduce__(self):
+        # like multiprocessing connections, duplicate fd into subprocess on pickling
+        return SharedItems._rebuild, (reduction.DupFd(self.fd), self.size)
+
+    @staticmethod
+    def _rebuild(dup_fd, size: int) -> "SharedItems":
+        return SharedItems(dup_fd.detach(), size)
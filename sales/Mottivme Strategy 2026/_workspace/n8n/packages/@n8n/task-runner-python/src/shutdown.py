@@ -7,6 +7,7 @@ if TYPE_CHECKING:
     from src.task_runner import TaskRunner
     from src.health_check_server import HealthCheckServer
     from src.sentry import TaskRunnerSentry
+    from src.tracing_exporter import OpenTelemetryExporter
 
 
 class Shutdown:
@@ -17,6 +18,7 @@ class Shutdown:
         task_runner: "TaskRunner",
         health_check_server: "HealthCheckServer | None" = None,
         sentry: "TaskRunnerSentry | None" = None,
+        tracing_exporter: "OpenTelemetryExporter | None" = None,
     ):
         self.logger = logging.getLogger(__name__)
         self.is_shutting_down = False
@@ -26,6 +28,7 @@ class Shutdown:
         self.task_runner = task_runner
         self.health_check_server = health_check_server
         self.sentry = sentry
+        self.tracing_exporter = tracing_exporter
 
         self._register_handler(signal.SIGINT)
         self._register_handler(signal.SIGTERM)
@@ -82,5 +85,8 @@ class Shutdown:
         if self.health_check_server:
             await self.health_check_server.stop()
 
+        if self.tracing_exporter:
+            self.tracing_exporter.shutdown()
+
         if self.sentry:
             self.sentry.shutdown()
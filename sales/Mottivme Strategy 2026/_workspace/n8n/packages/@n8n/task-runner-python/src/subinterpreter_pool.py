@@ -0,0 +1,429 @@
+import ast
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from multiprocessing.connection import Connection
+
+from src.errors import (
+    SubinterpreterUnsupportedError,
+    TaskCancelledError,
+    TaskResultTooLargeError,
+    TaskRuntimeError,
+    TaskTimeoutError,
+)
+from src.config.security_config import SecurityConfig
+from src.json_codec import JsonCodec
+from src.message_types.broker import NodeMode, Items
+from src.message_types.pipe import PipeTaskMessage, PrintArgs
+from src.pipe_reader import PipeReader
+from src.task_executor import TaskExecutor, MULTIPROCESSING_CONTEXT
+from src.constants import (
+    LOG_PIPE_READER_TIMEOUT_TRIGGERED,
+    LOG_SUBINTERPRETER_ABANDONED,
+    LOG_SUBINTERPRETER_POOL_STARTED,
+    MAX_CODE_CACHE_SIZE,
+    SUBINTERPRETER_STOP_TIMEOUT,
+    SUBINTERPRETER_UNSAFE_MODULES,
+    SUBINTERPRETER_UNSUPPORTED_ERROR,
+)
+
+try:
+    # private in Python 3.13, public as `concurrent.interpreters` from Python 3.14
+    import _interpreters
+except ImportError:
+    _interpreters = None
+
+type PipeConnection = Connection
+
+# run in the subinterpreter, with `sys_path` and `security_config` set in its `__main__`
+SUBINTERPRETER_INIT_SCRIPT = """
+import sys
+sys.path[:] = sys_path
+
+import pickle
+from src.task_executor import TaskExecutor
+
+security_config = pickle.loads(security_config)
+TaskExecutor._init_subinterpreter(security_config)
+filtered_builtins = TaskExecutor._filter_builtins(security_config)
+"""
+
+# copy builtins so that one task cannot tamper with the builtins of the next
+SUBINTERPRETER_TASK_SCRIPT = """
+TaskExecutor._run_subinterpreter_task(
+    task_data,
+    marshalled_code,
+    write_fd,
+    cancel_fds,
+    task_timeout,
+    dict(filtered_builtins),
+)
+"""
+
+
+@dataclass
+class Interpreter:
+    interpreter_id: int
+    tasks_executed: int = 0
+    cancel_fd: int | None = None  # runner writes to interrupt the running task
+    is_cancelled: bool = False
+    is_abandoned: bool = False
+
+
+class SubinterpreterPool:
+    """Keeps already sandboxed subinterpreters warm and runs tasks in them on runner threads.
+
+    A subinterpreter has its own modules and builtins but shares the runner process, so
+    user code is stopped by interrupting it rather than by killing a process. User code
+    that does not return when interrupted, e.g. blocked in a C call, leaves its
+    subinterpreter abandoned until it returns, which the runner counts against its
+    concurrency until restarting. Tasks importing modules that do not
+    support subinterpreters raise `SubinterpreterUnsupportedError`, for the runner to
+    run them in a subprocess instead.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_tasks_per_interpreter: int,
+        security_config: SecurityConfig,
+    ):
+        self.size = size
+        self.max_tasks_per_interpreter = max_tasks_per_interpreter
+        self.security_config = security_config
+        self.idle_interpreters: deque[Interpreter] = deque()
+        self.abandoned_interpreters: set[int] = set()
+        self.lock = threading.Lock()
+        self.is_stopped = False
+        self.logger = logging.getLogger(__name__)
+
+        # top-level modules learned to load, or to fail to load, in subinterpreters
+        self.safe_modules: set[str] = set()
+        self.unsafe_modules: set[str] = set(SUBINTERPRETER_UNSAFE_MODULES)
+        self.imported_modules: OrderedDict[str, frozenset[str]] = OrderedDict()
+
+    @staticmethod
+    def is_supported() -> bool:
+        return _interpreters is not None
+
+    def start(self) -> None:
+        interpreters = [self._spawn_interpreter() for _ in range(self.size)]
+
+        with self.lock:
+            self.idle_interpreters.extend(interpreters)
+
+        self.logger.info(
+            LOG_SUBINTERPRETER_POOL_STARTED.format(
+                size=self.size, max_tasks=self.max_tasks_per_interpreter
+            )
+        )
+
+    def stop(self) -> None:
+        with self.lock:
+            self.is_stopped = True
+            interpreters = list(self.idle_interpreters)
+            self.idle_interpreters.clear()
+
+        for interpreter in interpreters:
+            self._retire_interpreter(interpreter)
+
+    def acquire(self) -> Interpreter:
+        """Take an idle subinterpreter, spawning a new one if all are busy."""
+
+        with self.lock:
+            if self.idle_interpreters:
+                return self.idle_interpreters.popleft()
+
+        return self._spawn_interpreter()
+
+    def release(self, interpreter: Interpreter, is_reusable: bool) -> None:
+        """Return a subinterpreter to the pool, or retire it and spawn a replacement."""
+
+        is_reusable = (
+            is_reusable and interpreter.tasks_executed < self.max_tasks_per_interpreter
+        )
+
+        with self.lock:
+            is_kept = (
+                is_reusable
+                and not self.is_stopped
+                and len(self.idle_interpreters) < self.size
+            )
+            if is_kept:
+                interpreter.is_cancelled = False
+                self.idle_interpreters.append(interpreter)
+
+        if is_kept:
+            return
+
+        if not interpreter.is_abandoned:
+            self._retire_interpreter(interpreter)
+
+        with self.lock:
+            needs_replacement = (
+                not self.is_stopped and len(self.idle_interpreters) < self.size
+            )
+
+        if needs_replacement:
+            self.release(self._spawn_interpreter(), is_reusable=True)
+
+    def supports(self, code: str, code_hash: str) -> bool:
+        """Whether the code imports only modules not known to fail to load in subinterpreters."""
+
+        return self.unsafe_modules.isdisjoint(
+            self._get_imported_modules(code, code_hash)
+        )
+
+    def cancel(self, interpreter: Interpreter) -> None:
+        """Interrupt the task running in a subinterpreter."""
+
+        with self.lock:
+            interpreter.is_cancelled = True
+            if interpreter.cancel_fd is not None:
+                os.write(interpreter.cancel_fd, b"\0")
+
+    def execute_task(
+        self,
+        interpreter: Interpreter,
+        code: str,
+        code_hash: str,
+        node_mode: NodeMode,
+        items: Items,
+        task_timeout: int,
+        pipe_reader_timeout: float,
+        continue_on_fail: bool,
+        marshalled_code: bytes | None = None,
+        max_payload_size: int | None = None,
+    ) -> tuple[Items, PrintArgs, int]:
+        """Execute a Python code task in a subinterpreter, releasing the subinterpreter afterwards."""
+
+        print_args: PrintArgs = []
+        is_reusable = False
+
+        read_conn, write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+        cancel_read_conn, cancel_write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+
+        # daemon, as an abandoned subinterpreter may hold the write end indefinitely
+        pipe_reader = PipeReader(read_conn.fileno(), read_conn, max_payload_size)
+        pipe_reader.daemon = True
+        pipe_reader.start()
+
+        def close_pipes():
+            write_conn.close()
+            cancel_read_conn.close()
+            cancel_write_conn.close()
+
+        try:
+            task: PipeTaskMessage = {
+                "code": code,
+                "code_hash": code_hash,
+                "node_mode": node_mode,
+                "items": items,
+            }
+
+            _interpreters.set___main___attrs(
+                interpreter.interpreter_id,
+                {
+                    "task_data": JsonCodec.dumps(task),
+                    "marshalled_code": marshalled_code,
+                    "write_fd": write_conn.fileno(),
+                    "cancel_fds": (
+                        cancel_read_conn.fileno(),
+                        cancel_write_conn.fileno(),
+                    ),
+                    "task_timeout": task_timeout,
+                },
+            )
+
+            with self.lock:
+                interpreter.cancel_fd = cancel_write_conn.fileno()
+                if interpreter.is_cancelled:
+                    os.write(interpreter.cancel_fd, b"\0")
+
+            interpreter.tasks_executed += 1
+
+            exec_errors: list = []
+            exec_thread = threading.Thread(
+                target=self._exec_task,
+                args=(interpreter, exec_errors, close_pipes),
+                daemon=True,
+            )
+            start_time = time.monotonic()
+            exec_thread.start()
+            exec_thread.join(task_timeout + SUBINTERPRETER_STOP_TIMEOUT)
+
+            with self.lock:
+                interpreter.cancel_fd = None
+                # left for the thread to clean up, once user code returns
+                interpreter.is_abandoned = exec_thread.is_alive()
+                if interpreter.is_abandoned:
+                    self.abandoned_interpreters.add(interpreter.interpreter_id)
+
+            if not interpreter.is_abandoned:
+                close_pipes()  # for the reader to see the end of a missing result
+            else:
+                self.logger.warning(
+                    LOG_SUBINTERPRETER_ABANDONED.format(
+                        interpreter_id=interpreter.interpreter_id,
+                        timeout=SUBINTERPRETER_STOP_TIMEOUT,
+                    )
+                )
+                self._detach_write_end(write_conn)
+                pipe_reader.join(timeout=pipe_reader_timeout)
+
+            if interpreter.is_cancelled:
+                raise TaskCancelledError()
+
+            if (
+                interpreter.is_abandoned
+                or time.monotonic() - start_time >= task_timeout
+            ):
+                raise TaskTimeoutError(task_timeout)
+
+            if isinstance(pipe_reader.error, TaskResultTooLargeError):
+                raise pipe_reader.error
+
+            pipe_reader.join(timeout=pipe_reader_timeout)
+
+            if pipe_reader.is_alive():
+                self.logger.warning(
+                    LOG_PIPE_READER_TIMEOUT_TRIGGERED.format(
+                        timeout=pipe_reader_timeout
+                    )
+                )
+
+            if pipe_reader.pipe_message is None and exec_errors[0] is not None:
+                raise TaskRuntimeError(
+                    {
+                        "message": exec_errors[0].msg,
+                        "description": "",
+                        "stack": exec_errors[0].formatted,
+                        "stderr": "",
+                    }
+                )
+
+            try:
+                result = TaskExecutor.get_task_result(pipe_reader)
+            except TaskRuntimeError as e:
+                if SUBINTERPRETER_UNSUPPORTED_ERROR in f"{e}\n{e.stack_trace}":
+                    self._mark_unsafe(code, code_hash)
+                    raise SubinterpreterUnsupportedError(str(e).splitlines()[-1])
+                raise
+
+            self.safe_modules.update(self._get_imported_modules(code, code_hash))
+            is_reusable = exec_errors[0] is None
+
+            return result
+
+        except SubinterpreterUnsupportedError:
+            raise
+
+        except Exception as e:
+            if continue_on_fail:
+                return [{"json": {"error": str(e)}}], print_args, 0
+            raise
+
+        finally:
+            if not interpreter.is_abandoned:
+                close_pipes()
+            self.release(interpreter, is_reusable)
+
+    def _exec_task(
+        self, interpreter: Interpreter, exec_errors: list, close_pipes
+    ) -> None:
+        exec_errors.append(
+            _interpreters.exec(interpreter.interpreter_id, SUBINTERPRETER_TASK_SCRIPT)
+        )
+
+        with self.lock:
+            is_abandoned = interpreter.is_abandoned
+
+        if is_abandoned:
+            close_pipes()
+            self._retire_interpreter(interpreter)
+            with self.lock:
+                self.abandoned_interpreters.discard(interpreter.interpreter_id)
+
+    @staticmethod
+    def _detach_write_end(write_conn: PipeConnection) -> None:
+        """Point the write end of the result pipe at /dev/null, for the reader to see its end.
+
+        Closing it instead would free its fd for reuse while the abandoned subinterpreter
+        may still write to it.
+        """
+
+        devnull_fd = os.open(os.devnull, os.O_WRONLY)
+        try:
+            os.dup2(devnull_fd, write_conn.fileno(), inheritable=False)
+        finally:
+            os.close(devnull_fd)
+
+    def _spawn_interpreter(self) -> Interpreter:
+        try:
+            interpreter_id = _interpreters.create("isolated")
+        except _interpreters.InterpreterError as e:
+            raise SubinterpreterUnsupportedError(str(e))
+
+        _interpreters.set___main___attrs(
+            interpreter_id,
+            {
+                "sys_path": tuple(sys.path),
+                "security_config": pickle.dumps(self.security_config),
+            },
+        )
+
+        # imports the executor, so takes longer than creating the subinterpreter
+        error = _interpreters.exec(interpreter_id, SUBINTERPRETER_INIT_SCRIPT)
+
+        if error is not None:
+            _interpreters.destroy(interpreter_id)
+            raise SubinterpreterUnsupportedError(error.formatted)
+
+        return Interpreter(interpreter_id)
+
+    def _retire_interpreter(self, interpreter: Interpreter) -> None:
+        try:
+            _interpreters.destroy(interpreter.interpreter_id)
+        except _interpreters.InterpreterNotFoundError:
+            pass  # already destroyed
+
+    def _mark_unsafe(self, code: str, code_hash: str) -> None:
+        imported_modules = self._get_imported_modules(code, code_hash)
+
+        # a module already run in a subinterpreter may import an unsafe one only on some paths
+        unsafe_modules = imported_modules - self.safe_modules or imported_modules
+        self.unsafe_modules.update(unsafe_modules)
+
+    def _get_imported_modules(self, code: str, code_hash: str) -> frozenset[str]:
+        imported_modules = self.imported_modules.get(code_hash)
+
+        if imported_modules is not None:
+            self.imported_modules.move_to_end(code_hash)
+            return imported_modules
+
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            tree = ast.Module(body=[], type_ignores=[])
+
+        module_names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                module_names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                module_names.add(node.module)
+
+        imported_modules = frozenset(name.split(".")[0] for name in module_names)
+
+        if len(self.imported_modules) >= MAX_CODE_CACHE_SIZE:
+            self.imported_modules.popitem(last=False)
+
+        self.imported_modules[code_hash] = imported_modules
+
+        return imported_modules
@@ -1,9 +1,16 @@
 import ast
 import hashlib
+import threading
 from collections import OrderedDict
 
 from src.errors import SecurityViolationError
 from src.import_validation import validate_module_import
+from src.metrics import metrics
+from src.validation_cache import (
+    CacheKey,
+    CachedViolations,
+    PersistentValidationCache,
+)
 from src.config.security_config import SecurityConfig
 from src.constants import (
     MAX_VALIDATION_CACHE_SIZE,
@@ -16,8 +23,6 @@ from src.constants import (
     BLOCKED_NAMES,
 )
 
-CacheKey = tuple[str, tuple]  # (code_hash, allowlists_tuple)
-CachedViolations = list[str]
 ValidationCache = OrderedDict[CacheKey, CachedViolations]
 
 
@@ -157,9 +162,15 @@ class SecurityValidator(ast.NodeVisitor):
 
 class TaskAnalyzer:
     _cache: ValidationCache = OrderedDict()
+    _cache_lock = threading.Lock()  # validation runs in threads with a persistent cache
 
-    def __init__(self, security_config: SecurityConfig):
+    def __init__(
+        self,
+        security_config: SecurityConfig,
+        persistent_cache: PersistentValidationCache | None = None,
+    ):
         self._security_config = security_config
+        self._persistent_cache = persistent_cache
         self._allowlists = (
             tuple(sorted(security_config.stdlib_allow)),
             tuple(sorted(security_config.external_allow)),
@@ -169,22 +180,40 @@ class TaskAnalyzer:
             and "*" in security_config.external_allow
         )
 
-    def validate(self, code: str) -> None:
+    @staticmethod
+    def hash_code(code: str) -> str:
+        return hashlib.sha256(code.encode()).hexdigest()
+
+    def validate(self, code: str, code_hash: str | None = None) -> None:
         if self._allow_all:
             return
 
-        cache_key = self._to_cache_key(code)
-        cached_violations = self._cache.get(cache_key)
-        cache_hit = cached_violations is not None
+        cache_key = self._to_cache_key(code_hash or TaskAnalyzer.hash_code(code))
+        with self._cache_lock:
+            cached_violations = self._cache.get(cache_key)
+            if cached_violations is not None:
+                self._cache.move_to_end(cache_key)
 
-        if cache_hit:
-            self._cache.move_to_end(cache_key)
+        if cached_violations is not None:
+            metrics.validation_cache_hits.inc()
 
             if len(cached_violations) == 0:
                 return
 
             self._raise_security_error(cached_violations)
 
+        metrics.validation_cache_misses.inc()
+
+        if self._persistent_cache:
+            persisted_violations = self._persistent_cache.get(cache_key)
+            if persisted_violations is not None:
+                self._set_in_cache(cache_key, persisted_violations)
+
+                if len(persisted_violations) == 0:
+                    return
+
+                self._raise_security_error(persisted_violations)
+
         tree = ast.parse(code)
 
         security_validator = SecurityValidator(self._security_config)
@@ -192,6 +221,9 @@ class TaskAnalyzer:
 
         self._set_in_cache(cache_key, security_validator.violations)
 
+        if self._persistent_cache:
+            self._persistent_cache.set(cache_key, security_validator.violations)
+
         if security_validator.violations:
             self._raise_security_error(security_validator.violations)
 
@@ -200,13 +232,13 @@ class TaskAnalyzer:
             message="Security violations detected", description="\n".join(violations)
         )
 
-    def _to_cache_key(self, code: str) -> CacheKey:
-        code_hash = hashlib.sha256(code.encode()).hexdigest()
+    def _to_cache_key(self, code_hash: str) -> CacheKey:
         return (code_hash, self._allowlists)
 
     def _set_in_cache(self, cache_key: CacheKey, violations: CachedViolations) -> None:
-        if len(self._cache) >= MAX_VALIDATION_CACHE_SIZE:
-            self._cache.popitem(last=False)  # FIFO
+        with self._cache_lock:
+            if len(self._cache) >= MAX_VALIDATION_CACHE_SIZE:
+                self._cache.popitem(last=False)  # FIFO
 
-        self._cache[cache_key] = violations.copy()
-        self._cache.move_to_end(cache_key)
+            self._cache[cache_key] = violations.copy()
+            self._cache.move_to_end(cache_key)
@@ -1,19 +1,29 @@
+import ctypes
+import dis
+import importlib.util
+import marshal
 import multiprocessing
 import traceback
 import textwrap
 import json
 import io
 import os
+import resource
+import select
 import sys
+import threading
+import time
 import logging
+from typing import TYPE_CHECKING
 
 from src.errors import (
     TaskCancelledError,
+    TaskCpuLimitError,
     TaskKilledError,
+    TaskMemoryLimitError,
     TaskResultMissingError,
     TaskResultReadError,
     TaskRuntimeError,
-    TaskTimeoutError,
     TaskSubprocessFailedError,
     SecurityViolationError,
 )
@@ -22,30 +32,47 @@ from src.config.security_config import SecurityConfig
 
 from src.message_types.broker import NodeMode, Items
 from src.message_types.pipe import (
+    PipeTaskMessage,
     PipeResultMessage,
+    TaskTimings,
     PipeErrorMessage,
     TaskErrorInfo,
     PrintArgs,
 )
-from src.pipe_reader import PipeReader
+from src.json_codec import JsonCodec
+from src.pipe_reader import AsyncPipeReader, PipeReader
+from src.pipe_writer import PipeWriter
+from src.print_stream import PrintStreamWriter
+from src.resource_usage import read_address_space
+from src.shared_items import SharedItems
 from src.constants import (
-    EXECUTOR_CIRCULAR_REFERENCE_KEY,
     EXECUTOR_USER_OUTPUT_KEY,
     EXECUTOR_ALL_ITEMS_FILENAME,
     EXECUTOR_PER_ITEM_FILENAME,
     SIGTERM_EXIT_CODE,
     SIGKILL_EXIT_CODE,
+    SIGXCPU_EXIT_CODE,
+    MEMORY_LIMIT_EXIT_CODE,
     PIPE_MSG_PREFIX_LENGTH,
-    LOG_PIPE_READER_TIMEOUT_TRIGGERED,
+    LOG_FORKSERVER_PRELOAD_MISSING,
+    MAX_CODE_CACHE_SIZE,
+    SUBINTERPRETER_INTERRUPT_INTERVAL,
 )
 
+from collections import OrderedDict
 from multiprocessing.context import ForkServerProcess
 from multiprocessing.connection import Connection
+from types import CodeType
+
+if TYPE_CHECKING:
+    # imports tracemalloc, which cannot be loaded in subinterpreters
+    from src.task_profiler import TaskProfiler
 
 logger = logging.getLogger(__name__)
 
 MULTIPROCESSING_CONTEXT = multiprocessing.get_context("forkserver")
 MAX_PRINT_ARGS_ALLOWED = 100
+RAISE_VARARGS_OPCODE = dis.opmap["RAISE_VARARGS"]
 
 type PipeConnection = Connection
 
@@ -53,114 +80,174 @@ type PipeConnection = Connection
 class TaskExecutor:
     """Responsible for executing Python code tasks in isolated subprocesses."""
 
+    @staticmethod
+    def preload_modules(modules: set[str]) -> list[str]:
+        """Import modules once into the forkserver, so that subprocesses forked from it inherit them.
+
+        Must be called before the first subprocess is started. Subprocesses still drop any preloaded
+        module that is not allowlisted when sanitizing `sys.modules`.
+        """
+
+        installed_modules = []
+        for module in sorted(modules):
+            if importlib.util.find_spec(module) is None:
+                logger.warning(LOG_FORKSERVER_PRELOAD_MISSING.format(module=module))
+            else:
+                installed_modules.append(module)
+
+        # "__main__" is preloaded by default, so keep it
+        MULTIPROCESSING_CONTEXT.set_forkserver_preload(["__main__", *installed_modules])
+
+        # forkserver imports preloaded modules on startup, before serving its first fork
+        process = MULTIPROCESSING_CONTEXT.Process()
+        process.start()
+        process.join()
+
+        return installed_modules
+
     @staticmethod
     def create_process(
         code: str,
         node_mode: NodeMode,
         items: Items,
         security_config: SecurityConfig,
-    ) -> tuple[ForkServerProcess, PipeConnection, PipeConnection]:
-        """Create a subprocess for executing a Python code task and a pipe for communication."""
+        marshalled_code: bytes | None = None,
+        item_offset: int = 0,
+        print_conn: PipeConnection | None = None,
+        memory_limit: int = 0,
+        cpu_limit: int = 0,
+        profiler: "TaskProfiler | None" = None,
+    ) -> tuple[ForkServerProcess, PipeConnection, PipeConnection, SharedItems | None]:
+        """Create a subprocess for executing a Python code task, a pipe for communication, and shared items if supported.
+
+        If `marshalled_code` holds the code already compiled, the subprocess skips compiling it.
+        In per-item mode, `item_offset` is the index of the first item, for items that are a shard
+        of the task's items. If `print_conn` is passed, the subprocess streams print output to it
+        instead of returning it with the result. Non-zero `memory_limit` in bytes and `cpu_limit`
+        in seconds are enforced on the subprocess with resource limits. If `profiler` is passed,
+        the subprocess profiles the user code.
+        """
 
-        fn = (
-            TaskExecutor._all_items
-            if node_mode == "all_items"
-            else TaskExecutor._per_item
-        )
+        kwargs = {
+            "print_conn": print_conn,
+            "memory_limit": memory_limit,
+            "cpu_limit": cpu_limit,
+            "profiler": profiler,
+        }
+
+        if node_mode == "all_items":
+            fn = TaskExecutor._all_items
+        else:
+            fn = TaskExecutor._per_item
+            kwargs["item_offset"] = item_offset
+
+        # pass only a file descriptor to items, instead of pickling them
+        shared_items = SharedItems.create(items) if SharedItems.is_supported() else None
 
         # thread in runner process reads, subprocess writes
-        read_conn, write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+        try:
+            read_conn, write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+        except Exception:
+            if shared_items:
+                shared_items.close()
+            raise
 
         process = MULTIPROCESSING_CONTEXT.Process(
             target=fn,
             args=(
                 code,
-                items,
+                shared_items or items,
                 write_conn,
                 security_config,
+                marshalled_code,
             ),
+            kwargs=kwargs,
         )
 
-        return process, read_conn, write_conn
+        return process, read_conn, write_conn, shared_items
 
     @staticmethod
-    def execute_process(
-        process: ForkServerProcess,
+    def close_process_resources(
         read_conn: PipeConnection,
         write_conn: PipeConnection,
-        task_timeout: int,
-        pipe_reader_timeout: float,
-        continue_on_fail: bool,
-    ) -> tuple[Items, PrintArgs, int]:
-        """Execute a subprocess for a Python code task."""
+        shared_items: SharedItems | None,
+    ) -> None:
+        """Close the pipe and shared items of a subprocess that will not be started."""
 
-        print_args: PrintArgs = []
+        read_conn.close()
+        write_conn.close()
+        if shared_items:
+            shared_items.close()
 
-        pipe_reader = PipeReader(read_conn.fileno(), read_conn)
-        pipe_reader.start()
+    @staticmethod
+    def split_items(items: Items, shard_count: int) -> list[tuple[int, Items]]:
+        """Split items into contiguous shards of near-equal size, each with the index of its first item."""
 
-        try:
-            try:
-                process.start()
-            except Exception as e:
-                raise TaskSubprocessFailedError(-1, e)
-            finally:
-                write_conn.close()
+        shard_size, remainder = divmod(len(items), shard_count)
 
-            process.join(timeout=task_timeout)
+        shards = []
+        start = 0
+        for i in range(shard_count):
+            end = start + shard_size + (1 if i < remainder else 0)
+            shards.append((start, items[start:end]))
+            start = end
 
-            if process.is_alive():
-                TaskExecutor.stop_process(process)
-                raise TaskTimeoutError(task_timeout)
+        return shards
 
-            if process.exitcode == SIGTERM_EXIT_CODE:
-                raise TaskCancelledError()
+    @staticmethod
+    def compile_code(raw_code: str, node_mode: NodeMode) -> CodeType:
+        filename = (
+            EXECUTOR_ALL_ITEMS_FILENAME
+            if node_mode == "all_items"
+            else EXECUTOR_PER_ITEM_FILENAME
+        )
+        return compile(TaskExecutor._wrap_code(raw_code), filename, "exec")
 
-            if process.exitcode == SIGKILL_EXIT_CODE:
-                raise TaskKilledError()
+    @staticmethod
+    def get_task_result(
+        pipe_reader: PipeReader | AsyncPipeReader,
+    ) -> tuple[Items, PrintArgs, int]:
+        """Get result, print args and result size in bytes from a finished pipe reader."""
 
-            if process.exitcode != 0:
-                assert process.exitcode is not None
-                raise TaskSubprocessFailedError(process.exitcode)
+        if pipe_reader.error:
+            raise TaskResultReadError(pipe_reader.error)
 
-            pipe_reader.join(timeout=pipe_reader_timeout)
+        if pipe_reader.pipe_message is None:
+            raise TaskResultMissingError()
 
-            if pipe_reader.is_alive():
-                logger.warning(
-                    LOG_PIPE_READER_TIMEOUT_TRIGGERED.format(
-                        timeout=pipe_reader_timeout
-                    )
-                )
-                try:
-                    read_conn.close()
-                except Exception:
-                    pass
+        returned = pipe_reader.pipe_message
+
+        if "error" in returned:
+            raise TaskRuntimeError(returned["error"])
 
-            if pipe_reader.error:
-                raise TaskResultReadError(pipe_reader.error)
+        if "result" not in returned:
+            raise TaskResultMissingError()
 
-            if pipe_reader.pipe_message is None:
-                raise TaskResultMissingError()
+        result = returned["result"]
+        print_args = returned.get("print_args", [])
+        assert pipe_reader.message_size is not None
+        result_size_bytes = pipe_reader.message_size
 
-            returned = pipe_reader.pipe_message
+        return result, print_args, result_size_bytes
 
-            if "error" in returned:
-                raise TaskRuntimeError(returned["error"])
+    @staticmethod
+    def raise_for_exit_code(exit_code: int, memory_limit: int = 0, cpu_limit: int = 0):
+        """Raise the error matching a subprocess exit code, if the exit code signals a failure."""
 
-            if "result" not in returned:
-                raise TaskResultMissingError()
+        if exit_code == SIGTERM_EXIT_CODE:
+            raise TaskCancelledError()
 
-            result = returned["result"]
-            print_args = returned.get("print_args", [])
-            assert pipe_reader.message_size is not None
-            result_size_bytes = pipe_reader.message_size
+        if exit_code == MEMORY_LIMIT_EXIT_CODE and memory_limit:
+            raise TaskMemoryLimitError(memory_limit)
 
-            return result, print_args, result_size_bytes
+        if exit_code == SIGXCPU_EXIT_CODE and cpu_limit:
+            raise TaskCpuLimitError(cpu_limit)
 
-        except Exception as e:
-            if continue_on_fail:
-                return [{"json": {"error": str(e)}}], print_args, 0
-            raise
+        if exit_code == SIGKILL_EXIT_CODE:
+            raise TaskKilledError()
+
+        if exit_code != 0:
+            raise TaskSubprocessFailedError(exit_code)
 
     @staticmethod
     def stop_process(process: ForkServerProcess | None):
@@ -183,66 +270,227 @@ class TaskExecutor:
     @staticmethod
     def _all_items(
         raw_code: str,
-        items: Items,
+        items: Items | SharedItems,
         write_conn,
         security_config: SecurityConfig,
+        marshalled_code: bytes | None = None,
+        print_conn=None,
+        memory_limit: int = 0,
+        cpu_limit: int = 0,
+        profiler: "TaskProfiler | None" = None,
     ):
         """Execute a Python code task in all-items mode."""
 
-        if security_config.runner_env_deny:
-            os.environ.clear()
+        TaskExecutor._set_resource_limits(memory_limit, cpu_limit)
 
-        TaskExecutor._sanitize_sys_modules(security_config)
+        if isinstance(items, SharedItems):
+            items = items.load()
+
+        compiled_code = marshal.loads(marshalled_code) if marshalled_code else None
 
+        TaskExecutor._init_sandbox(security_config)
+
+        write_fd = write_conn.fileno()
+        print_fd = print_conn.fileno() if print_conn else None
+
+        try:
+            TaskExecutor._run_all_items(
+                raw_code,
+                items,
+                write_fd,
+                TaskExecutor._filter_builtins(security_config),
+                compiled_code,
+                print_fd,
+                memory_limit > 0,
+                profiler,
+            )
+        finally:
+            TaskExecutor._close_fd(write_fd)
+            if print_fd is not None:
+                TaskExecutor._close_fd(print_fd)
+
+    @staticmethod
+    def _per_item(
+        raw_code: str,
+        items: Items | SharedItems,
+        write_conn,
+        security_config: SecurityConfig,
+        marshalled_code: bytes | None = None,
+        item_offset: int = 0,
+        print_conn=None,
+        memory_limit: int = 0,
+        cpu_limit: int = 0,
+        profiler: "TaskProfiler | None" = None,
+    ):
+        """Execute a Python code task in per-item mode."""
+
+        TaskExecutor._set_resource_limits(memory_limit, cpu_limit)
+
+        if isinstance(items, SharedItems):
+            items = items.load()
+
+        compiled_code = marshal.loads(marshalled_code) if marshalled_code else None
+
+        TaskExecutor._init_sandbox(security_config)
+
+        write_fd = write_conn.fileno()
+        print_fd = print_conn.fileno() if print_conn else None
+
+        try:
+            TaskExecutor._run_per_item(
+                raw_code,
+                items,
+                write_fd,
+                TaskExecutor._filter_builtins(security_config),
+                compiled_code,
+                item_offset,
+                print_fd,
+                memory_limit > 0,
+                profiler,
+            )
+        finally:
+            TaskExecutor._close_fd(write_fd)
+            if print_fd is not None:
+                TaskExecutor._close_fd(print_fd)
+
+    @staticmethod
+    def _worker_loop(task_conn, result_conn, security_config: SecurityConfig):
+        """Run tasks received over a pipe in an already sandboxed, long-lived worker process."""
+
+        TaskExecutor._init_sandbox(security_config)
+
+        task_fd = task_conn.fileno()
+        result_fd = result_conn.fileno()
+        filtered_builtins = TaskExecutor._filter_builtins(security_config)
+        compiled_codes: OrderedDict[tuple[str, NodeMode], CodeType] = OrderedDict()
+
+        while True:
+            try:
+                length_bytes = PipeReader._read_exact_bytes(
+                    task_fd, PIPE_MSG_PREFIX_LENGTH
+                )
+            except EOFError:
+                break  # runner closed the task pipe, so worker is retired
+
+            length_int = int.from_bytes(length_bytes, "big")
+            data = PipeReader._read_exact_bytes(task_fd, length_int)
+            task: PipeTaskMessage = JsonCodec.loads(data)
+
+            run = (
+                TaskExecutor._run_all_items
+                if task["node_mode"] == "all_items"
+                else TaskExecutor._run_per_item
+            )
+
+            code_key = (task["code_hash"], task["node_mode"])
+            compiled_code = compiled_codes.get(code_key)
+
+            if compiled_code is not None:
+                compiled_codes.move_to_end(code_key)
+            else:
+                try:
+                    compiled_code = TaskExecutor.compile_code(
+                        task["code"], task["node_mode"]
+                    )
+                except Exception:
+                    pass  # compiled again by `run`, to report the error
+                else:
+                    if len(compiled_codes) >= MAX_CODE_CACHE_SIZE:
+                        compiled_codes.popitem(last=False)
+                    compiled_codes[code_key] = compiled_code
+
+            # copy so that one task cannot tamper with the builtins of the next
+            run(
+                task["code"],
+                task["items"],
+                result_fd,
+                dict(filtered_builtins),
+                compiled_code,
+            )
+
+        TaskExecutor._close_fd(result_fd)
+
+    @staticmethod
+    def _run_all_items(
+        raw_code: str,
+        items: Items,
+        write_fd: int,
+        filtered_builtins: dict,
+        compiled_code: CodeType | None = None,
+        print_fd: int | None = None,
+        is_memory_limited: bool = False,
+        profiler: "TaskProfiler | None" = None,
+    ):
         print_args: PrintArgs = []
         sys.stderr = stderr_capture = io.StringIO()
 
         try:
-            wrapped_code = TaskExecutor._wrap_code(raw_code)
-            compiled_code = compile(wrapped_code, EXECUTOR_ALL_ITEMS_FILENAME, "exec")
+            if compiled_code is None:
+                compiled_code = TaskExecutor.compile_code(raw_code, "all_items")
 
             globals = {
-                "__builtins__": TaskExecutor._filter_builtins(security_config),
+                "__builtins__": filtered_builtins,
                 "_items": items,
-                "print": TaskExecutor._create_custom_print(print_args),
+                "print": TaskExecutor._create_custom_print(print_args, print_fd),
             }
 
+            if profiler:
+                profiler.start()
+
+            start_time = time.time_ns()
+            user_code_start = time.perf_counter_ns()
+
             exec(compiled_code, globals)
 
+            user_code_time = time.perf_counter_ns() - user_code_start
             result = globals[EXECUTOR_USER_OUTPUT_KEY]
-            TaskExecutor._put_result(write_conn.fileno(), result, print_args)
+            TaskExecutor._put_profile(profiler, print_args, print_fd)
+            TaskExecutor._put_result(
+                PipeWriter(write_fd), result, print_args, start_time, user_code_time
+            )
 
         except BaseException as e:
-            TaskExecutor._put_error(
-                write_conn.fileno(), e, stderr_capture.getvalue(), print_args
-            )
+            if (
+                is_memory_limited
+                and isinstance(e, MemoryError)
+                and TaskExecutor._is_allocation_failure(e)
+            ):
+                # reporting the error may itself fail to allocate
+                os._exit(MEMORY_LIMIT_EXIT_CODE)
+            TaskExecutor._put_profile(profiler, print_args, print_fd)
+            TaskExecutor._put_error(write_fd, e, stderr_capture.getvalue(), print_args)
 
     @staticmethod
-    def _per_item(
+    def _run_per_item(
         raw_code: str,
         items: Items,
-        write_conn,
-        security_config: SecurityConfig,
+        write_fd: int,
+        filtered_builtins: dict,
+        compiled_code: CodeType | None = None,
+        item_offset: int = 0,
+        print_fd: int | None = None,
+        is_memory_limited: bool = False,
+        profiler: "TaskProfiler | None" = None,
     ):
-        """Execute a Python code task in per-item mode."""
-
-        if security_config.runner_env_deny:
-            os.environ.clear()
-
-        TaskExecutor._sanitize_sys_modules(security_config)
-
         print_args: PrintArgs = []
         sys.stderr = stderr_capture = io.StringIO()
 
         try:
-            wrapped_code = TaskExecutor._wrap_code(raw_code)
-            compiled_code = compile(wrapped_code, EXECUTOR_PER_ITEM_FILENAME, "exec")
+            if compiled_code is None:
+                compiled_code = TaskExecutor.compile_code(raw_code, "per_item")
 
-            filtered_builtins = TaskExecutor._filter_builtins(security_config)
-            custom_print = TaskExecutor._create_custom_print(print_args)
+            custom_print = TaskExecutor._create_custom_print(print_args, print_fd)
 
-            result: Items = []
-            for index, item in enumerate(items):
+            # stream output items as they are produced instead of collecting them
+            writer = PipeWriter(write_fd)
+
+            if profiler:
+                profiler.start()
+
+            start_time = time.time_ns()
+            loop_start = time.perf_counter_ns()
+
+            for index, item in enumerate(items, start=item_offset):
                 globals = {
                     "__builtins__": filtered_builtins,
                     "_item": item,
@@ -263,14 +511,56 @@ class TaskExecutor:
                 if isinstance(user_output, dict) and "binary" in user_output:
                     output_item["binary"] = user_output["binary"]
 
-                result.append(output_item)
+                writer.write_item(output_item)
 
-            TaskExecutor._put_result(write_conn.fileno(), result, print_args)
+            # items are serialized as they are produced, so not counted as user code
+            user_code_time = time.perf_counter_ns() - loop_start - writer.serialize_time
+            TaskExecutor._put_profile(profiler, print_args, print_fd)
+            TaskExecutor._put_result(writer, [], print_args, start_time, user_code_time)
 
         except BaseException as e:
-            TaskExecutor._put_error(
-                write_conn.fileno(), e, stderr_capture.getvalue(), print_args
+            if (
+                is_memory_limited
+                and isinstance(e, MemoryError)
+                and TaskExecutor._is_allocation_failure(e)
+            ):
+                # reporting the error may itself fail to allocate
+                os._exit(MEMORY_LIMIT_EXIT_CODE)
+            TaskExecutor._put_profile(profiler, print_args, print_fd)
+            TaskExecutor._put_error(write_fd, e, stderr_capture.getvalue(), print_args)
+
+    @staticmethod
+    def _is_allocation_failure(e: MemoryError) -> bool:
+        """Whether `e` comes from failing to allocate, rather than from a `raise` in Python code."""
+
+        try:
+            tb = e.__traceback__
+            if tb is None:
+                return True
+            while tb.tb_next is not None:
+                tb = tb.tb_next
+
+            # bare `raise` re-raises with the original traceback, so only `raise X` counts
+            code = tb.tb_frame.f_code.co_code
+            return not (
+                code[tb.tb_lasti] == RAISE_VARARGS_OPCODE and code[tb.tb_lasti + 1] > 0
             )
+        except MemoryError:
+            return True
+
+    @staticmethod
+    def _set_resource_limits(memory_limit: int, cpu_limit: int):
+        """Limit the address space and CPU time of the subprocess, if limits are set."""
+
+        if memory_limit:
+            # address space already mapped, e.g. interpreter and preloaded modules, is not counted
+            address_space = read_address_space(os.getpid()) or 0
+            limit = address_space + memory_limit
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+        if cpu_limit:
+            # SIGXCPU at the soft limit, SIGKILL at the hard limit if SIGXCPU is handled
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
 
     @staticmethod
     def _wrap_code(raw_code: str) -> str:
@@ -291,23 +581,32 @@ class TaskExecutor:
         return user_output
 
     @staticmethod
-    def _put_result(write_fd: int, result: Items, print_args: PrintArgs):
+    def _put_result(
+        writer: PipeWriter,
+        result: Items,
+        print_args: PrintArgs,
+        start_time: int = 0,
+        user_code_time: int = 0,
+    ):
+        # non-list result is sent as is, to be rejected on validation
+        if isinstance(result, list):
+            for item in result:
+                writer.write_item(item)
+            result = []
+
+        timings: TaskTimings = {
+            "start_time": start_time,
+            "user_code": user_code_time,
+            "serialize": writer.serialize_time,
+        }
+
         message: PipeResultMessage = {
             "result": result,
             "print_args": TaskExecutor._truncate_print_args(print_args),
+            "timings": timings,
         }
 
-        data = json.dumps(message, default=str, ensure_ascii=False).encode("utf-8")
-        length_bytes = len(data).to_bytes(PIPE_MSG_PREFIX_LENGTH, "big")
-
-        try:
-            TaskExecutor._write_bytes(write_fd, length_bytes)
-            TaskExecutor._write_bytes(write_fd, data)
-        finally:
-            try:
-                os.close(write_fd)
-            except Exception:
-                pass
+        writer.write_message(message)
 
     @staticmethod
     def _put_error(
@@ -333,41 +632,37 @@ class TaskExecutor:
             "print_args": TaskExecutor._truncate_print_args(print_args),
         }
 
-        data = json.dumps(message, default=str, ensure_ascii=False).encode("utf-8")
-        length_bytes = len(data).to_bytes(PIPE_MSG_PREFIX_LENGTH, "big")
+        # any result items already streamed are discarded by the reader
+        PipeWriter(write_fd).write_message(message)
 
-        try:
-            TaskExecutor._write_bytes(write_fd, length_bytes)
-            TaskExecutor._write_bytes(write_fd, data)
-        finally:
-            try:
-                os.close(write_fd)
-            except Exception:
-                pass
+    @staticmethod
+    def _put_profile(
+        profiler: "TaskProfiler | None", print_args: PrintArgs, print_fd: int | None
+    ):
+        """Stop profiling, if not yet stopped, and output the summary as print output."""
+
+        if profiler is None or (summary := profiler.stop()) is None:
+            return
+
+        if print_fd is not None:
+            PrintStreamWriter(print_fd).write([summary])
+        else:
+            print_args.append([summary])
 
     # ========== print() ==========
 
     @staticmethod
-    def _create_custom_print(print_args: PrintArgs):
-        def custom_print(*args):
-            serializable_args = []
+    def _create_custom_print(print_args: PrintArgs, print_fd: int | None = None):
+        """Create `print()` for user code, streaming output to `print_fd` if passed, else collecting it."""
 
-            for arg in args:
-                try:
-                    json.dumps(arg, default=str, ensure_ascii=False)
-                    serializable_args.append(arg)
-                except Exception as _:
-                    # Ensure args are serializable so they are transmissible
-                    # through the multiprocessing queue and via websockets.
-                    serializable_args.append(
-                        {
-                            EXECUTOR_CIRCULAR_REFERENCE_KEY: repr(arg),
-                            "__type__": type(arg).__name__,
-                        }
-                    )
+        write_print = (
+            PrintStreamWriter(print_fd).write
+            if print_fd is not None
+            else print_args.append
+        )
 
-            formatted = TaskExecutor._format_print_args(*serializable_args)
-            print_args.append(formatted)
+        def custom_print(*args):
+            write_print(TaskExecutor._format_print_args(*args))
             print("[user code]", *args)
 
         return custom_print
@@ -378,7 +673,8 @@ class TaskExecutor:
         Takes the args passed to a `print()` call in user code and converts them
         to string representations suitable for display in a browser console.
 
-        Expects all args to be serializable.
+        Each arg is serialized once, and args that cannot be serialized, e.g. with
+        circular references, are shown by type.
         """
 
         formatted = []
@@ -390,11 +686,11 @@ class TaskExecutor:
             elif arg is None or isinstance(arg, (int, float, bool)):
                 formatted.append(str(arg))
 
-            elif isinstance(arg, dict) and EXECUTOR_CIRCULAR_REFERENCE_KEY in arg:
-                formatted.append(f"[Circular {arg.get('__type__', 'Object')}]")
-
             else:
-                formatted.append(json.dumps(arg, default=str, ensure_ascii=False))
+                try:
+                    formatted.append(json.dumps(arg, default=str, ensure_ascii=False))
+                except Exception:
+                    formatted.append(f"[Circular {type(arg).__name__}]")
 
         return formatted
 
@@ -414,8 +710,92 @@ class TaskExecutor:
 
         return truncated
 
+    # ========== subinterpreters ==========
+
+    @staticmethod
+    def _init_subinterpreter(security_config: SecurityConfig):
+        """Sandbox a subinterpreter once, before it runs its first task."""
+
+        if security_config.runner_env_deny:
+            # `os.environ.clear()` would unset the variables of the whole runner process,
+            # so the subinterpreter's own `os` module gets empty mappings instead
+            os.environ = {}  # type: ignore[assignment]  # noqa: B003
+            os.environb = {}  # type: ignore[assignment]
+
+        TaskExecutor._sanitize_sys_modules(security_config)
+
+    @staticmethod
+    def _run_subinterpreter_task(
+        task_data: bytes,
+        marshalled_code: bytes | None,
+        write_fd: int,
+        cancel_fds: tuple[int, int],
+        task_timeout: int,
+        filtered_builtins: dict,
+    ):
+        """Run a task in a subinterpreter, interrupting user code on timeout or on the runner writing to the cancel pipe.
+
+        Interrupting raises `KeyboardInterrupt` in user code, which `except Exception` does not catch.
+        It is raised again at intervals, as a bare `except:` does catch it, and user code still
+        running after `SUBINTERPRETER_STOP_TIMEOUT` is abandoned by the pool.
+        """
+
+        task: PipeTaskMessage = JsonCodec.loads(task_data)
+        compiled_code = marshal.loads(marshalled_code) if marshalled_code else None
+        cancel_read_fd, cancel_write_fd = cancel_fds
+
+        run = (
+            TaskExecutor._run_all_items
+            if task["node_mode"] == "all_items"
+            else TaskExecutor._run_per_item
+        )
+
+        is_done = threading.Event()
+        watchdog = threading.Thread(
+            target=TaskExecutor._watch_subinterpreter_task,
+            args=(threading.get_ident(), cancel_read_fd, task_timeout, is_done),
+        )
+        watchdog.start()
+
+        try:
+            try:
+                run(
+                    task["code"],
+                    task["items"],
+                    write_fd,
+                    filtered_builtins,
+                    compiled_code,
+                )
+            finally:
+                is_done.set()
+        except KeyboardInterrupt:
+            is_done.set()  # interrupted right as user code returned
+
+        os.write(cancel_write_fd, b"\0")  # wake up watchdog
+        watchdog.join()
+
+    @staticmethod
+    def _watch_subinterpreter_task(
+        thread_id: int, cancel_fd: int, task_timeout: int, is_done: threading.Event
+    ):
+        select.select([cancel_fd], [], [], task_timeout)
+
+        # cancelled, timed out, or woken up as user code returned
+        while not is_done.is_set():
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                ctypes.c_ulong(thread_id), ctypes.py_object(KeyboardInterrupt)
+            )
+            is_done.wait(SUBINTERPRETER_INTERRUPT_INTERVAL)
+
     # ========== security ==========
 
+    @staticmethod
+    def _init_sandbox(security_config: SecurityConfig):
+        if security_config.runner_env_deny:
+            os.environ.clear()
+
+        TaskExecutor._sanitize_sys_modules(security_config)
+
     @staticmethod
     def _filter_builtins(security_config: SecurityConfig):
         """Get __builtins__ with denied ones removed."""
@@ -492,10 +872,8 @@ class TaskExecutor:
     # ========== pipe I/O ==========
 
     @staticmethod
-    def _write_bytes(fd: int, data: bytes):
-        total_written = 0
-        while total_written < len(data):
-            written = os.write(fd, data[total_written:])
-            if written == 0:
-                raise OSError("Write failed")
-            total_written += written
+    def _close_fd(fd: int):
+        try:
+            os.close(fd)
+        except Exception:
+            pass
@@ -0,0 +1,118 @@
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from dataclasses import dataclass
+
+from src.constants import (
+    PROFILE_MODE_CPU,
+    PROFILE_MODE_MEMORY,
+    PROFILE_TOP_N,
+    PROFILE_TRACEMALLOC_FRAMES,
+)
+
+
+@dataclass
+class TaskProfiler:
+    """Profiles user code in a task subprocess with `cProfile` and/or `tracemalloc`.
+
+    Created in the runner and passed to the subprocess, which profiles only the user code
+    and not loading items or sending results. The summary of the top functions by time and
+    top lines by allocated memory is either returned for the runner to forward as print output,
+    or written with the raw profile to `output_path` for offline analysis.
+    """
+
+    modes: frozenset[str]
+    top_n: int = PROFILE_TOP_N
+    output_path: str | None = None  # path prefix of files to write, without extension
+
+    def __post_init__(self):
+        self._cpu_profiler: cProfile.Profile | None = None
+
+    def start(self) -> None:
+        if PROFILE_MODE_MEMORY in self.modes:
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+
+        if PROFILE_MODE_CPU in self.modes:
+            self._cpu_profiler = cProfile.Profile()
+            self._cpu_profiler.enable()
+
+    def stop(self) -> str | None:
+        """Stop profiling, returning the summary unless written to `output_path`, or None if not profiling."""
+
+        sections = []
+
+        cpu_profiler = self._cpu_profiler
+        self._cpu_profiler = None
+        if cpu_profiler is not None:
+            cpu_profiler.disable()
+
+        snapshot = None
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        if cpu_profiler is not None:
+            sections.append(self._summarize_cpu(cpu_profiler))
+
+        if snapshot is not None:
+            sections.append(self._summarize_memory(snapshot, peak))
+
+        if not sections:
+            return None
+
+        summary = "\n\n".join(sections)
+
+        if self.output_path is None:
+            return summary
+
+        try:
+            os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+            with open(f"{self.output_path}.txt", "w") as f:
+                f.write(summary)
+            if cpu_profiler is not None:
+                cpu_profiler.dump_stats(f"{self.output_path}.prof")
+        except OSError as e:
+            # profiling must not fail the task
+            return f"{summary}\n\n[Profile] Failed to write to {self.output_path}: {e}"
+
+        return None
+
+    def _summarize_cpu(self, cpu_profiler: cProfile.Profile) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(cpu_profiler, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+
+        # skip header lines of pstats output, up to the column names
+        lines = [line for line in output.getvalue().splitlines() if line.strip()]
+        body = next(
+            (lines[i:] for i, line in enumerate(lines) if "ncalls" in line), lines
+        )
+
+        return "\n".join(
+            [f"[Profile] Top {self.top_n} functions by cumulative time:", *body]
+        )
+
+    def _summarize_memory(self, snapshot: tracemalloc.Snapshot, peak: int) -> str:
+        lines = [
+            f"[Profile] Top {self.top_n} lines by allocated memory (peak {peak / 1024:.1f} KiB):"
+        ]
+
+        # skip allocations by the profilers themselves
+        snapshot = snapshot.filter_traces(
+            [
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+            ]
+        )
+
+        for stat in snapshot.statistics("lineno")[: self.top_n]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{frame.filename}:{frame.lineno}: {stat.size / 1024:.1f} KiB in {stat.count} blocks"
+            )
+
+        return "\n".join(lines)
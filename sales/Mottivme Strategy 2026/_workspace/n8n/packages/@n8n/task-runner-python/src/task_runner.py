@@ -1,6 +1,10 @@
 import asyncio
+import functools
+import heapq
 import logging
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Awaitable
 from dataclasses import dataclass
 from urllib.parse import urlparse
@@ -8,30 +12,58 @@ import websockets
 from websockets.exceptions import InvalidStatus
 from websockets.asyncio.client import ClientConnection
 import random
+import sqlite3
 from src.errors import TaskCancelledError
 
 
 from src.config.task_runner_config import TaskRunnerConfig
 from src.errors import (
     NoIdleTimeoutHandlerError,
+    SubinterpreterUnsupportedError,
     TaskMissingError,
     WebsocketConnectionError,
 )
-from src.message_types.broker import TaskSettings
+from src.message_types.broker import Items, TaskSettings
+from src.message_types.pipe import PrintArgs
 from src.nanoid import nanoid
 
 from src.constants import (
+    ADAPTIVE_CONCURRENCY_INTERVAL,
+    PROC_STAT_PATH,
+    RUNNER_EXTRA_THREADS,
     RUNNER_NAME,
+    RUNNER_THREAD_NAME_PREFIX,
+    SUBINTERPRETERS_UNSUPPORTED_REASON,
+    SUBINTERPRETER_MAX_ABANDONED,
     TASK_REJECTED_REASON_AT_CAPACITY,
     TASK_REJECTED_REASON_OFFER_EXPIRED,
+    TASK_REJECTED_REASON_WORKFLOW_QUOTA,
     TASK_TYPE_PYTHON,
-    OFFER_INTERVAL,
     OFFER_VALIDITY,
     OFFER_VALIDITY_MAX_JITTER,
     OFFER_VALIDITY_LATENCY_BUFFER,
     TASK_BROKER_WS_PATH,
     RPC_BROWSER_CONSOLE_LOG_METHOD,
     LOG_TASK_COMPLETE,
+    LOG_TASK_DEFERRED,
+    LOG_TASK_PRINT_FAILED,
+    LOG_TASK_PROFILED,
+    LOG_TASK_SHARDED,
+    LOG_ADAPTIVE_CONCURRENCY_UNAVAILABLE,
+    LOG_CONCURRENCY_LIMIT_CHANGED,
+    LOG_FORKSERVER_PRELOADED,
+    LOG_JSON_CODEC,
+    LOG_SUBINTERPRETER_FALLBACK,
+    LOG_SUBINTERPRETERS_MAX_ABANDONED,
+    LOG_SUBINTERPRETERS_UNAVAILABLE,
+    LOG_VALIDATION_CACHE_UNAVAILABLE,
+    METRICS_PHASE_EXECUTE,
+    METRICS_PHASE_SEND,
+    METRICS_PHASE_VALIDATE,
+    TRACE_SPAN_TASK,
+    METRICS_REJECTION_AT_CAPACITY,
+    METRICS_REJECTION_OFFER_EXPIRED,
+    METRICS_REJECTION_WORKFLOW_QUOTA,
     LOG_TASK_CANCEL,
     LOG_TASK_CANCEL_UNKNOWN,
     LOG_TASK_CANCEL_WAITING,
@@ -53,10 +85,24 @@ from src.message_types import (
     RunnerTaskError,
     RunnerRpcCall,
 )
+from src.json_codec import JsonCodec
+from src.metrics import metrics
 from src.message_serde import MessageSerde
 from src.task_state import TaskState, TaskStatus
 from src.task_executor import TaskExecutor
+from src.process_supervisor import ProcessSupervisor
+from src.print_stream import PrintForwarder, PrintStream
+from src.resource_usage import TaskResourceUsage
+from src.task_profiler import TaskProfiler
+from src.worker_pool import WorkerPool
+from src.subinterpreter_pool import SubinterpreterPool
 from src.task_analyzer import TaskAnalyzer
+from src.code_cache import CodeCache
+from src.concurrency_controller import ConcurrencyController, HostSampler
+from src.validation_cache import PersistentValidationCache
+from src.workflow_scheduler import WorkflowScheduler
+from src.tracing import tracer
+from src.websocket_compression import create_compression_factory
 from src.config.security_config import SecurityConfig
 
 
@@ -83,22 +129,102 @@ class TaskRunner:
         self.can_send_offers = False
 
         self.open_offers: dict[str, TaskOffer] = {}
+        # heap of (valid_until, offer_id), to wake up when the earliest offer expires
+        self.offer_expiries: list[tuple[float, str]] = []
+        self.offers_event = asyncio.Event()
         self.running_tasks: dict[str, TaskState] = {}
 
         self.offers_coroutine: asyncio.Task | None = None
         self.serde = MessageSerde()
         self.executor = TaskExecutor()
+        self.supervisor = ProcessSupervisor()
         self.security_config = SecurityConfig(
             stdlib_allow=config.stdlib_allow,
             external_allow=config.external_allow,
             builtins_deny=config.builtins_deny,
             runner_env_deny=config.env_deny,
         )
-        self.analyzer = TaskAnalyzer(self.security_config)
         self.logger = logging.getLogger(__name__)
+        self.validation_cache: PersistentValidationCache | None = None
+        if config.is_persistent_validation_cache_enabled:
+            try:
+                self.validation_cache = PersistentValidationCache(
+                    config.validation_cache_path, config.validation_cache_size
+                )
+            except (sqlite3.Error, OSError) as e:
+                self.logger.warning(
+                    LOG_VALIDATION_CACHE_UNAVAILABLE.format(
+                        path=config.validation_cache_path, error=e
+                    )
+                )
+        self.analyzer = TaskAnalyzer(self.security_config, self.validation_cache)
+        self.code_cache = CodeCache()
+        self.worker_pool: WorkerPool | None = None
+        if config.is_worker_pool_enabled:
+            self.worker_pool = WorkerPool(
+                size=config.worker_pool_size,
+                max_tasks_per_worker=config.worker_max_tasks,
+                security_config=self.security_config,
+            )
+
+        self.subinterpreter_pool: SubinterpreterPool | None = None
+        if config.is_subinterpreter_backend_enabled:
+            if SubinterpreterPool.is_supported():
+                self.subinterpreter_pool = SubinterpreterPool(
+                    size=config.max_concurrency,
+                    max_tasks_per_interpreter=config.worker_max_tasks,
+                    security_config=self.security_config,
+                )
+            else:
+                self.logger.warning(
+                    LOG_SUBINTERPRETERS_UNAVAILABLE.format(
+                        reason=SUBINTERPRETERS_UNSUPPORTED_REASON
+                    )
+                )
+
+        self.concurrency_controller: ConcurrencyController | None = None
+        self.concurrency_coroutine: asyncio.Task | None = None
+        if config.is_adaptive_concurrency_enabled:
+            if HostSampler.is_supported():
+                controller = ConcurrencyController(
+                    config.min_concurrency, config.max_concurrency
+                )
+                metrics.host_cpu_utilization.set_function(
+                    lambda: controller.last_sample.cpu_utilization
+                )
+                metrics.host_memory_available.set_function(
+                    lambda: controller.last_sample.available_memory
+                )
+                metrics.task_memory_rss.set_function(
+                    lambda: sum(controller.last_sample.task_memory)
+                )
+                self.concurrency_controller = controller
+            else:
+                self.logger.warning(
+                    LOG_ADAPTIVE_CONCURRENCY_UNAVAILABLE.format(
+                        path=PROC_STAT_PATH, max_concurrency=config.max_concurrency
+                    )
+                )
+
+        self.workflow_scheduler: WorkflowScheduler | None = None
+        self.deferred_tasks: dict[str, TaskSettings] = {}
+        if config.is_workflow_scheduling_enabled:
+            scheduler = WorkflowScheduler(
+                config.workflow_max_concurrency, config.workflow_weights
+            )
+            # each workflow id becomes a time series, so labelling by it is opt-in
+            if config.metrics_workflow_labels:
+                metrics.workflow_running_tasks.set_function(lambda: scheduler.running)
+            self.workflow_scheduler = scheduler
+
+        metrics.running_tasks.set_function(lambda: self.running_tasks_count)
+        metrics.deferred_tasks.set_function(lambda: len(self.deferred_tasks))
+        metrics.open_offers.set_function(lambda: len(self.open_offers))
+        metrics.concurrency_limit.set_function(lambda: self.concurrency_limit)
 
         self.idle_coroutine: asyncio.Task | None = None
         self.on_idle_timeout: Callable[[], Awaitable[None]] | None = None
+        self.on_subinterpreters_abandoned: Callable[[], Awaitable[None]] | None = None
         self.last_activity_time = time.time()
         self.is_shutting_down = False
 
@@ -112,11 +238,85 @@ class TaskRunner:
     def running_tasks_count(self) -> int:
         return len(self.running_tasks)
 
+    @property
+    def used_slots(self) -> int:
+        return sum(task_state.slots for task_state in self.running_tasks.values())
+
+    @property
+    def running_slots(self) -> int:
+        return sum(
+            task_state.slots
+            for task_state in self.running_tasks.values()
+            if task_state.status in (TaskStatus.RUNNING, TaskStatus.ABORTING)
+        )
+
+    @property
+    def task_capacity(self) -> int:
+        """Tasks to accept at once, including those to defer while scheduling across workflows."""
+
+        return self.concurrency_limit + self.config.max_deferred_tasks
+
+    @property
+    def concurrency_limit(self) -> int:
+        limit = (
+            self.concurrency_controller.limit
+            if self.concurrency_controller
+            else self.config.max_concurrency
+        )
+
+        # user code left running in abandoned subinterpreters still takes its slot
+        if self.subinterpreter_pool:
+            limit -= len(self.subinterpreter_pool.abandoned_interpreters)
+
+        return max(0, limit)
+
     async def start(self) -> None:
         if self.config.is_auto_shutdown_enabled and not self.on_idle_timeout:
             raise NoIdleTimeoutHandlerError(self.config.auto_shutdown_timeout)
 
+        if self.concurrency_controller:
+            self.concurrency_coroutine = asyncio.create_task(
+                self._adapt_concurrency_loop()
+            )
+
+        self.logger.debug(LOG_JSON_CODEC.format(codec=JsonCodec.name))
+
+        # blocking calls run in threads via `asyncio.to_thread`, where a task on a worker or
+        # subinterpreter holds a thread until done, so each slot gets its own thread
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=self.config.max_concurrency + RUNNER_EXTRA_THREADS,
+                thread_name_prefix=RUNNER_THREAD_NAME_PREFIX,
+            )
+        )
+
+        if self.config.forkserver_preload:
+            await self._preload_modules()
+
+        if self.worker_pool:
+            await asyncio.to_thread(self.worker_pool.start)
+
+        if self.subinterpreter_pool:
+            try:
+                await asyncio.to_thread(self.subinterpreter_pool.start)
+            except SubinterpreterUnsupportedError as e:
+                self.logger.warning(
+                    LOG_SUBINTERPRETERS_UNAVAILABLE.format(reason=e.reason)
+                )
+                self.subinterpreter_pool = None
+
         headers = {"Authorization": f"Bearer {self.config.grant_token}"}
+        extensions = (
+            [
+                create_compression_factory(
+                    window_bits=self.config.websocket_compression_window_bits,
+                    memory_level=self.config.websocket_compression_memory_level,
+                    min_size=self.config.websocket_compression_min_size,
+                )
+            ]
+            if self.config.websocket_compression
+            else None
+        )
 
         while not self.is_shutting_down:
             try:
@@ -124,6 +324,8 @@ class TaskRunner:
                     self.websocket_url,
                     additional_headers=headers,
                     max_size=self.config.max_payload_size,
+                    extensions=extensions,
+                    compression=None,
                 )
                 self.logger.info("Connected to broker")
                 await self._listen_for_messages()
@@ -145,6 +347,20 @@ class TaskRunner:
                 await self._cancel_coroutine(self.idle_coroutine)
                 await asyncio.sleep(5)
 
+    async def _preload_modules(self) -> None:
+        start_time = time.time()
+
+        preloaded_modules = await asyncio.to_thread(
+            self.executor.preload_modules, self.config.forkserver_preload
+        )
+
+        self.logger.info(
+            LOG_FORKSERVER_PRELOADED.format(
+                count=len(preloaded_modules),
+                duration=self._get_duration(start_time),
+            )
+        )
+
     async def _cancel_coroutine(self, coroutine: asyncio.Task | None) -> None:
         if coroutine and not coroutine.done():
             coroutine.cancel()
@@ -161,10 +377,20 @@ class TaskRunner:
 
         await self._cancel_coroutine(self.offers_coroutine)
         await self._cancel_coroutine(self.idle_coroutine)
+        await self._cancel_coroutine(self.concurrency_coroutine)
 
         await self._wait_for_tasks()
         await self._terminate_tasks()
 
+        if self.worker_pool:
+            await asyncio.to_thread(self.worker_pool.stop)
+
+        if self.subinterpreter_pool:
+            await asyncio.to_thread(self.subinterpreter_pool.stop)
+
+        if self.validation_cache:
+            self.validation_cache.close()
+
         if self.websocket_connection:
             await self.websocket_connection.close()
             self.logger.info("Disconnected from broker")
@@ -196,11 +422,16 @@ class TaskRunner:
         self.logger.warning(f"Terminating {self.running_tasks_count} tasks...")
 
         tasks_to_terminate = [
-            asyncio.to_thread(self.executor.stop_process, task_state.process)
+            asyncio.to_thread(self.executor.stop_process, process)
             for task_state in self.running_tasks.values()
-            if task_state.process
+            for process in task_state.processes
         ]
 
+        if self.subinterpreter_pool:
+            for task_state in self.running_tasks.values():
+                if task_state.interpreter:
+                    self.subinterpreter_pool.cancel(task_state.interpreter)
+
         if tasks_to_terminate:
             await asyncio.gather(*tasks_to_terminate, return_exceptions=True)
 
@@ -259,14 +490,18 @@ class TaskRunner:
                 reason=TASK_REJECTED_REASON_OFFER_EXPIRED,
             )
             await self._send_message(response)
+            metrics.task_rejections.inc(METRICS_REJECTION_OFFER_EXPIRED)
+            self._notify_offers()
             return
 
-        if self.running_tasks_count >= self.config.max_concurrency:
+        if self.used_slots >= self.task_capacity:
             response = RunnerTaskRejected(
                 task_id=message.task_id,
                 reason=TASK_REJECTED_REASON_AT_CAPACITY,
             )
             await self._send_message(response)
+            metrics.task_rejections.inc(METRICS_REJECTION_AT_CAPACITY)
+            self._notify_offers()
             return
 
         del self.open_offers[message.offer_id]
@@ -295,12 +530,22 @@ class TaskRunner:
         task_state.node_name = message.settings.node_name
         task_state.node_id = message.settings.node_id
 
+        if self.workflow_scheduler:
+            await self._schedule_task(task_state, message.settings)
+        else:
+            self._start_task(task_state, message.settings)
+
+    def _start_task(self, task_state: TaskState, task_settings: TaskSettings) -> None:
         task_state.status = TaskStatus.RUNNING
-        asyncio.create_task(self._execute_task(message.task_id, message.settings))
-        self.logger.info(f"Received task {message.task_id}")
+        if self.workflow_scheduler:
+            self.workflow_scheduler.start(task_settings.workflow_id)
+        asyncio.create_task(self._execute_task(task_state.task_id, task_settings))
+        self.logger.info(f"Received task {task_state.task_id}")
 
     async def _execute_task(self, task_id: str, task_settings: TaskSettings) -> None:
         start_time = time.time()
+        resource_usage = TaskResourceUsage()
+        task_span = None
 
         try:
             task_state = self.running_tasks.get(task_id)
@@ -308,40 +553,208 @@ class TaskRunner:
             if task_state is None:
                 raise TaskMissingError(task_id)
 
-            self.analyzer.validate(task_settings.code)
-
-            process, read_conn, write_conn = self.executor.create_process(
-                code=task_settings.code,
+            task_span = tracer.start_span(
+                TRACE_SPAN_TASK,
+                task_id=task_id,
                 node_mode=task_settings.node_mode,
-                items=task_settings.items,
-                security_config=self.security_config,
+                **task_state.context(),
             )
 
-            task_state.process = process
-
-            result, print_args, result_size_bytes = await asyncio.to_thread(
-                self.executor.execute_process,
-                process=process,
-                read_conn=read_conn,
-                write_conn=write_conn,
-                task_timeout=self.config.task_timeout,
-                pipe_reader_timeout=self.config.pipe_reader_timeout,
-                continue_on_fail=task_settings.continue_on_fail,
+            phase_start = time.perf_counter()
+            code_hash = TaskAnalyzer.hash_code(task_settings.code)
+            with tracer.span(METRICS_PHASE_VALIDATE):
+                if self.validation_cache:
+                    # keep SQLite reads and writes of the persistent cache off the loop
+                    await asyncio.to_thread(
+                        self.analyzer.validate, task_settings.code, code_hash
+                    )
+                else:
+                    self.analyzer.validate(task_settings.code, code_hash)
+            metrics.task_phase_duration.observe(
+                time.perf_counter() - phase_start, METRICS_PHASE_VALIDATE
             )
 
-            for print_args_per_call in print_args:
-                await self._send_rpc_message(
-                    task_id, RPC_BROWSER_CONSOLE_LOG_METHOD, print_args_per_call
+            execution = None
+            if self.subinterpreter_pool:
+                execution = await self._execute_in_subinterpreter(
+                    task_state, task_settings, code_hash
                 )
 
-            response = RunnerTaskDone(task_id=task_id, data={"result": result})
-            await self._send_message(response)
+            if execution is not None:
+                result, print_args, result_size_bytes = execution
+            elif self.worker_pool:
+                worker = await asyncio.to_thread(self.worker_pool.acquire)
+
+                task_state.process = worker.process
+
+                phase_start = time.perf_counter()
+
+                with tracer.span(METRICS_PHASE_EXECUTE):
+                    result, print_args, result_size_bytes = await asyncio.to_thread(
+                        self.worker_pool.execute_task,
+                        worker=worker,
+                        code=task_settings.code,
+                        code_hash=code_hash,
+                        node_mode=task_settings.node_mode,
+                        items=task_settings.items,
+                        task_timeout=self.config.task_timeout,
+                        continue_on_fail=task_settings.continue_on_fail,
+                        max_payload_size=self.config.max_payload_size,
+                    )
+
+                metrics.task_phase_duration.observe(
+                    time.perf_counter() - phase_start, METRICS_PHASE_EXECUTE
+                )
+            elif (shard_count := self._get_shard_count(task_settings)) > 1:
+                # reserve the slots before awaiting, for tasks starting meanwhile to see them taken
+                task_state.reserved_slots = shard_count
+                marshalled_code = await self._get_marshalled_code(
+                    code_hash, task_settings
+                )
+                item_shards = self.executor.split_items(
+                    task_settings.items, shard_count
+                )
+                shards = []
+                handed_over = False
+                try:
+                    for index, (item_offset, shard_items) in enumerate(item_shards):
+                        # encoding items into shared memory scales with their size
+                        shards.append(
+                            await asyncio.to_thread(
+                                self.executor.create_process,
+                                code=task_settings.code,
+                                node_mode=task_settings.node_mode,
+                                items=shard_items,
+                                security_config=self.security_config,
+                                marshalled_code=marshalled_code,
+                                item_offset=item_offset,
+                                memory_limit=self.config.task_memory_limit,
+                                cpu_limit=self.config.task_cpu_limit,
+                                profiler=self._get_profiler(
+                                    task_state, f"{task_id}-{index}"
+                                ),
+                            )
+                        )
+                    handed_over = True
+                finally:
+                    if not handed_over:
+                        task_state.reserved_slots = 0
+                        for _, read_conn, write_conn, shared_items in shards:
+                            TaskExecutor.close_process_resources(
+                                read_conn, write_conn, shared_items
+                            )
+
+                # print output is returned with shard results, as streaming it would interleave
+                task_state.shard_processes = [process for process, *_ in shards]
+
+                self.logger.debug(
+                    LOG_TASK_SHARDED.format(
+                        task_id=task_id,
+                        shard_count=shard_count,
+                        shard_sizes=", ".join(
+                            str(len(shard_items)) for _, shard_items in item_shards
+                        ),
+                    )
+                )
+
+                (
+                    result,
+                    print_args,
+                    result_size_bytes,
+                ) = await self.supervisor.execute_shards(
+                    shards=shards,
+                    task_timeout=self.config.task_timeout,
+                    pipe_reader_timeout=self.config.pipe_reader_timeout,
+                    continue_on_fail=task_settings.continue_on_fail,
+                    max_payload_size=self.config.max_payload_size,
+                    resource_usage=resource_usage,
+                    memory_limit=self.config.task_memory_limit,
+                    cpu_limit=self.config.task_cpu_limit,
+                )
+            else:
+                # stream print output to the browser while the task runs
+                print_forwarder = PrintForwarder(
+                    send=functools.partial(self._send_print_args, task_id),
+                    rate_limit=self.config.print_rate_limit,
+                    max_bytes=self.config.print_max_bytes,
+                )
+                print_stream = PrintStream(on_print=print_forwarder.add)
+
+                marshalled_code = await self._get_marshalled_code(
+                    code_hash, task_settings
+                )
+                process, read_conn, write_conn, shared_items = await asyncio.to_thread(
+                    self.executor.create_process,
+                    code=task_settings.code,
+                    node_mode=task_settings.node_mode,
+                    items=task_settings.items,
+                    security_config=self.security_config,
+                    marshalled_code=marshalled_code,
+                    print_conn=print_stream.write_conn,
+                    memory_limit=self.config.task_memory_limit,
+                    cpu_limit=self.config.task_cpu_limit,
+                    profiler=self._get_profiler(task_state, task_id),
+                )
+
+                task_state.process = process
+
+                try:
+                    (
+                        result,
+                        print_args,
+                        result_size_bytes,
+                    ) = await self.supervisor.execute_process(
+                        process=process,
+                        read_conn=read_conn,
+                        write_conn=write_conn,
+                        task_timeout=self.config.task_timeout,
+                        pipe_reader_timeout=self.config.pipe_reader_timeout,
+                        continue_on_fail=task_settings.continue_on_fail,
+                        shared_items=shared_items,
+                        max_payload_size=self.config.max_payload_size,
+                        print_stream=print_stream,
+                        resource_usage=resource_usage,
+                        memory_limit=self.config.task_memory_limit,
+                        cpu_limit=self.config.task_cpu_limit,
+                    )
+                finally:
+                    print_stream.close()
+                    try:
+                        print_args_dropped_notice = await print_forwarder.finish()
+                    except Exception as e:
+                        # failing to send the last output must not replace the task's outcome
+                        self.logger.warning(
+                            LOG_TASK_PRINT_FAILED.format(task_id=task_id, error=e)
+                        )
+                        print_args_dropped_notice = []
+
+                print_args = print_args + print_args_dropped_notice
+
+            metrics.task_result_size.observe(result_size_bytes)
+
+            phase_start = time.perf_counter()
+
+            # pipeline print output with task done, so that neither waits on the other
+            messages: list[RunnerMessage] = [
+                self._create_rpc_call(
+                    task_id, RPC_BROWSER_CONSOLE_LOG_METHOD, print_args_per_call
+                )
+                for print_args_per_call in print_args
+            ]
+            messages.append(RunnerTaskDone(task_id=task_id, data={"result": result}))
+            with tracer.span(METRICS_PHASE_SEND):
+                await self._send_messages(messages)
+
+            metrics.task_phase_duration.observe(
+                time.perf_counter() - phase_start, METRICS_PHASE_SEND
+            )
 
             self.logger.info(
                 LOG_TASK_COMPLETE.format(
                     task_id=task_id,
                     duration=self._get_duration(start_time),
                     result_size=self._get_result_size(result_size_bytes),
+                    resource_usage=self._get_resource_usage(resource_usage),
                     **task_state.context(),
                 )
             )
@@ -366,9 +779,146 @@ class TaskRunner:
             await self._send_message(response)
 
         finally:
+            tracer.end_span(task_span)
             self.running_tasks.pop(task_id, None)
+            if self.workflow_scheduler:
+                self.workflow_scheduler.finish(task_settings.workflow_id)
+                self._start_deferred_tasks()
+            self._notify_offers()
             self._reset_idle_timer()
 
+    async def _get_marshalled_code(
+        self, code_hash: str, task_settings: TaskSettings
+    ) -> bytes | None:
+        """Get the compiled task code from cache, compiling it in a thread on a miss."""
+
+        marshalled_code = self.code_cache.get_cached(code_hash, task_settings.node_mode)
+        if marshalled_code is not None:
+            return marshalled_code
+
+        return await asyncio.to_thread(
+            self.code_cache.get, code_hash, task_settings.code, task_settings.node_mode
+        )
+
+    def _check_abandoned_interpreters(self) -> None:
+        """Shut down for the runner to be restarted once too many subinterpreters are abandoned."""
+
+        pool = self.subinterpreter_pool
+        assert pool is not None
+
+        abandoned_count = len(pool.abandoned_interpreters)
+        max_abandoned = min(SUBINTERPRETER_MAX_ABANDONED, self.config.max_concurrency)
+
+        if (
+            abandoned_count < max_abandoned
+            or self.is_shutting_down
+            or not self.on_subinterpreters_abandoned
+        ):
+            return
+
+        self.logger.warning(
+            LOG_SUBINTERPRETERS_MAX_ABANDONED.format(count=abandoned_count)
+        )
+        asyncio.create_task(self.on_subinterpreters_abandoned())
+
+    def _get_shard_count(self, task_settings: TaskSettings) -> int:
+        """Get how many subprocesses to split a per-item task across, bounded by free concurrency slots."""
+
+        if (
+            not self.config.is_per_item_sharding_enabled
+            or task_settings.node_mode != "per_item"
+        ):
+            return 1
+
+        # task already takes one slot
+        free_slots = self.concurrency_limit - self.used_slots
+
+        return max(
+            1,
+            min(
+                self.config.per_item_max_shards,
+                free_slots + 1,
+                len(task_settings.items) // self.config.per_item_min_shard_size,
+            ),
+        )
+
+    async def _execute_in_subinterpreter(
+        self, task_state: TaskState, task_settings: TaskSettings, code_hash: str
+    ) -> tuple[Items, PrintArgs, int] | None:
+        """Execute a task in a subinterpreter, or return None for it to run in a subprocess instead."""
+
+        pool = self.subinterpreter_pool
+        assert pool is not None
+
+        if not pool.supports(task_settings.code, code_hash):
+            return None
+
+        marshalled_code = await self._get_marshalled_code(code_hash, task_settings)
+
+        try:
+            interpreter = await asyncio.to_thread(pool.acquire)
+            task_state.interpreter = interpreter
+
+            phase_start = time.perf_counter()
+
+            with tracer.span(METRICS_PHASE_EXECUTE):
+                execution = await asyncio.to_thread(
+                    pool.execute_task,
+                    interpreter=interpreter,
+                    code=task_settings.code,
+                    code_hash=code_hash,
+                    node_mode=task_settings.node_mode,
+                    items=task_settings.items,
+                    task_timeout=self.config.task_timeout,
+                    pipe_reader_timeout=self.config.pipe_reader_timeout,
+                    continue_on_fail=task_settings.continue_on_fail,
+                    marshalled_code=marshalled_code,
+                    max_payload_size=self.config.max_payload_size,
+                )
+        except SubinterpreterUnsupportedError as e:
+            self.logger.info(
+                LOG_SUBINTERPRETER_FALLBACK.format(
+                    task_id=task_state.task_id, reason=e.reason
+                )
+            )
+            return None
+        finally:
+            task_state.interpreter = None
+            self._check_abandoned_interpreters()
+
+        metrics.task_phase_duration.observe(
+            time.perf_counter() - phase_start, METRICS_PHASE_EXECUTE
+        )
+
+        return execution
+
+    def _get_profiler(
+        self, task_state: TaskState, file_name: str
+    ) -> TaskProfiler | None:
+        """Get a profiler for a task subprocess, if profiling is enabled for the task's workflow."""
+
+        workflows = self.config.profile_workflows
+        if not self.config.is_profiling_enabled or (
+            workflows
+            and "*" not in workflows
+            and task_state.workflow_id not in workflows
+        ):
+            return None
+
+        self.logger.debug(
+            LOG_TASK_PROFILED.format(
+                task_id=task_state.task_id,
+                modes=", ".join(sorted(self.config.profile_modes)),
+            )
+        )
+
+        return TaskProfiler(
+            modes=frozenset(self.config.profile_modes),
+            output_path=os.path.join(self.config.profile_dir, file_name)
+            if self.config.profile_dir
+            else None,
+        )
+
     async def _handle_task_cancel(self, message: BrokerTaskCancel) -> None:
         task_id = message.task_id
         task_state = self.running_tasks.get(task_id)
@@ -380,29 +930,67 @@ class TaskRunner:
         if task_state.status == TaskStatus.WAITING_FOR_SETTINGS:
             self.running_tasks.pop(task_id, None)
             self.logger.info(LOG_TASK_CANCEL_WAITING.format(task_id=task_id))
-            await self._send_offers()
+            self._notify_offers()
+            return
+
+        if task_state.status == TaskStatus.DEFERRED:
+            self.running_tasks.pop(task_id, None)
+            task_settings = self.deferred_tasks.pop(task_id)
+            assert self.workflow_scheduler is not None
+            self.workflow_scheduler.remove(task_id, task_settings.workflow_id)
+            self.logger.info(
+                LOG_TASK_CANCEL.format(task_id=task_id, **task_state.context())
+            )
+            self._notify_offers()
             return
 
         if task_state.status == TaskStatus.RUNNING:
             task_state.status = TaskStatus.ABORTING
-            await asyncio.to_thread(self.executor.stop_process, task_state.process)
+            if task_state.interpreter and self.subinterpreter_pool:
+                self.subinterpreter_pool.cancel(task_state.interpreter)
+            await asyncio.gather(
+                *(
+                    asyncio.to_thread(self.executor.stop_process, process)
+                    for process in task_state.processes
+                )
+            )
             self.logger.info(
                 LOG_TASK_CANCEL.format(task_id=task_id, **task_state.context())
             )
 
-    async def _send_rpc_message(self, task_id: str, method_name: str, params: list):
-        message = RunnerRpcCall(
-            call_id=nanoid(), task_id=task_id, name=method_name, params=params
+    async def _send_print_args(self, task_id: str, print_args: PrintArgs) -> None:
+        await self._send_messages(
+            [
+                self._create_rpc_call(
+                    task_id, RPC_BROWSER_CONSOLE_LOG_METHOD, print_args_per_call
+                )
+                for print_args_per_call in print_args
+            ]
         )
 
-        await self._send_message(message)
+    def _create_rpc_call(
+        self, task_id: str, method_name: str, params: list
+    ) -> RunnerRpcCall:
+        return RunnerRpcCall(
+            call_id=nanoid(), task_id=task_id, name=method_name, params=params
+        )
 
     async def _send_message(self, message: RunnerMessage) -> None:
         if self.websocket_connection is None:
             raise WebsocketConnectionError(self.task_broker_uri)
 
         serialized = self.serde.serialize_runner_message(message)
-        await self.websocket_connection.send(serialized)
+        await self.websocket_connection.send(serialized, text=True)
+
+    async def _send_messages(self, messages: list[RunnerMessage]) -> None:
+        """Send a burst of messages in order."""
+
+        if self.websocket_connection is None:
+            raise WebsocketConnectionError(self.task_broker_uri)
+
+        for message in messages:
+            serialized = self.serde.serialize_runner_message(message)
+            await self.websocket_connection.send(serialized, text=True)
 
     # ========== Formatting ==========
 
@@ -425,34 +1013,61 @@ class TaskRunner:
         else:
             return f"{size_bytes / (1024 * 1024):.1f} MB"
 
+    def _get_resource_usage(self, resource_usage: TaskResourceUsage) -> str:
+        if not resource_usage.is_sampled:
+            return ""  # e.g. task ran in a worker
+
+        cpu_time = resource_usage.cpu_time
+        cpu = f"{int(cpu_time * 1000)}ms" if cpu_time < 1 else f"{cpu_time:.1f}s"
+
+        return f", peak RSS {self._get_result_size(resource_usage.peak_rss)}, CPU {cpu}"
+
     # ========== Offers ==========
 
     async def _send_offers_loop(self) -> None:
+        """Send offers on registration, then whenever capacity frees up or an offer expires."""
+
         while self.can_send_offers:
             try:
                 await self._send_offers()
-                await asyncio.sleep(OFFER_INTERVAL)
+                await self._wait_for_offers_event()
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self.logger.error(f"Error sending offers: {e}")
 
+    def _notify_offers(self) -> None:
+        self.offers_event.set()
+
+    async def _wait_for_offers_event(self) -> None:
+        # skip entries of offers already accepted
+        while self.offer_expiries and self.offer_expiries[0][1] not in self.open_offers:
+            heapq.heappop(self.offer_expiries)
+
+        timeout = None
+        if self.offer_expiries:
+            timeout = max(0.0, self.offer_expiries[0][0] - time.time())
+
+        try:
+            await asyncio.wait_for(self.offers_event.wait(), timeout=timeout)
+        except TimeoutError:
+            pass  # earliest offer expired
+
+        self.offers_event.clear()
+
     async def _send_offers(self) -> None:
         if not self.can_send_offers:
             return
 
-        expired_offer_ids = [
-            offer_id
-            for offer_id, offer in self.open_offers.items()
-            if offer.has_expired
-        ]
-
-        for offer_id in expired_offer_ids:
+        now = time.time()
+        # an offer due now must be replaced, or waiting for it would time out at once again
+        while self.offer_expiries and self.offer_expiries[0][0] <= now:
+            _, offer_id = heapq.heappop(self.offer_expiries)
             self.open_offers.pop(offer_id, None)
 
-        offers_to_send = self.config.max_concurrency - (
-            len(self.open_offers) + self.running_tasks_count
-        )
+        offers_to_send = self.task_capacity - (len(self.open_offers) + self.used_slots)
+
+        messages: list[RunnerMessage] = []
 
         for _ in range(offers_to_send):
             offer_id = nanoid()
@@ -464,12 +1079,131 @@ class TaskRunner:
             )
 
             self.open_offers[offer_id] = TaskOffer(offer_id, valid_until)
+            heapq.heappush(self.offer_expiries, (valid_until, offer_id))
+
+            messages.append(
+                RunnerTaskOffer(
+                    offer_id=offer_id,
+                    task_type=TASK_TYPE_PYTHON,
+                    valid_for=valid_for_ms,
+                )
+            )
+
+        if messages:
+            await self._send_messages(messages)
+
+    # ========== Workflow scheduling ==========
+
+    async def _schedule_task(
+        self, task_state: TaskState, task_settings: TaskSettings
+    ) -> None:
+        """Defer a task, to run once a slot is free and it is the turn of its workflow, or reject it if too many tasks are deferred."""
+
+        assert self.workflow_scheduler is not None
+
+        scheduler = self.workflow_scheduler
+        task_id = task_state.task_id
+        workflow_id = task_settings.workflow_id
+
+        task_state.status = TaskStatus.DEFERRED
+        self.deferred_tasks[task_id] = task_settings
+        scheduler.defer(task_id, workflow_id)
+
+        self._start_deferred_tasks()
+
+        if task_id not in self.deferred_tasks:
+            return
+
+        if scheduler.deferred_count <= self.config.max_deferred_tasks:
+            self.logger.debug(
+                LOG_TASK_DEFERRED.format(
+                    task_id=task_id,
+                    workflow_id=workflow_id,
+                    running=scheduler.running.get(workflow_id, 0),
+                    deferred=scheduler.deferred_count,
+                )
+            )
+            return
+
+        scheduler.remove(task_id, workflow_id)
+        del self.deferred_tasks[task_id]
+        self.running_tasks.pop(task_id, None)
 
-            message = RunnerTaskOffer(
-                offer_id=offer_id, task_type=TASK_TYPE_PYTHON, valid_for=valid_for_ms
+        if scheduler.is_over_quota(workflow_id):
+            reason = TASK_REJECTED_REASON_WORKFLOW_QUOTA.format(
+                quota=self.config.workflow_max_concurrency
             )
+            metrics.task_rejections.inc(METRICS_REJECTION_WORKFLOW_QUOTA)
+        else:
+            reason = TASK_REJECTED_REASON_AT_CAPACITY
+            metrics.task_rejections.inc(METRICS_REJECTION_AT_CAPACITY)
+
+        # task is already accepted, so it can only be failed
+        await self._send_message(
+            RunnerTaskError(task_id=task_id, error={"message": reason})
+        )
+        self._notify_offers()
+
+    def _start_deferred_tasks(self) -> None:
+        """Start deferred tasks while slots are free, picking fairly across workflows."""
+
+        assert self.workflow_scheduler is not None
+
+        while self.running_slots < self.concurrency_limit and (
+            next_task := self.workflow_scheduler.next_task()
+        ):
+            task_id, _ = next_task
+            task_settings = self.deferred_tasks.pop(task_id)
+            task_state = self.running_tasks.get(task_id)
+            if task_state is not None:
+                self._start_task(task_state, task_settings)
+
+    # ========== Adaptive concurrency ==========
+
+    async def _adapt_concurrency_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(ADAPTIVE_CONCURRENCY_INTERVAL)
+                self._adapt_concurrency()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"Error adapting concurrency: {e}")
+
+    def _adapt_concurrency(self) -> None:
+        assert self.concurrency_controller is not None
+
+        controller = self.concurrency_controller
+        old_limit = controller.limit
+        pids = [
+            process.pid
+            for task_state in self.running_tasks.values()
+            for process in task_state.processes
+            if process.pid is not None
+        ]
+
+        reason = controller.update(pids)
+
+        if reason is None:
+            return
+
+        sample = controller.last_sample
+
+        metrics.concurrency_adjustments.inc(reason)
+        self.logger.info(
+            LOG_CONCURRENCY_LIMIT_CHANGED.format(
+                old_limit=old_limit,
+                new_limit=controller.limit,
+                reason=reason,
+                cpu=sample.cpu_utilization,
+                available_memory=sample.available_memory // (1024 * 1024),
+                task_memory=sum(sample.task_memory) // (1024 * 1024),
+                task_count=len(sample.task_memory),
+            )
+        )
 
-            await self._send_message(message)
+        if controller.limit > old_limit:
+            self._notify_offers()
 
     # ========== Inactivity ==========
 
@@ -1,10 +1,13 @@
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from multiprocessing.context import ForkServerProcess
 
+from src.subinterpreter_pool import Interpreter
+
 
 class TaskStatus(Enum):
     WAITING_FOR_SETTINGS = "waiting_for_settings"
+    DEFERRED = "deferred"
     RUNNING = "running"
     ABORTING = "aborting"
 
@@ -14,6 +17,9 @@ class TaskState:
     task_id: str
     status: TaskStatus
     process: ForkServerProcess | None = None
+    shard_processes: list[ForkServerProcess] = field(default_factory=list)
+    reserved_slots: int = 0  # taken by a sharded task before its subprocesses exist
+    interpreter: Interpreter | None = None
     workflow_name: str | None = None
     workflow_id: str | None = None
     node_name: str | None = None
@@ -23,11 +29,24 @@ class TaskState:
         self.task_id = task_id
         self.status = TaskStatus.WAITING_FOR_SETTINGS
         self.process = None
+        self.shard_processes = []
+        self.reserved_slots = 0
+        self.interpreter = None
         self.workflow_name = None
         self.workflow_id = None
         self.node_name = None
         self.node_id = None
 
+    @property
+    def processes(self) -> list[ForkServerProcess]:
+        return [self.process] if self.process else self.shard_processes
+
+    @property
+    def slots(self) -> int:
+        """Concurrency slots taken, one per subprocess of a sharded task."""
+
+        return max(1, self.reserved_slots, len(self.shard_processes))
+
     def context(self):
         return {
             "node_name": self.node_name,
@@ -0,0 +1,139 @@
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Protocol
+
+from src.constants import TRACE_SPAN_SERIALIZE, TRACE_SPAN_USER_CODE
+from src.message_types.pipe import TaskTimings
+
+SpanAttributes = dict[str, str | int | float | bool]
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: int  # 128 bits, as in OpenTelemetry
+    span_id: int  # 64 bits
+    parent_id: int | None
+    start_time: int  # ns since epoch
+    end_time: int | None = None  # ns since epoch
+    attributes: SpanAttributes = field(default_factory=dict)
+    error: str | None = None
+    token: Token | None = field(default=None, repr=False)
+
+
+class SpanExporter(Protocol):
+    def export(self, span: Span) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+_NO_SPAN = nullcontext()
+
+
+class TaskTracer:
+    """Records spans of the phases of a task, handing each to the exporter as it ends.
+
+    The current span is tracked in a context variable, so that spans started in a coroutine,
+    in tasks it creates or in threads it runs via `asyncio.to_thread` nest under it. Spans
+    inherit the attributes of their parent, e.g. the task and workflow ids of the task span.
+    Without an exporter, tracing is disabled and no spans are created.
+    """
+
+    def __init__(self):
+        self.exporter: SpanExporter | None = None
+
+    @property
+    def is_enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, **attributes: Any) -> Span | None:
+        """Start a span as the current span, to be ended with `end_span` in the same context."""
+
+        if self.exporter is None:
+            return None
+
+        span = self._create_span(name, time.time_ns(), attributes)
+        span.token = _current_span.set(span)
+
+        return span
+
+    def end_span(self, span: Span | None, error: BaseException | None = None) -> None:
+        if span is None or self.exporter is None:
+            return
+
+        span.end_time = time.time_ns()
+        if error is not None:
+            span.error = str(error) or type(error).__name__
+        if span.token is not None:
+            _current_span.reset(span.token)
+            span.token = None
+
+        self.exporter.export(span)
+
+    def span(self, name: str, **attributes: Any):
+        """Context manager of a span around a block, recording any error it raises."""
+
+        if self.exporter is None:
+            return _NO_SPAN
+
+        return self._span(name, attributes)
+
+    def record_timings(self, parent: Span | None, timings: TaskTimings | None) -> None:
+        """Record spans of a task subprocess from the timings it sent with its result.
+
+        User code and serialization of result items interleave in per-item mode, so their
+        spans show the total time of each, one after the other.
+        """
+
+        if parent is None or timings is None or self.exporter is None:
+            return
+
+        user_code_end = timings["start_time"] + timings["user_code"]
+        for name, start_time, end_time in (
+            (TRACE_SPAN_USER_CODE, timings["start_time"], user_code_end),
+            (TRACE_SPAN_SERIALIZE, user_code_end, user_code_end + timings["serialize"]),
+        ):
+            span = self._create_span(name, start_time, {}, parent)
+            span.end_time = end_time
+            self.exporter.export(span)
+
+    @contextmanager
+    def _span(self, name: str, attributes: dict[str, Any]) -> Iterator[Span | None]:
+        span = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, e)
+            raise
+        else:
+            self.end_span(span)
+
+    def _create_span(
+        self,
+        name: str,
+        start_time: int,
+        attributes: dict[str, Any],
+        parent: Span | None = None,
+    ) -> Span:
+        parent = parent or _current_span.get()
+        span_attributes: SpanAttributes = dict(parent.attributes) if parent else {}
+        span_attributes.update(
+            (key, value) for key, value in attributes.items() if value is not None
+        )
+
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else random.getrandbits(128),
+            span_id=random.getrandbits(64),
+            parent_id=parent.span_id if parent else None,
+            start_time=start_time,
+            attributes=span_attributes,
+        )
+
+
+tracer = TaskTracer()
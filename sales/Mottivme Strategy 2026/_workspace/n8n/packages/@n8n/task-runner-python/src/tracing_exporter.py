@@ -0,0 +1,91 @@
+import logging
+
+from src.config.tracing_config import TracingConfig
+from src.constants import (
+    LOG_TRACING_MISSING,
+    LOG_TRACING_SETUP_FAILED,
+    TRACING_SERVICE_NAME,
+)
+from src.tracing import Span, tracer
+
+
+class OpenTelemetryExporter:
+    """Exports spans over OTLP/HTTP to an OpenTelemetry collector, batched in a background thread.
+
+    The collector is configured with the standard `OTEL_EXPORTER_OTLP_*` env vars,
+    e.g. `OTEL_EXPORTER_OTLP_ENDPOINT=http://collector:4318`.
+    """
+
+    def __init__(self, config: TracingConfig):
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.util.instrumentation import InstrumentationScope
+
+        self.resource = Resource.create(
+            {
+                "service.name": TRACING_SERVICE_NAME,
+                "service.version": config.n8n_version,
+            }
+        )
+        self.scope = InstrumentationScope(__name__)
+        self.processor = BatchSpanProcessor(OTLPSpanExporter())
+        self.logger = logging.getLogger(__name__)
+
+    def export(self, span: Span) -> None:
+        from opentelemetry.sdk.trace import ReadableSpan
+        from opentelemetry.trace import SpanContext, TraceFlags
+        from opentelemetry.trace.status import Status, StatusCode
+
+        trace_flags = TraceFlags(TraceFlags.SAMPLED)
+        parent = (
+            SpanContext(span.trace_id, span.parent_id, False, trace_flags)
+            if span.parent_id is not None
+            else None
+        )
+        status = (
+            Status(StatusCode.ERROR, span.error)
+            if span.error
+            else Status(StatusCode.UNSET)
+        )
+
+        self.processor.on_end(
+            ReadableSpan(
+                name=span.name,
+                context=SpanContext(span.trace_id, span.span_id, False, trace_flags),
+                parent=parent,
+                resource=self.resource,
+                attributes=span.attributes,
+                status=status,
+                start_time=span.start_time,
+                end_time=span.end_time,
+                instrumentation_scope=self.scope,
+            )
+        )
+
+    def shutdown(self) -> None:
+        self.processor.shutdown()
+        self.logger.info("Tracing stopped")
+
+
+def setup_tracing(tracing_config: TracingConfig) -> OpenTelemetryExporter | None:
+    if not tracing_config.enabled:
+        return None
+
+    try:
+        exporter = OpenTelemetryExporter(tracing_config)
+    except ImportError:
+        logger = logging.getLogger(__name__)
+        logger.warning(LOG_TRACING_MISSING)
+        return None
+    except Exception as e:
+        logger = logging.getLogger(__name__)
+        logger.warning(LOG_TRACING_SETUP_FAILED.format(error=e))
+        return None
+
+    tracer.exporter = exporter
+    exporter.logger.info("Tracing ready")
+
+    return exporter
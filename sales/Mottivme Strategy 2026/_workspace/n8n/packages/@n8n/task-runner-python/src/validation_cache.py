@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from src.metrics import metrics
+from src.constants import (
+    BLOCKED_ATTRIBUTES,
+    BLOCKED_NAMES,
+    ERROR_DANGEROUS_ATTRIBUTE,
+    ERROR_DANGEROUS_NAME,
+    ERROR_DYNAMIC_IMPORT,
+    ERROR_NAME_MANGLED_ATTRIBUTE,
+    ERROR_RELATIVE_IMPORT,
+    LOG_VALIDATION_CACHE_ERROR,
+    VALIDATION_CACHE_DB_TIMEOUT,
+    VALIDATION_CACHE_TOUCH_BATCH_SIZE,
+)
+
+CacheKey = tuple[str, tuple]  # (code_hash, allowlists_tuple)
+CachedViolations = list[str]
+
+# entries validated under other rules are never read, and eventually evicted
+RULES_FINGERPRINT = hashlib.sha256(
+    repr(
+        (
+            sorted(BLOCKED_NAMES),
+            sorted(BLOCKED_ATTRIBUTES),
+            ERROR_DANGEROUS_ATTRIBUTE,
+            ERROR_DANGEROUS_NAME,
+            ERROR_DYNAMIC_IMPORT,
+            ERROR_NAME_MANGLED_ATTRIBUTE,
+            ERROR_RELATIVE_IMPORT,
+        )
+    ).encode()
+).hexdigest()[:16]
+
+
+class PersistentValidationCache:
+    """On-disk LRU cache of validation results, shareable by runners on the same host.
+
+    Backed by SQLite in WAL mode, so that several runner processes can read and write
+    concurrently and results outlive runner restarts. Errors are logged and treated as
+    cache misses, as the cache is an optimization only.
+
+    Lookups are read-only. Their recency is written in batches along with later inserts,
+    and least recently used entries are evicted once every tenth of `max_size` inserts,
+    so the cache may briefly hold up to 10% more entries than `max_size`.
+
+    Anyone able to write the file can mark code as valid, so the file is created readable
+    and writable by its owner only, and a file owned by another user or writable by group
+    or others is refused. Keep it in a directory that only the runner user can write to.
+
+    Safe to use from several threads.
+    """
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.pending_touches: dict[tuple[str, str], float] = {}
+        self.inserts_since_eviction = 0
+        self.eviction_interval = max(1, max_size // 10)
+
+        self._ensure_private_file(path)
+
+        self.connection = sqlite3.connect(
+            path,
+            timeout=VALIDATION_CACHE_DB_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS validations ("
+            "code_hash TEXT NOT NULL, "
+            "allowlists TEXT NOT NULL, "
+            "violations TEXT NOT NULL, "
+            "last_used REAL NOT NULL, "
+            "PRIMARY KEY (code_hash, allowlists))"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS validations_last_used "
+            "ON validations (last_used)"
+        )
+
+    def get(self, cache_key: CacheKey) -> CachedViolations | None:
+        row_key = self._to_row_key(cache_key)
+
+        with self.lock:
+            try:
+                row = self.connection.execute(
+                    "SELECT violations FROM validations "
+                    "WHERE code_hash = ? AND allowlists = ?",
+                    row_key,
+                ).fetchone()
+            except sqlite3.Error as e:
+                self.logger.warning(LOG_VALIDATION_CACHE_ERROR.format(error=e))
+                row = None
+
+            if row is None:
+                self.misses += 1
+                metrics.persistent_validation_cache_misses.inc()
+                return None
+
+            self.hits += 1
+            metrics.persistent_validation_cache_hits.inc()
+            self.pending_touches[row_key] = time.time()
+
+            if len(self.pending_touches) >= VALIDATION_CACHE_TOUCH_BATCH_SIZE:
+                self._write()
+
+        return json.loads(row[0])
+
+    def set(self, cache_key: CacheKey, violations: CachedViolations) -> None:
+        code_hash, allowlists = self._to_row_key(cache_key)
+        row = (code_hash, allowlists, json.dumps(violations), time.time())
+
+        with self.lock:
+            self._write(row)
+
+    def close(self) -> None:
+        with self.lock:
+            if self.pending_touches:
+                self._write()
+            self.connection.close()
+
+    def _write(self, row: tuple[str, str, str, float] | None = None) -> None:
+        """Insert `row`, if any, in one transaction with pending recency updates and due evictions."""
+
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany(
+                    "UPDATE validations SET last_used = MAX(last_used, ?) "
+                    "WHERE code_hash = ? AND allowlists = ?",
+                    [
+                        (last_used, code_hash, allowlists)
+                        for (code_hash, allowlists), last_used in (
+                            self.pending_touches.items()
+                        )
+                    ],
+                )
+                if row is not None:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO validations VALUES (?, ?, ?, ?)", row
+                    )
+                    self.inserts_since_eviction += 1
+                if self.inserts_since_eviction >= self.eviction_interval:
+                    # evict least recently used entries beyond max size
+                    self.connection.execute(
+                        "DELETE FROM validations WHERE rowid IN ("
+                        "SELECT rowid FROM validations ORDER BY last_used DESC "
+                        "LIMIT -1 OFFSET ?)",
+                        (self.max_size,),
+                    )
+                    self.inserts_since_eviction = 0
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self.logger.warning(LOG_VALIDATION_CACHE_ERROR.format(error=e))
+        finally:
+            self.pending_touches.clear()  # recency is best effort
+
+    def _ensure_private_file(self, path: str) -> None:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            stat = os.fstat(fd)
+        finally:
+            os.close(fd)
+
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+            raise PermissionError(
+                f"{path} must be owned by the runner user and not writable by others"
+            )
+
+    def _to_row_key(self, cache_key: CacheKey) -> tuple[str, str]:
+        code_hash, allowlists = cache_key
+        return code_hash, json.dumps([RULES_FINGERPRINT, allowlists])
@@ -0,0 +1,80 @@
+from typing import Any, Sequence
+
+from websockets.extensions.permessage_deflate import (
+    ClientPerMessageDeflateFactory,
+    PerMessageDeflate,
+)
+from websockets.frames import CONT, CTRL_OPCODES, Frame
+
+from src.metrics import metrics
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """Per-message deflate extension that sends messages below `min_size` uncompressed.
+
+    Offers and acknowledgements are too small to gain from compression, while task
+    results are often large, repetitive JSON. Sizes before and after compression are
+    recorded in metrics.
+    """
+
+    def __init__(self, *args: Any, min_size: int, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        self.encode_cont_data = False
+
+    def encode(self, frame: Frame) -> Frame:
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+
+        # Size of a fragmented message is unknown on its first frame, so compress it
+        if frame.opcode is not CONT:
+            self.encode_cont_data = not frame.fin or len(frame.data) >= self.min_size
+
+        if not self.encode_cont_data:
+            return frame
+
+        encoded_frame = super().encode(frame)
+
+        metrics.websocket_compression_input.inc(amount=len(frame.data))
+        metrics.websocket_compression_output.inc(amount=len(encoded_frame.data))
+
+        return encoded_frame
+
+
+class ThresholdPerMessageDeflateFactory(ClientPerMessageDeflateFactory):
+    """Client factory negotiating per-message deflate with a minimum message size."""
+
+    def __init__(self, *args: Any, min_size: int, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+
+    def process_response_params(
+        self,
+        params: Sequence[tuple[str, str | None]],
+        accepted_extensions: Sequence[Any],
+    ) -> ThresholdPerMessageDeflate:
+        extension = super().process_response_params(params, accepted_extensions)
+
+        return ThresholdPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            min_size=self.min_size,
+        )
+
+
+def create_compression_factory(
+    window_bits: int, memory_level: int, min_size: int
+) -> ThresholdPerMessageDeflateFactory:
+    """Create the per-message deflate extension to offer to the broker.
+
+    The broker may decline it, in which case messages are sent uncompressed.
+    """
+
+    return ThresholdPerMessageDeflateFactory(
+        client_max_window_bits=window_bits,
+        compress_settings={"memLevel": memory_level},
+        min_size=min_size,
+    )
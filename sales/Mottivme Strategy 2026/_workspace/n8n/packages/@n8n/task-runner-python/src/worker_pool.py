@@ -0,0 +1,265 @@
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+from multiprocessing.context import ForkServerProcess
+from multiprocessing.connection import Connection
+
+from src.errors import (
+    TaskResultMissingError,
+    TaskResultReadError,
+    TaskResultTooLargeError,
+    TaskRuntimeError,
+    TaskSubprocessFailedError,
+    TaskTimeoutError,
+)
+from src.config.security_config import SecurityConfig
+from src.message_types.broker import NodeMode, Items
+from src.message_types.pipe import PipeTaskMessage, PrintArgs
+from src.pipe_reader import PipeReader
+from src.pipe_writer import PipeWriter
+from src.task_executor import TaskExecutor, MULTIPROCESSING_CONTEXT
+from src.constants import (
+    LOG_WORKER_POOL_STARTED,
+    LOG_WORKER_SPAWN_FAILED,
+    WORKER_RETIRE_TIMEOUT,
+)
+
+type PipeConnection = Connection
+
+
+@dataclass
+class Worker:
+    process: ForkServerProcess
+    task_conn: PipeConnection  # runner writes tasks, worker reads
+    result_conn: PipeConnection  # worker writes results, runner reads
+    tasks_executed: int = 0
+
+
+class WorkerPool:
+    """Keeps long-lived, already sandboxed worker processes warm and hands tasks to them over pipes.
+
+    A worker is recycled after `max_tasks_per_worker` tasks or after any failed task,
+    so that state leaked by user code does not outlive a few tasks. Until then, a
+    worker runs tasks of any workflow with only its builtins copied per task, so
+    imported modules, `sys.modules` and module-level state set by one task are
+    visible to the next. Tasks that must not share state need the pool disabled.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_tasks_per_worker: int,
+        security_config: SecurityConfig,
+    ):
+        self.size = size
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.security_config = security_config
+        self.idle_workers: deque[Worker] = deque()
+        self.lock = threading.Lock()
+        self.is_stopped = False
+        self.logger = logging.getLogger(__name__)
+
+    def start(self) -> None:
+        workers = [self._spawn_worker() for _ in range(self.size)]
+
+        with self.lock:
+            self.idle_workers.extend(workers)
+
+        self.logger.info(
+            LOG_WORKER_POOL_STARTED.format(
+                size=self.size, max_tasks=self.max_tasks_per_worker
+            )
+        )
+
+    def stop(self) -> None:
+        with self.lock:
+            self.is_stopped = True
+            workers = list(self.idle_workers)
+            self.idle_workers.clear()
+
+        for worker in workers:
+            self._retire_worker(worker)
+
+    def acquire(self) -> Worker:
+        """Take an idle worker, spawning a new one if all workers are busy."""
+
+        while True:
+            with self.lock:
+                if not self.idle_workers:
+                    break
+                worker = self.idle_workers.popleft()
+
+            if worker.process.is_alive():
+                return worker
+
+            self._retire_worker(worker)
+
+        return self._spawn_worker()
+
+    def release(self, worker: Worker, is_reusable: bool) -> None:
+        """Return a worker to the pool, or retire it and spawn a replacement."""
+
+        is_reusable = (
+            is_reusable
+            and worker.process.is_alive()
+            and worker.tasks_executed < self.max_tasks_per_worker
+        )
+
+        with self.lock:
+            is_kept = (
+                is_reusable
+                and not self.is_stopped
+                and len(self.idle_workers) < self.size
+            )
+            if is_kept:
+                self.idle_workers.append(worker)
+
+        if is_kept:
+            return
+
+        self._retire_worker(worker)
+
+        with self.lock:
+            needs_replacement = (
+                not self.is_stopped and len(self.idle_workers) < self.size
+            )
+
+        if needs_replacement:
+            # spawn off the task's thread, so that the task result is not held up
+            threading.Thread(target=self._replace_worker, daemon=True).start()
+
+    def execute_task(
+        self,
+        worker: Worker,
+        code: str,
+        code_hash: str,
+        node_mode: NodeMode,
+        items: Items,
+        task_timeout: int,
+        continue_on_fail: bool,
+        max_payload_size: int | None = None,
+    ) -> tuple[Items, PrintArgs, int]:
+        """Execute a Python code task in a worker, releasing the worker afterwards."""
+
+        print_args: PrintArgs = []
+        is_reusable = False
+
+        try:
+            task: PipeTaskMessage = {
+                "code": code,
+                "code_hash": code_hash,
+                "node_mode": node_mode,
+                "items": items,
+            }
+
+            # the deadline covers writing the task and the whole read, as a worker may
+            # stop reading its task or hang mid-frame: killing it closes both pipes,
+            # which ends the write with a broken pipe and the read with EOF
+            timed_out = threading.Event()
+            watchdog = threading.Timer(
+                task_timeout, self._stop_on_timeout, args=(worker, timed_out)
+            )
+            watchdog.daemon = True
+            watchdog.start()
+
+            try:
+                try:
+                    PipeWriter(worker.task_conn.fileno()).write_message(task)
+                except OSError as e:
+                    if timed_out.is_set():
+                        raise TaskTimeoutError(task_timeout)
+                    self._raise_for_worker_exit(worker)
+                    raise TaskSubprocessFailedError(-1, e)
+
+                worker.tasks_executed += 1
+
+                try:
+                    returned, result_size_bytes = PipeReader.read_message(
+                        worker.result_conn.fileno(), max_payload_size
+                    )
+                except TaskResultTooLargeError:
+                    TaskExecutor.stop_process(worker.process)
+                    raise
+                except EOFError:
+                    if timed_out.is_set():
+                        raise TaskTimeoutError(task_timeout)
+                    self._raise_for_worker_exit(worker)
+                    raise TaskResultMissingError()
+                except Exception as e:
+                    raise TaskResultReadError(e)
+            finally:
+                watchdog.cancel()
+
+            if "error" in returned:
+                raise TaskRuntimeError(returned["error"])
+
+            if "result" not in returned:
+                raise TaskResultMissingError()
+
+            is_reusable = True
+
+            return returned["result"], returned["print_args"], result_size_bytes
+
+        except Exception as e:
+            if continue_on_fail:
+                return [{"json": {"error": str(e)}}], print_args, 0
+            raise
+
+        finally:
+            self.release(worker, is_reusable)
+
+    @staticmethod
+    def _stop_on_timeout(worker: Worker, timed_out: threading.Event) -> None:
+        timed_out.set()
+        TaskExecutor.stop_process(worker.process)
+
+    def _replace_worker(self) -> None:
+        try:
+            worker = self._spawn_worker()
+        except Exception as e:
+            self.logger.error(LOG_WORKER_SPAWN_FAILED.format(error=e))
+            return
+
+        self.release(worker, is_reusable=True)
+
+    def _spawn_worker(self) -> Worker:
+        # runner writes to task pipe and reads from result pipe, worker the reverse
+        task_read_conn, task_write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+        result_read_conn, result_write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+
+        process = MULTIPROCESSING_CONTEXT.Process(
+            target=TaskExecutor._worker_loop,
+            args=(
+                task_read_conn,
+                result_write_conn,
+                self.security_config,
+            ),
+            daemon=True,
+        )
+
+        try:
+            process.start()
+        except Exception as e:
+            task_write_conn.close()
+            result_read_conn.close()
+            raise TaskSubprocessFailedError(-1, e)
+        finally:
+            task_read_conn.close()
+            result_write_conn.close()
+
+        return Worker(process, task_write_conn, result_read_conn)
+
+    def _retire_worker(self, worker: Worker) -> None:
+        # closing the task pipe makes the worker exit its loop
+        worker.task_conn.close()
+        worker.result_conn.close()
+        worker.process.join(timeout=WORKER_RETIRE_TIMEOUT)
+        TaskExecutor.stop_process(worker.process)
+
+    def _raise_for_worker_exit(self, worker: Worker) -> None:
+        worker.process.join(timeout=WORKER_RETIRE_TIMEOUT)
+
+        if worker.process.exitcode is not None:
+            TaskExecutor.raise_for_exit_code(worker.process.exitcode)
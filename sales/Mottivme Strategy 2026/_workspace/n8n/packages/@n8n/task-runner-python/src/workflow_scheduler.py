@@ -0,0 +1,83 @@
+from collections import deque
+
+from src.constants import DEFAULT_WORKFLOW_WEIGHT
+
+
+class WorkflowScheduler:
+    """Shares task slots across workflows, so that one workflow cannot starve others.
+
+    Tasks of a workflow at its quota of running tasks, or arriving while all slots are
+    busy, are deferred. When a slot frees up, the next task to run is the oldest deferred
+    task of the workflow with the fewest running tasks relative to its weight, among
+    workflows under quota.
+    """
+
+    def __init__(
+        self,
+        max_concurrency_per_workflow: int = 0,
+        weights: dict[str, int] | None = None,
+    ):
+        self.max_concurrency_per_workflow = max_concurrency_per_workflow
+        self.weights = weights or {}
+        self.running: dict[str, int] = {}  # workflow ID -> running tasks
+        self.deferred: dict[str, deque[str]] = {}  # workflow ID -> task IDs
+        self.deferred_count = 0
+
+    def is_over_quota(self, workflow_id: str) -> bool:
+        return (
+            self.max_concurrency_per_workflow > 0
+            and self.running.get(workflow_id, 0) >= self.max_concurrency_per_workflow
+        )
+
+    def defer(self, task_id: str, workflow_id: str) -> None:
+        self.deferred.setdefault(workflow_id, deque()).append(task_id)
+        self.deferred_count += 1
+
+    def remove(self, task_id: str, workflow_id: str) -> None:
+        """Remove a deferred task, e.g. on cancellation."""
+
+        queue = self.deferred.get(workflow_id)
+        if queue is None or task_id not in queue:
+            return
+
+        queue.remove(task_id)
+        self.deferred_count -= 1
+        if not queue:
+            del self.deferred[workflow_id]
+
+    def next_task(self) -> tuple[str, str] | None:
+        """Take the next deferred task to run, as (task_id, workflow_id), if any is under quota."""
+
+        eligible = [
+            workflow_id
+            for workflow_id in self.deferred
+            if not self.is_over_quota(workflow_id)
+        ]
+
+        if not eligible:
+            return None
+
+        # dicts keep insertion order, so ties go to the workflow deferred first
+        workflow_id = min(eligible, key=self._get_share)
+        queue = self.deferred[workflow_id]
+        task_id = queue.popleft()
+        self.deferred_count -= 1
+        if not queue:
+            del self.deferred[workflow_id]
+
+        return task_id, workflow_id
+
+    def start(self, workflow_id: str) -> None:
+        self.running[workflow_id] = self.running.get(workflow_id, 0) + 1
+
+    def finish(self, workflow_id: str) -> None:
+        running = self.running.get(workflow_id, 0) - 1
+
+        if running > 0:
+            self.running[workflow_id] = running
+        else:
+            self.running.pop(workflow_id, None)
+
+    def _get_share(self, workflow_id: str) -> float:
+        weight = self.weights.get(workflow_id, DEFAULT_WORKFLOW_WEIGHT)
+        return self.running.get(workflow_id, 0) / weight
@@ -23,8 +23,9 @@ class ActiveTask:
 
 
 class LocalTaskBroker:
-    def __init__(self):
+    def __init__(self, max_msg_size: int = 4 * 1024 * 1024):
         self.port: int | None = None
+        self.max_msg_size = max_msg_size  # bytes, 0 for unlimited
         self.app = web.Application()
         self.runner: web.AppRunner | None = None
         self.site: web.TCPSite | None = None
@@ -61,7 +62,7 @@ class LocalTaskBroker:
 
     async def websocket_handler(self, request: web.Request) -> web_ws.WebSocketResponse:
         print(f"WebSocket connection request from {request.remote}")
-        ws = web_ws.WebSocketResponse()
+        ws = web_ws.WebSocketResponse(max_msg_size=self.max_msg_size)
         await ws.prepare(request)
         connection_id = nanoid()
         self.connections[connection_id] = ws
@@ -68,19 +68,123 @@ async def manager_with_env_access_allowed(broker):
     await manager.stop()
 
 
+@pytest_asyncio.fixture
+async def manager_with_external_preload(broker):
+    manager = TaskRunnerManager(
+        task_broker_url=broker.get_url(),
+        custom_env={
+            "N8N_RUNNERS_EXTERNAL_ALLOW": "websockets",
+        },
+    )
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+@pytest_asyncio.fixture
+async def manager_with_small_max_payload(broker):
+    manager = TaskRunnerManager(
+        task_broker_url=broker.get_url(),
+        custom_env={
+            "N8N_RUNNERS_MAX_PAYLOAD": "1024",
+        },
+    )
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+@pytest_asyncio.fixture
+async def manager_with_worker_pool(broker):
+    manager = TaskRunnerManager(
+        task_broker_url=broker.get_url(),
+        custom_env={
+            "N8N_RUNNERS_WORKER_POOL_SIZE": "2",
+            "N8N_RUNNERS_WORKER_MAX_TASKS": "2",
+        },
+    )
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+@pytest_asyncio.fixture
+async def manager_with_per_item_shards(broker):
+    manager = TaskRunnerManager(
+        task_broker_url=broker.get_url(),
+        custom_env={
+            "N8N_RUNNERS_PER_ITEM_MAX_SHARDS": "3",
+            "N8N_RUNNERS_PER_ITEM_MIN_SHARD_SIZE": "2",
+        },
+    )
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+@pytest_asyncio.fixture
+async def manager_with_task_limits(broker):
+    manager = TaskRunnerManager(
+        task_broker_url=broker.get_url(),
+        custom_env={
+            "N8N_RUNNERS_STDLIB_ALLOW": "time",
+            "N8N_RUNNERS_TASK_MEMORY_LIMIT": str(200 * 1024 * 1024),
+            "N8N_RUNNERS_TASK_CPU_LIMIT": "1",
+        },
+    )
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+@pytest_asyncio.fixture
+async def manager_with_profiling(broker):
+    manager = TaskRunnerManager(
+        task_broker_url=broker.get_url(),
+        custom_env={
+            "N8N_RUNNERS_PROFILE": "cpu,memory",
+            "N8N_RUNNERS_PROFILE_WORKFLOWS": "profiled-workflow",
+        },
+    )
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+@pytest_asyncio.fixture
+async def manager_with_subinterpreter_backend(broker):
+    manager = TaskRunnerManager(
+        task_broker_url=broker.get_url(),
+        custom_env={
+            "N8N_RUNNERS_EXECUTION_BACKEND": "subinterpreter",
+            "N8N_RUNNERS_SUBINTERPRETER_REDUCED_ISOLATION": "true",
+            "N8N_RUNNERS_STDLIB_ALLOW": "json,tracemalloc",
+        },
+    )
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
 def create_task_settings(
     code: str,
     node_mode: str,
     items: Items | None = None,
     continue_on_fail: bool = False,
+    workflow_id: str | None = None,
 ):
-    return {
+    task_settings = {
         "code": code,
         "nodeMode": NODE_MODE_TO_BROKER_STYLE[node_mode],
         "items": items if items is not None else [],
         "continueOnFail": continue_on_fail,
     }
 
+    if workflow_id is not None:
+        task_settings["workflowId"] = workflow_id
+
+    return task_settings
+
 
 async def wait_for_task_done(broker, task_id: str, timeout: float = TASK_RESPONSE_WAIT):
     return await broker.wait_for_msg(
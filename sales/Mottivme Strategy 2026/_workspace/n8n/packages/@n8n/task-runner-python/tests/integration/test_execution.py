@@ -6,6 +6,7 @@ from src.nanoid import nanoid
 
 from tests.integration.conftest import (
     create_task_settings,
+    get_browser_console_msgs,
     wait_for_task_done,
     wait_for_task_error,
 )
@@ -435,3 +436,310 @@ async def test_env_accessible_when_allowed_per_item(
     for item in result["data"]["result"]:
         assert item["json"]["has_path"] is True
         assert item["json"]["env_count"] > 0
+
+
+@pytest.mark.asyncio
+async def test_preloaded_external_module(broker, manager_with_external_preload):
+    task_id = nanoid()
+    code = textwrap.dedent("""
+        import websockets
+        return [{"json": {"imported": websockets.__name__}}]
+    """)
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    done_msg = await wait_for_task_done(broker, task_id)
+
+    assert done_msg["data"]["result"] == [{"json": {"imported": "websockets"}}]
+    assert any(
+        "Preloaded 1 modules into forkserver" in line
+        for line in manager_with_external_preload.stdout_buffer
+    )
+
+
+@pytest.mark.asyncio
+async def test_result_exceeding_max_payload(broker, manager_with_small_max_payload):
+    task_id = nanoid()
+    code = "return [{'json': {'value': 'x' * 100}} for _ in range(100)]"
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    error_msg = await wait_for_task_error(broker, task_id)
+
+    assert "max payload size" in error_msg["error"]["message"]
+
+
+# ========== worker pool ===========
+
+
+@pytest.mark.asyncio
+async def test_per_item_with_worker_pool(broker, manager_with_worker_pool):
+    task_id = nanoid()
+    items = [
+        {"json": {"value": 10}},
+        {"json": {"value": 20}},
+    ]
+    code = "return {'doubled': _item['json']['value'] * 2}"
+    task_settings = create_task_settings(code=code, node_mode="per_item", items=items)
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    done_msg = await wait_for_task_done(broker, task_id)
+
+    assert done_msg["data"]["result"] == [
+        {"json": {"doubled": 20}, "pairedItem": {"item": 0}},
+        {"json": {"doubled": 40}, "pairedItem": {"item": 1}},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_timeout_with_worker_pool(broker, manager_with_worker_pool):
+    task_id = nanoid()
+    code = textwrap.dedent("""
+        while True:
+            pass
+    """)
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    error_msg = await wait_for_task_error(broker, task_id, timeout=TASK_TIMEOUT + 1.5)
+
+    assert "timed out" in error_msg["error"]["message"].lower()
+
+
+# ========== per-item sharding ==========
+
+
+@pytest.mark.asyncio
+async def test_per_item_with_shards(broker, manager_with_per_item_shards):
+    task_id = nanoid()
+    items = [{"json": {"value": value}} for value in range(7)]
+    code = textwrap.dedent("""
+        print(_item['json']['value'])
+        if _item['json']['value'] == 3:
+            return None
+        return {'doubled': _item['json']['value'] * 2}
+    """)
+    task_settings = create_task_settings(code=code, node_mode="per_item", items=items)
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    done_msg = await wait_for_task_done(broker, task_id)
+
+    assert done_msg["data"]["result"] == [
+        {"json": {"doubled": value * 2}, "pairedItem": {"item": value}}
+        for value in range(7)
+        if value != 3
+    ]
+    assert get_browser_console_msgs(broker, task_id) == [
+        [str(value)] for value in range(7)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_per_item_with_failing_shard(broker, manager_with_per_item_shards):
+    task_id = nanoid()
+    items = [{"json": {"value": value}} for value in range(6)]
+    code = textwrap.dedent("""
+        if _item['json']['value'] == 5:
+            raise ValueError('Intentional error')
+        return _item['json']
+    """)
+    task_settings = create_task_settings(code=code, node_mode="per_item", items=items)
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    error_msg = await wait_for_task_error(broker, task_id)
+
+    assert "Intentional error" in str(error_msg["error"]["message"])
+
+
+# ========== resource limits ===========
+
+
+@pytest.mark.asyncio
+async def test_task_within_limits(broker, manager_with_task_limits):
+    task_id = nanoid()
+    code = "return [{'json': {'size': len(bytearray(10 * 1024 * 1024))}}]"
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    done_msg = await wait_for_task_done(broker, task_id)
+
+    assert done_msg["data"]["result"] == [{"json": {"size": 10 * 1024 * 1024}}]
+
+
+@pytest.mark.asyncio
+async def test_allocation_exceeding_memory_limit(broker, manager_with_task_limits):
+    task_id = nanoid()
+    code = "return [{'json': {'size': len(bytearray(400 * 1024 * 1024))}}]"
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    error_msg = await wait_for_task_error(broker, task_id)
+
+    assert "memory limit of 200 MiB" in error_msg["error"]["message"]
+
+
+@pytest.mark.asyncio
+async def test_growth_exceeding_memory_limit(broker, manager_with_task_limits):
+    task_id = nanoid()
+    code = textwrap.dedent("""
+        import time
+        chunks = []
+        for _ in range(40):
+            chunks.append(bytearray(10 * 1024 * 1024))
+            time.sleep(0.02)
+        return []
+    """)
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    error_msg = await wait_for_task_error(broker, task_id)
+
+    assert "memory limit of 200 MiB" in error_msg["error"]["message"]
+
+
+@pytest.mark.asyncio
+async def test_memory_error_raised_within_memory_limit(
+    broker, manager_with_task_limits
+):
+    task_id = nanoid()
+    code = "raise MemoryError('not enough widgets')"
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    error_msg = await wait_for_task_error(broker, task_id)
+
+    assert "memory limit" not in error_msg["error"]["message"]
+    assert "not enough widgets" in error_msg["error"]["message"]
+
+
+@pytest.mark.asyncio
+async def test_computation_exceeding_cpu_limit(broker, manager_with_task_limits):
+    task_id = nanoid()
+    code = textwrap.dedent("""
+        while True:
+            pass
+    """)
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    error_msg = await wait_for_task_error(broker, task_id, timeout=TASK_TIMEOUT + 1.5)
+
+    assert "CPU time limit of 1 second" in error_msg["error"]["message"]
+
+
+# ========== profiling ===========
+
+
+@pytest.mark.asyncio
+async def test_profile_of_allowlisted_workflow(broker, manager_with_profiling):
+    task_id = nanoid()
+    code = textwrap.dedent("""
+        def build_rows(count):
+            return [{'json': {'value': str(i)}} for i in range(count)]
+
+        print('before')
+        return build_rows(1000)
+    """)
+    task_settings = create_task_settings(
+        code=code, node_mode="all_items", workflow_id="profiled-workflow"
+    )
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    done_msg = await wait_for_task_done(broker, task_id)
+
+    assert len(done_msg["data"]["result"]) == 1000
+    console_msgs = get_browser_console_msgs(broker, task_id)
+    assert console_msgs[0] == ["'before'"]
+    assert len(console_msgs) == 2
+    summary = console_msgs[1][0]
+    assert "[Profile] Top 15 functions by cumulative time" in summary
+    assert "build_rows" in summary
+    assert "[Profile] Top 15 lines by allocated memory" in summary
+
+
+@pytest.mark.asyncio
+async def test_no_profile_of_other_workflow(broker, manager_with_profiling):
+    task_id = nanoid()
+    code = "print('hello')\nreturn []"
+    task_settings = create_task_settings(
+        code=code, node_mode="per_item", items=[{"json": {}}], workflow_id="other"
+    )
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    await wait_for_task_done(broker, task_id)
+
+    assert get_browser_console_msgs(broker, task_id) == [["'hello'"]]
+
+
+# ========== subinterpreter backend ===========
+
+
+@pytest.mark.asyncio
+async def test_all_items_with_subinterpreter_backend(
+    broker, manager_with_subinterpreter_backend
+):
+    task_id = nanoid()
+    code = textwrap.dedent("""
+        import json
+        print('hello')
+        return [{'json': json.loads('{"value": 1}')}]
+    """)
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    done_msg = await wait_for_task_done(broker, task_id)
+
+    assert done_msg["data"]["result"] == [{"json": {"value": 1}}]
+    assert get_browser_console_msgs(broker, task_id) == [["'hello'"]]
+
+
+@pytest.mark.asyncio
+async def test_per_item_with_subinterpreter_backend(
+    broker, manager_with_subinterpreter_backend
+):
+    task_id = nanoid()
+    items = [{"json": {"value": 10}}, {"json": {"value": 20}}]
+    code = "return {'doubled': _item['json']['value'] * 2}"
+    task_settings = create_task_settings(code=code, node_mode="per_item", items=items)
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    done_msg = await wait_for_task_done(broker, task_id)
+
+    assert done_msg["data"]["result"] == [
+        {"json": {"doubled": 20}, "pairedItem": {"item": 0}},
+        {"json": {"doubled": 40}, "pairedItem": {"item": 1}},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fallback_to_subprocess_with_subinterpreter_backend(
+    broker, manager_with_subinterpreter_backend
+):
+    task_id = nanoid()
+    code = textwrap.dedent("""
+        import tracemalloc
+        return [{'json': {'tracing': tracemalloc.is_tracing()}}]
+    """)
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    done_msg = await wait_for_task_done(broker, task_id)
+
+    assert done_msg["data"]["result"] == [{"json": {"tracing": False}}]
+
+
+@pytest.mark.asyncio
+async def test_timeout_with_subinterpreter_backend(
+    broker, manager_with_subinterpreter_backend
+):
+    task_id = nanoid()
+    code = textwrap.dedent("""
+        while True:
+            pass
+    """)
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    error_msg = await wait_for_task_error(broker, task_id, timeout=TASK_TIMEOUT + 1.5)
+
+    assert "timed out" in error_msg["error"]["message"].lower()
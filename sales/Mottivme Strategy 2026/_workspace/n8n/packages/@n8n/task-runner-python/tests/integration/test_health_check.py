@@ -5,7 +5,7 @@ import aiohttp
 import pytest
 from src.nanoid import nanoid
 
-from tests.integration.conftest import create_task_settings
+from tests.integration.conftest import create_task_settings, wait_for_task_done
 
 
 @pytest.mark.asyncio
@@ -22,6 +22,21 @@ async def test_health_check_server_responds(broker, manager):
                 await asyncio.sleep(0.1)
 
 
+@pytest.mark.asyncio
+async def test_health_check_server_answers_tcp_probe_sending_nothing(broker, manager):
+    reader, writer = await asyncio.open_connection(
+        "localhost", manager.health_check_port
+    )
+    try:
+        response = await asyncio.wait_for(reader.read(), timeout=0.5)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    assert response.endswith(b"OK")
+
+
 @pytest.mark.asyncio
 async def test_health_check_server_ressponds_mid_execution(broker, manager):
     task_id = nanoid()
@@ -38,3 +53,25 @@ async def test_health_check_server_ressponds_mid_execution(broker, manager):
         response = await session.get(manager.get_health_check_url())
         assert response.status == 200
         assert await response.text() == "OK"
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_completed_task(broker, manager):
+    task_id = nanoid()
+    task_settings = create_task_settings(
+        code="return [{'a': 1}]", node_mode="all_items"
+    )
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+    await wait_for_task_done(broker, task_id)
+
+    async with aiohttp.ClientSession() as session:
+        response = await session.get(manager.get_health_check_url() + "/metrics")
+        assert response.status == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        body = await response.text()
+
+    assert (
+        'n8n_python_runner_task_phase_duration_seconds_count{phase="execute"} 1' in body
+    )
+    assert "n8n_python_runner_task_result_size_bytes_count 1" in body
+    assert "n8n_python_runner_running_tasks 0" in body
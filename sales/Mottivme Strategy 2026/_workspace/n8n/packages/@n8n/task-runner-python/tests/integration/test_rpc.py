@@ -1,3 +1,4 @@
+import asyncio
 import textwrap
 
 import pytest
@@ -114,3 +115,34 @@ async def test_print_edge_cases(broker, manager):
     expected = ["世界", "🌍", "🚀", "你好", "[]", "{}"]
     for item in expected:
         assert item in all_output, f"Expected '{item}' not found in console output"
+
+
+@pytest.mark.asyncio
+async def test_print_streamed_while_task_runs(broker, manager_with_stdlib_wildcard):
+    task_id = nanoid()
+    code = textwrap.dedent("""
+        import time
+        print("started")
+        time.sleep(1)
+        print("finished")
+        return [{"test": "complete"}]
+    """)
+    task_settings = create_task_settings(code=code, node_mode="all_items")
+
+    await broker.send_task(task_id=task_id, task_settings=task_settings)
+
+    for _ in range(8):
+        if get_browser_console_msgs(broker, task_id):
+            break
+        await asyncio.sleep(0.1)
+
+    assert get_browser_console_msgs(broker, task_id) == [["'started'"]]
+    assert broker.get_messages_of_type("runner:taskdone") == []
+
+    done_msg = await wait_for_task_done(broker, task_id, timeout=5.0)
+
+    assert done_msg["data"]["result"] == [{"test": "complete"}]
+    assert get_browser_console_msgs(broker, task_id) == [
+        ["'started'"],
+        ["'finished'"],
+    ]
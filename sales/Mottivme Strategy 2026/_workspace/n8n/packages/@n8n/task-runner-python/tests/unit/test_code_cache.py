@@ -0,0 +1,53 @@
+import marshal
+
+from src.code_cache import CodeCache
+from src.task_analyzer import TaskAnalyzer
+from src.constants import EXECUTOR_USER_OUTPUT_KEY
+
+
+class TestCodeCache:
+    def test_compiles_once_per_code_and_mode(self):
+        cache = CodeCache()
+        code = "return {'value': _item['json']['value'] * 2}"
+        code_hash = TaskAnalyzer.hash_code(code)
+
+        first = cache.get(code_hash, code, "per_item")
+        second = cache.get(code_hash, code, "per_item")
+        all_items = cache.get(code_hash, code, "all_items")
+
+        assert first is second
+        assert all_items is not None and all_items is not first
+
+        namespace = {"_item": {"json": {"value": 21}}}
+        exec(marshal.loads(first), namespace)
+        assert namespace[EXECUTOR_USER_OUTPUT_KEY] == {"value": 42}
+
+    def test_returns_none_on_syntax_error(self):
+        cache = CodeCache()
+
+        assert cache.get("hash", "return (", "all_items") is None
+
+    def test_returns_none_when_compiler_recurses_too_deep(self):
+        cache = CodeCache()
+
+        assert cache.get("hash", "return " + "-" * 100_000 + "1", "all_items") is None
+
+    def test_get_cached_does_not_compile(self):
+        cache = CodeCache()
+
+        assert cache.get_cached("hash", "all_items") is None
+
+        marshalled_code = cache.get("hash", "return 1", "all_items")
+
+        assert cache.get_cached("hash", "all_items") is marshalled_code
+        assert cache.get_cached("hash", "per_item") is None
+
+    def test_evicts_least_recently_used(self):
+        cache = CodeCache(max_size=2)
+
+        cache.get("first", "return 1", "all_items")
+        cache.get("second", "return 2", "all_items")
+        cache.get("first", "return 1", "all_items")
+        cache.get("third", "return 3", "all_items")
+
+        assert list(cache._cache) == [("first", "all_items"), ("third", "all_items")]
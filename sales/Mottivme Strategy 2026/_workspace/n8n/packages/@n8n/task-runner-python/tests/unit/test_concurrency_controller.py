@@ -0,0 +1,125 @@
+import os
+import sys
+
+import pytest
+
+from src.concurrency_controller import (
+    ConcurrencyController,
+    HostSample,
+    HostSampler,
+)
+from src.constants import (
+    ADAPTIVE_CONCURRENCY_REASON_CPU,
+    ADAPTIVE_CONCURRENCY_REASON_HEADROOM,
+    ADAPTIVE_CONCURRENCY_REASON_MEMORY,
+)
+
+MIB = 1024 * 1024
+
+
+class FakeSampler(HostSampler):
+    def __init__(self, sample: HostSample):
+        super().__init__()
+        self.next_sample = sample
+        self.sampled_pids: list[int] = []
+
+    def sample(self, pids: list[int]) -> HostSample:
+        self.sampled_pids = pids
+        return self.next_sample
+
+
+def idle_host(**overrides) -> HostSample:
+    return HostSample(
+        **{
+            "cpu_utilization": 0.1,
+            "available_memory": 8000 * MIB,
+            "total_memory": 10000 * MIB,
+            "task_memory": [],
+            **overrides,
+        }
+    )
+
+
+class TestConcurrencyController:
+    def test_starts_at_min_concurrency(self):
+        controller = ConcurrencyController(2, 8, FakeSampler(idle_host()))
+
+        assert controller.limit == 2
+
+    def test_raises_limit_by_one_on_idle_host(self):
+        sampler = FakeSampler(idle_host())
+        controller = ConcurrencyController(1, 8, sampler)
+
+        reason = controller.update([123])
+
+        assert reason == ADAPTIVE_CONCURRENCY_REASON_HEADROOM
+        assert controller.limit == 2
+        assert sampler.sampled_pids == [123]
+
+    def test_does_not_exceed_max_concurrency(self):
+        controller = ConcurrencyController(1, 3, FakeSampler(idle_host()))
+
+        for _ in range(10):
+            controller.update([])
+
+        assert controller.limit == 3
+        assert controller.update([]) is None
+
+    def test_lowers_limit_by_one_on_saturated_cpu(self):
+        sampler = FakeSampler(idle_host())
+        controller = ConcurrencyController(1, 8, sampler)
+        controller.limit = 6
+
+        sampler.next_sample = idle_host(cpu_utilization=0.95)
+        reason = controller.update([])
+
+        assert reason == ADAPTIVE_CONCURRENCY_REASON_CPU
+        assert controller.limit == 5
+
+    def test_halves_limit_on_memory_pressure(self):
+        sampler = FakeSampler(idle_host(available_memory=500 * MIB))
+        controller = ConcurrencyController(1, 8, sampler)
+        controller.limit = 6
+
+        reason = controller.update([])
+
+        assert reason == ADAPTIVE_CONCURRENCY_REASON_MEMORY
+        assert controller.limit == 3
+
+    def test_does_not_go_below_min_concurrency(self):
+        sampler = FakeSampler(idle_host(available_memory=0))
+        controller = ConcurrencyController(2, 8, sampler)
+
+        assert controller.update([]) is None
+        assert controller.limit == 2
+
+    def test_holds_limit_when_memory_does_not_fit_another_task(self):
+        # 1500 MiB available, 1000 MiB reserved, 500 MiB headroom
+        sampler = FakeSampler(
+            idle_host(available_memory=1500 * MIB, task_memory=[600 * MIB])
+        )
+        controller = ConcurrencyController(1, 8, sampler)
+
+        assert controller.update([]) is None
+        assert controller.limit == 1
+
+    def test_holds_limit_between_cpu_thresholds(self):
+        sampler = FakeSampler(idle_host(cpu_utilization=0.8))
+        controller = ConcurrencyController(1, 8, sampler)
+
+        assert controller.update([]) is None
+        assert controller.last_sample.cpu_utilization == 0.8
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Samples from /proc")
+class TestHostSampler:
+    def test_samples_host_and_own_memory(self):
+        sampler = HostSampler()
+
+        sampler.sample([])
+        sample = sampler.sample([os.getpid(), 2**22 + 1])
+
+        assert 0 <= sample.cpu_utilization <= 1
+        assert 0 < sample.available_memory <= sample.total_memory
+        assert len(sample.task_memory) == 1  # exited pid is skipped
+        assert sample.task_memory[0] > 0
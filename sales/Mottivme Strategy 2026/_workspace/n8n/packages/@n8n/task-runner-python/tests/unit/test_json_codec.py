@@ -0,0 +1,83 @@
+import json
+import math
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+
+from src.constants import JSON_CODEC_ORJSON
+from src.json_codec import JsonCodec
+from src.message_serde import MessageSerde
+from src.message_types.runner import RunnerTaskDone, RunnerTaskOffer
+
+
+class Color(Enum):
+    RED = 1
+
+
+class TestJsonCodec:
+    def test_dumps_matches_stdlib_semantics(self):
+        value = {
+            "name": "Zoë",
+            "created": datetime(2025, 1, 2, 3, 4, 5),
+            "amount": Decimal("1.5"),
+            "tags": {"a"},
+            "pair": ("x", 1),
+            1: None,
+        }
+
+        expected = json.dumps(value, default=str, ensure_ascii=False)
+
+        assert JsonCodec.loads(JsonCodec.dumps(value)) == json.loads(expected)
+        assert "Zoë".encode("utf-8") in JsonCodec.dumps(value)
+
+    def test_dumps_non_finite_floats(self):
+        value = [math.nan, math.inf, -math.inf]
+
+        if JsonCodec.name == JSON_CODEC_ORJSON:
+            assert JsonCodec.dumps(value) == b"[null,null,null]"
+        else:
+            assert JsonCodec.dumps(value) == b"[NaN, Infinity, -Infinity]"
+
+    def test_dumps_enum_members(self):
+        value = {"color": Color.RED}
+
+        if JsonCodec.name == JSON_CODEC_ORJSON:
+            assert JsonCodec.loads(JsonCodec.dumps(value)) == {"color": 1}
+        else:
+            assert JsonCodec.loads(JsonCodec.dumps(value)) == {"color": "Color.RED"}
+
+    def test_dumps_falls_back_for_integers_over_64_bits(self):
+        value = {"big": 2**70}
+
+        assert JsonCodec.loads(JsonCodec.dumps(value)) == value
+
+    def test_loads_accepts_bytes_like_and_str(self):
+        data = b'{"items": [1, 2, 3]}'
+
+        for payload in (data, bytearray(data), data.decode()):
+            assert JsonCodec.loads(payload) == {"items": [1, 2, 3]}
+
+    def test_loads_falls_back_for_nan_literals(self):
+        assert JsonCodec.loads(b"[Infinity]") == [float("inf")]
+
+
+class TestMessageSerde:
+    def test_serializes_runner_message_with_camel_case_keys(self):
+        message = RunnerTaskOffer(offer_id="abc", task_type="python", valid_for=5000)
+
+        serialized = MessageSerde.serialize_runner_message(message)
+
+        assert json.loads(serialized) == {
+            "offerId": "abc",
+            "taskType": "python",
+            "validFor": 5000,
+            "type": "runner:taskoffer",
+        }
+
+    def test_does_not_camel_case_nested_keys(self):
+        data = {"result": [{"json": {"snake_case": 1}}]}
+        message = RunnerTaskDone(task_id="abc", data=data)
+
+        serialized = MessageSerde.serialize_runner_message(message)
+
+        assert json.loads(serialized)["data"] == data
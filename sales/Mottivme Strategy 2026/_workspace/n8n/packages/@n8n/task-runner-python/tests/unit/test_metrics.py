@@ -0,0 +1,53 @@
+from src.metrics import Counter, Gauge, Histogram, RunnerMetrics
+from src.constants import METRICS_PREFIX
+
+
+class TestMetrics:
+    def test_renders_histogram_with_cumulative_buckets(self):
+        histogram = Histogram(
+            "duration_seconds", "Duration.", (0.1, 1), label_name="phase"
+        )
+        histogram.observe(0.05, "validate")
+        histogram.observe(0.5, "validate")
+        histogram.observe(5, "validate")
+
+        name = METRICS_PREFIX + "duration_seconds"
+        assert histogram.render() == [
+            f"# HELP {name} Duration.",
+            f"# TYPE {name} histogram",
+            f'{name}_bucket{{phase="validate",le="0.1"}} 1',
+            f'{name}_bucket{{phase="validate",le="1"}} 2',
+            f'{name}_bucket{{phase="validate",le="+Inf"}} 3',
+            f'{name}_sum{{phase="validate"}} 5.55',
+            f'{name}_count{{phase="validate"}} 3',
+        ]
+
+    def test_renders_counter_by_label_with_escaping(self):
+        counter = Counter("rejections_total", "Rejections.", label_name="reason")
+        counter.inc('at "capacity"')
+        counter.inc('at "capacity"')
+
+        assert counter.render()[-1] == (
+            METRICS_PREFIX + 'rejections_total{reason="at \\"capacity\\""} 2'
+        )
+
+    def test_renders_gauge_by_label(self):
+        gauge = Gauge("workflow_tasks", "Tasks.", label_name="workflow_id")
+        gauge.set_function(lambda: {"wf-1": 2, "wf-2": 1})
+
+        assert gauge.render()[2:] == [
+            METRICS_PREFIX + 'workflow_tasks{workflow_id="wf-1"} 2',
+            METRICS_PREFIX + 'workflow_tasks{workflow_id="wf-2"} 1',
+        ]
+
+    def test_renders_no_samples_for_gauge_by_label_without_function(self):
+        gauge = Gauge("workflow_tasks", "Tasks.", label_name="workflow_id")
+
+        assert gauge.render()[2:] == []
+
+    def test_renders_cache_hit_ratio(self):
+        metrics = RunnerMetrics()
+        metrics.validation_cache_hits.inc(amount=3)
+        metrics.validation_cache_misses.inc()
+
+        assert f"{METRICS_PREFIX}validation_cache_hit_ratio 0.75" in metrics.render()
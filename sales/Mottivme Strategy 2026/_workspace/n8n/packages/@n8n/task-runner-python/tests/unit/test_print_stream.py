@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from src.print_stream import PrintForwarder, PrintStream, PrintStreamWriter
+from src.task_executor import TaskExecutor
+from src.constants import PRINT_STREAM_BURST, PRINT_STREAM_MAX_FRAME_SIZE
+
+
+class TestPrintStream:
+    @pytest.mark.asyncio
+    async def test_reads_print_calls_written_by_writer(self):
+        received = []
+        stream = PrintStream(on_print=lambda args, size: received.append(args))
+        stream.start()
+
+        writer = PrintStreamWriter(stream.write_conn.fileno())
+        writer.write(["'first'"])
+        writer.write(["'second'", "2"])
+        stream.close_write_end()
+
+        await asyncio.wait_for(stream.done, timeout=1)
+
+        assert received == [["'first'"], ["'second'", "2"]]
+
+    @pytest.mark.asyncio
+    async def test_replaces_oversized_print_call(self):
+        received = []
+        stream = PrintStream(on_print=lambda args, size: received.append(args))
+        stream.start()
+
+        PrintStreamWriter(stream.write_conn.fileno()).write(
+            ["x" * PRINT_STREAM_MAX_FRAME_SIZE]
+        )
+        stream.close_write_end()
+
+        await asyncio.wait_for(stream.done, timeout=1)
+
+        assert len(received) == 1
+        assert "exceeds the limit" in received[0][0]
+
+
+class TestPrintForwarder:
+    @pytest.mark.asyncio
+    async def test_forwards_in_batches_and_in_order(self):
+        sent = []
+
+        async def send(print_args):
+            sent.append(print_args)
+
+        forwarder = PrintForwarder(send, rate_limit=100, max_bytes=1024)
+        forwarder.add(["'a'"], 3)
+        forwarder.add(["'b'"], 3)
+
+        assert await forwarder.finish() == []
+        assert sent == [[["'a'"], ["'b'"]]]
+
+    @pytest.mark.asyncio
+    async def test_drops_output_beyond_rate_limit_and_byte_budget(self):
+        sent = []
+
+        async def send(print_args):
+            sent.extend(print_args)
+
+        forwarder = PrintForwarder(send, rate_limit=1, max_bytes=1024)
+        for i in range(PRINT_STREAM_BURST + 5):
+            forwarder.add([str(i)], 1)
+        forwarder.add(["too large"], 2048)
+
+        notice = await forwarder.finish()
+
+        assert len(sent) == PRINT_STREAM_BURST
+        assert notice == [["[Output truncated - 6 more print statements]"]]
+
+
+class TestFormatPrintArgs:
+    def test_serializes_args_and_shows_circular_ones_by_type(self):
+        circular: dict = {}
+        circular["self"] = circular
+
+        formatted = TaskExecutor._format_print_args(
+            "text", 1, None, {"a": [1, 2]}, circular
+        )
+
+        assert formatted == ["'text'", "1", "None", '{"a": [1, 2]}', "[Circular dict]"]
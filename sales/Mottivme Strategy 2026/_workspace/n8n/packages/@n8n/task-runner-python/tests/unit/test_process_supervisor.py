@@ -0,0 +1,168 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.process_supervisor import ProcessSupervisor
+from src.resource_usage import TaskResourceUsage
+from src.task_executor import TaskExecutor
+from src.config.security_config import SecurityConfig
+from src.errors import TaskResultTooLargeError, TaskRuntimeError, TaskTimeoutError
+
+
+class TestProcessSupervisor:
+    security_config = SecurityConfig(
+        stdlib_allow={"time"},
+        external_allow=set(),
+        builtins_deny=set(),
+        runner_env_deny=True,
+    )
+
+    async def execute(self, code: str, **kwargs):
+        process, read_conn, write_conn, shared_items = TaskExecutor.create_process(
+            code=code,
+            node_mode=kwargs.get("node_mode", "all_items"),
+            items=kwargs.get("items", []),
+            security_config=self.security_config,
+        )
+
+        return await ProcessSupervisor.execute_process(
+            process=process,
+            read_conn=read_conn,
+            write_conn=write_conn,
+            task_timeout=kwargs.get("task_timeout", 10),
+            pipe_reader_timeout=3.0,
+            continue_on_fail=kwargs.get("continue_on_fail", False),
+            shared_items=shared_items,
+            max_payload_size=kwargs.get("max_payload_size"),
+        )
+
+    @pytest.mark.asyncio
+    async def test_returns_result_and_print_args(self):
+        result, print_args, size = await self.execute(
+            "print('hi')\nreturn [{'json': {'a': 1}}]"
+        )
+
+        assert result == [{"json": {"a": 1}}]
+        assert print_args == [["'hi'"]]
+        assert size > 0
+
+    @pytest.mark.asyncio
+    async def test_raises_runtime_error(self):
+        with pytest.raises(TaskRuntimeError):
+            await self.execute("raise ValueError('boom')")
+
+    @pytest.mark.asyncio
+    async def test_timeout_stops_process(self):
+        with pytest.raises(TaskTimeoutError):
+            await self.execute("while True:\n    pass", task_timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_raises_when_result_exceeds_max_payload(self):
+        with pytest.raises(TaskResultTooLargeError):
+            await self.execute(
+                "return [{'json': {'v': 'x' * 100}} for _ in range(100)]",
+                max_payload_size=1024,
+            )
+
+    async def execute_shards(self, code: str, items, shard_count: int, **kwargs):
+        shards = [
+            TaskExecutor.create_process(
+                code=code,
+                node_mode="per_item",
+                items=shard_items,
+                security_config=self.security_config,
+                item_offset=item_offset,
+            )
+            for item_offset, shard_items in TaskExecutor.split_items(items, shard_count)
+        ]
+
+        return await ProcessSupervisor.execute_shards(
+            shards=shards,
+            task_timeout=kwargs.get("task_timeout", 10),
+            pipe_reader_timeout=3.0,
+            continue_on_fail=kwargs.get("continue_on_fail", False),
+            max_payload_size=kwargs.get("max_payload_size"),
+        )
+
+    @pytest.mark.asyncio
+    async def test_merges_shard_results_in_order(self):
+        items = [{"json": {"value": value}} for value in range(5)]
+        code = "print(_item['json']['value'])\nreturn _item['json']"
+
+        result, print_args, size = await self.execute_shards(code, items, 3)
+
+        assert result == [
+            {"json": {"value": value}, "pairedItem": {"item": value}}
+            for value in range(5)
+        ]
+        assert print_args == [[str(value)] for value in range(5)]
+        assert size > 0
+
+    @pytest.mark.asyncio
+    async def test_failing_shard_stops_other_shards(self):
+        items = [{"json": {"value": value}} for value in range(2)]
+        code = (
+            "import time\n"
+            "if _item['json']['value'] == 0:\n"
+            "    raise ValueError('boom')\n"
+            "time.sleep(30)"
+        )
+
+        with pytest.raises(TaskRuntimeError):
+            await asyncio.wait_for(self.execute_shards(code, items, 2), timeout=5)
+
+    @pytest.mark.asyncio
+    async def test_raises_when_merged_shards_exceed_max_payload(self):
+        items = [{"json": {}} for _ in range(10)]
+        code = "return {'v': 'x' * 100}"
+
+        with pytest.raises(TaskResultTooLargeError):
+            await self.execute_shards(code, items, 2, max_payload_size=1024)
+
+    @pytest.mark.asyncio
+    async def test_runs_more_tasks_concurrently_than_threads(self):
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=2))
+
+        code = "import time\ntime.sleep(1)\nreturn [{'json': {'done': True}}]"
+        results = await asyncio.wait_for(
+            asyncio.gather(*(self.execute(code) for _ in range(16))), timeout=5
+        )
+
+        assert all(result == [{"json": {"done": True}}] for result, _, _ in results)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("rss_mib", "is_exceeded"),
+        [(140, False), (160, True)],
+    )
+    async def test_memory_limit_excludes_memory_shared_with_forkserver(
+        self, rss_mib, is_exceeded
+    ):
+        mib = 1024 * 1024
+        forkserver_pid, subprocess_pid = 100, 101
+        process = MagicMock(pid=subprocess_pid)
+        resource_usage = TaskResourceUsage()
+
+        with (
+            patch(
+                "src.process_supervisor.read_parent_pid", return_value=forkserver_pid
+            ),
+            patch(
+                "src.process_supervisor.read_rss",
+                side_effect=lambda pid: (
+                    100 * mib if pid == forkserver_pid else (rss_mib * mib)
+                ),
+            ),
+            patch("src.process_supervisor.read_cpu_time", side_effect=[0.1, None]),
+            patch("src.process_supervisor.asyncio.sleep", new=AsyncMock()),
+        ):
+            await ProcessSupervisor._sample_resources(
+                process, resource_usage, memory_limit=50 * mib
+            )
+
+        assert resource_usage.memory_limit_exceeded is is_exceeded
+        assert process.kill.called is is_exceeded
+        assert resource_usage.peak_rss == rss_mib * mib
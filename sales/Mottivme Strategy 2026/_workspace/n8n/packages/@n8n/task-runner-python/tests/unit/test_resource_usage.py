@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+from src.resource_usage import (
+    TaskResourceUsage,
+    read_address_space,
+    read_cpu_time,
+    read_parent_pid,
+    read_rss,
+)
+
+EXITED_PID = 2**22 + 1  # above the max pid on Linux
+
+
+class TestTaskResourceUsage:
+    def test_not_sampled_by_default(self):
+        assert not TaskResourceUsage().is_sampled
+
+    def test_add_sums_concurrent_usage(self):
+        usage = TaskResourceUsage(peak_rss=100, cpu_time=0.5)
+
+        usage.add(TaskResourceUsage(peak_rss=50, cpu_time=0.25))
+        usage.add(TaskResourceUsage(memory_limit_exceeded=True))
+
+        assert usage == TaskResourceUsage(
+            peak_rss=150, cpu_time=0.75, memory_limit_exceeded=True
+        )
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Reads from /proc")
+class TestReadProcessUsage:
+    def test_reads_own_usage(self):
+        pid = os.getpid()
+
+        rss = read_rss(pid)
+        address_space = read_address_space(pid)
+        cpu_time = read_cpu_time(pid)
+
+        assert rss is not None and rss > 0
+        assert address_space is not None and address_space >= rss
+        assert cpu_time is not None and cpu_time > 0
+
+    def test_reads_own_parent_pid(self):
+        assert read_parent_pid(os.getpid()) == os.getppid()
+
+    def test_returns_none_for_exited_process(self):
+        assert read_parent_pid(EXITED_PID) is None
+        assert read_rss(EXITED_PID) is None
+        assert read_address_space(EXITED_PID) is None
+        assert read_cpu_time(EXITED_PID) is None
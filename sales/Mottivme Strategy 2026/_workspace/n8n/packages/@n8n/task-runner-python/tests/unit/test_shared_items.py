@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from src.process_supervisor import ProcessSupervisor
+from src.shared_items import SharedItems
+from src.task_executor import TaskExecutor
+from src.config.security_config import SecurityConfig
+
+pytestmark = pytest.mark.skipif(
+    not SharedItems.is_supported(), reason="memfd is not supported on this platform"
+)
+
+
+class TestSharedItems:
+    def test_load_returns_written_items(self):
+        items = [{"json": {"name": "Zoë", "values": [1, 2.5, None, True]}}]
+        shared_items = SharedItems.create(items)
+
+        try:
+            assert shared_items.load() == items
+            assert shared_items.size > 0
+        finally:
+            shared_items.close()
+
+    def test_close_releases_fd(self):
+        shared_items = SharedItems.create([])
+        shared_items.close()
+
+        with pytest.raises(OSError):
+            os.fstat(shared_items.fd)
+
+    @pytest.mark.asyncio
+    async def test_subprocess_receives_items_through_fd(self):
+        security_config = SecurityConfig(
+            stdlib_allow=set(),
+            external_allow=set(),
+            builtins_deny=set(),
+            runner_env_deny=True,
+        )
+        items = [{"json": {"value": i}} for i in range(1000)]
+
+        process, read_conn, write_conn, shared_items = TaskExecutor.create_process(
+            code="return [{'json': {'total': sum(i['json']['value'] for i in _items)}}]",
+            node_mode="all_items",
+            items=items,
+            security_config=security_config,
+        )
+
+        assert shared_items is not None
+
+        result, _, _ = await ProcessSupervisor.execute_process(
+            process=process,
+            read_conn=read_conn,
+            write_conn=write_conn,
+            task_timeout=10,
+            pipe_reader_timeout=3.0,
+            continue_on_fail=False,
+            shared_items=shared_items,
+        )
+
+        assert result == [{"json": {"total": sum(range(1000))}}]
+        with pytest.raises(OSError):
+            os.fstat(shared_items.fd)
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+
+import pytest
+
+from src.pipe_reader import PipeReader
+from src.subinterpreter_pool import SubinterpreterPool
+from src.task_analyzer import TaskAnalyzer
+from src.config.security_config import SecurityConfig
+from src.errors import (
+    SubinterpreterUnsupportedError,
+    TaskCancelledError,
+    TaskRuntimeError,
+    TaskTimeoutError,
+)
+
+pytestmark = pytest.mark.skipif(
+    not SubinterpreterPool.is_supported(), reason="Subinterpreters not supported"
+)
+
+
+class TestSubinterpreterPool:
+    @pytest.fixture
+    def pool(self):
+        security_config = SecurityConfig(
+            stdlib_allow={"json", "tracemalloc"},
+            external_allow=set(),
+            builtins_deny={"open"},
+            runner_env_deny=True,
+        )
+        pool = SubinterpreterPool(
+            size=1, max_tasks_per_interpreter=2, security_config=security_config
+        )
+        pool.start()
+        yield pool
+        pool.stop()
+
+    def execute(self, pool: SubinterpreterPool, code: str, **kwargs):
+        interpreter = kwargs.pop("interpreter", None) or pool.acquire()
+        result = pool.execute_task(
+            interpreter=interpreter,
+            code=code,
+            code_hash=TaskAnalyzer.hash_code(code),
+            node_mode=kwargs.get("node_mode", "all_items"),
+            items=kwargs.get("items", []),
+            task_timeout=kwargs.get("task_timeout", 5),
+            pipe_reader_timeout=3.0,
+            continue_on_fail=kwargs.get("continue_on_fail", False),
+        )
+        return interpreter, result
+
+    def test_executes_tasks_in_both_modes(self, pool):
+        _, (result, print_args, size) = self.execute(
+            pool,
+            "import json\nprint('hi')\nreturn [{'json': json.loads('{\"a\": 1}')}]",
+        )
+
+        assert result == [{"json": {"a": 1}}]
+        assert print_args == [["'hi'"]]
+        assert size > 0
+
+        _, (result, _, _) = self.execute(
+            pool,
+            "return {'doubled': _item['json']['v'] * 2}",
+            node_mode="per_item",
+            items=[{"json": {"v": 1}}, {"json": {"v": 2}}],
+        )
+
+        assert result == [
+            {"json": {"doubled": 2}, "pairedItem": {"item": 0}},
+            {"json": {"doubled": 4}, "pairedItem": {"item": 1}},
+        ]
+
+    def test_reuses_interpreter_until_max_tasks(self, pool):
+        first, _ = self.execute(pool, "return []")
+        second, _ = self.execute(pool, "return []")
+        third, _ = self.execute(pool, "return []")
+
+        assert first is second
+        assert third is not first
+
+    def test_applies_sandbox(self, pool):
+        with pytest.raises(TaskRuntimeError, match="Security violation"):
+            self.execute(pool, "import os\nreturn []")
+
+        with pytest.raises(TaskRuntimeError, match="open"):
+            self.execute(pool, "open('/etc/hostname')\nreturn []")
+
+    def test_hides_env_without_clearing_runner_env(self):
+        security_config = SecurityConfig(
+            stdlib_allow={"os"},
+            external_allow=set(),
+            builtins_deny=set(),
+            runner_env_deny=True,
+        )
+        pool = SubinterpreterPool(
+            size=1, max_tasks_per_interpreter=2, security_config=security_config
+        )
+        pool.start()
+
+        try:
+            _, (result, _, _) = self.execute(
+                pool, "import os\nreturn [{'json': {'env': dict(os.environ)}}]"
+            )
+        finally:
+            pool.stop()
+
+        assert result == [{"json": {"env": {}}}]
+        assert "PATH" in os.environ
+
+    def test_recycles_interpreter_after_failure(self, pool):
+        failed = pool.acquire()
+        with pytest.raises(TaskRuntimeError):
+            self.execute(pool, "raise ValueError('boom')", interpreter=failed)
+
+        interpreter, (result, _, _) = self.execute(pool, "return [{'ok': True}]")
+
+        assert interpreter is not failed
+        assert result == [{"ok": True}]
+
+    def test_continue_on_fail_returns_error_as_result(self, pool):
+        _, (result, _, _) = self.execute(
+            pool, "raise ValueError('boom')", continue_on_fail=True
+        )
+
+        assert result == [{"json": {"error": "boom"}}]
+
+    def test_timeout_interrupts_user_code(self, pool):
+        with pytest.raises(TaskTimeoutError):
+            self.execute(pool, "while True:\n    pass", task_timeout=1)
+
+        _, (result, _, _) = self.execute(pool, "return [{'ok': True}]")
+
+        assert result == [{"ok": True}]
+
+    def test_timeout_interrupts_user_code_catching_exceptions(self, pool):
+        code = (
+            "while True:\n    try:\n        pass\n    except Exception:\n        pass"
+        )
+
+        with pytest.raises(TaskTimeoutError):
+            self.execute(pool, code, task_timeout=1)
+
+    def test_cancel_interrupts_user_code(self, pool):
+        interpreter = pool.acquire()
+        threading.Timer(0.5, pool.cancel, args=(interpreter,)).start()
+
+        with pytest.raises(TaskCancelledError):
+            self.execute(
+                pool,
+                "while True:\n    pass",
+                interpreter=interpreter,
+                task_timeout=5,
+            )
+
+    def test_unsupported_module_raises_and_is_learned(self, pool):
+        code = "import tracemalloc\nreturn []"
+        pool.unsafe_modules.discard("tracemalloc")
+
+        assert pool.supports(code, TaskAnalyzer.hash_code(code))
+
+        with pytest.raises(SubinterpreterUnsupportedError):
+            self.execute(pool, code, continue_on_fail=True)
+
+        assert not pool.supports(code, TaskAnalyzer.hash_code(code))
+
+    def test_supports_code_without_known_unsafe_imports(self, pool):
+        assert pool.supports("import json\nreturn []", "json")
+        assert not pool.supports("import numpy as np\nreturn []", "numpy")
+        assert not pool.supports("from pandas.io import json\nreturn []", "pandas")
+
+    def test_abandoned_interpreter_releases_result_pipe(self):
+        security_config = SecurityConfig(
+            stdlib_allow={"time"},
+            external_allow=set(),
+            builtins_deny=set(),
+            runner_env_deny=True,
+        )
+        pool = SubinterpreterPool(
+            size=1, max_tasks_per_interpreter=2, security_config=security_config
+        )
+        pool.start()
+
+        try:
+            with pytest.raises(TaskTimeoutError):
+                self.execute(
+                    pool, "import time\ntime.sleep(3)\nreturn []", task_timeout=1
+                )
+
+            assert pool.abandoned_interpreters
+            assert not any(
+                isinstance(thread, PipeReader) for thread in threading.enumerate()
+            )
+        finally:
+            # finalizing aborts while a subinterpreter still runs user code
+            while pool.abandoned_interpreters:
+                time.sleep(0.1)
+            pool.stop()
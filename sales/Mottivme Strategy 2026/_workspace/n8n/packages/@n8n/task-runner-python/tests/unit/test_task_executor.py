@@ -1,11 +1,26 @@
 import pytest
 import json
-from unittest.mock import MagicMock, patch
+import os
+from unittest.mock import patch
 
-from src.task_executor import TaskExecutor
+from src.task_executor import MULTIPROCESSING_CONTEXT, TaskExecutor
 from src.pipe_reader import PipeReader
-from src.errors import TaskCancelledError, TaskKilledError, TaskSubprocessFailedError
-from src.constants import SIGTERM_EXIT_CODE, SIGKILL_EXIT_CODE, PIPE_MSG_PREFIX_LENGTH
+from src.pipe_writer import PipeWriter
+from src.errors import (
+    TaskCancelledError,
+    TaskCpuLimitError,
+    TaskKilledError,
+    TaskMemoryLimitError,
+    TaskResultTooLargeError,
+    TaskSubprocessFailedError,
+)
+from src.constants import (
+    MEMORY_LIMIT_EXIT_CODE,
+    PIPE_MSG_PREFIX_LENGTH,
+    SIGKILL_EXIT_CODE,
+    SIGTERM_EXIT_CODE,
+    SIGXCPU_EXIT_CODE,
+)
 from src.message_types.pipe import (
     PipeResultMessage,
     PipeErrorMessage,
@@ -15,89 +30,64 @@ from src.message_types.pipe import (
 
 class TestTaskExecutorProcessExitHandling:
     def test_sigterm_raises_task_cancelled_error(self):
-        process = MagicMock()
-        process.is_alive.return_value = False
-        process.exitcode = SIGTERM_EXIT_CODE
-
-        read_conn = MagicMock()
-        write_conn = MagicMock()
-        read_conn.fileno.return_value = 999
-
         with pytest.raises(TaskCancelledError):
-            TaskExecutor.execute_process(
-                process=process,
-                read_conn=read_conn,
-                write_conn=write_conn,
-                task_timeout=60,
-                pipe_reader_timeout=3.0,
-                continue_on_fail=False,
-            )
+            TaskExecutor.raise_for_exit_code(SIGTERM_EXIT_CODE)
 
     def test_sigkill_raises_task_killed_error(self):
-        process = MagicMock()
-        process.is_alive.return_value = False
-        process.exitcode = SIGKILL_EXIT_CODE
-
-        read_conn = MagicMock()
-        write_conn = MagicMock()
-        read_conn.fileno.return_value = 999
-
         with pytest.raises(TaskKilledError):
-            TaskExecutor.execute_process(
-                process=process,
-                read_conn=read_conn,
-                write_conn=write_conn,
-                task_timeout=60,
-                pipe_reader_timeout=3.0,
-                continue_on_fail=False,
-            )
+            TaskExecutor.raise_for_exit_code(SIGKILL_EXIT_CODE)
 
     def test_other_non_zero_exit_code_raises_task_subprocess_failed_error(self):
-        process = MagicMock()
-        process.is_alive.return_value = False
-        process.exitcode = -1  # Some other error code
-
-        read_conn = MagicMock()
-        write_conn = MagicMock()
-        read_conn.fileno.return_value = 999
-
         with pytest.raises(TaskSubprocessFailedError) as exc_info:
-            TaskExecutor.execute_process(
-                process=process,
-                read_conn=read_conn,
-                write_conn=write_conn,
-                task_timeout=60,
-                pipe_reader_timeout=3.0,
-                continue_on_fail=False,
-            )
+            TaskExecutor.raise_for_exit_code(-1)  # Some other error code
 
         assert exc_info.value.exit_code == -1
 
     def test_zero_exit_code_with_empty_pipe_raises_task_result_read_error(self):
         from src.errors import TaskResultReadError
 
-        process = MagicMock()
-        process.is_alive.return_value = False
-        process.exitcode = 0
-
-        read_conn = MagicMock()
-        write_conn = MagicMock()
-        read_conn.fileno.return_value = 999
+        TaskExecutor.raise_for_exit_code(0)
 
         with pytest.raises(TaskResultReadError):
-            TaskExecutor.execute_process(
-                process=process,
-                read_conn=read_conn,
-                write_conn=write_conn,
-                task_timeout=60,
-                pipe_reader_timeout=3.0,
-                continue_on_fail=False,
+            TaskExecutor.get_task_result(read_pipe(b""))
+
+    def test_memory_limit_exit_code_raises_task_memory_limit_error(self):
+        with pytest.raises(TaskMemoryLimitError) as exc_info:
+            TaskExecutor.raise_for_exit_code(
+                MEMORY_LIMIT_EXIT_CODE, memory_limit=256 * 1024 * 1024
             )
 
+        assert "256 MiB" in str(exc_info.value)
+
+    def test_memory_error_from_failed_allocation_is_allocation_failure(self):
+        with pytest.raises(MemoryError) as exc_info:
+            bytearray(2**62)
+
+        assert TaskExecutor._is_allocation_failure(exc_info.value)
+
+    def test_memory_error_raised_by_code_is_not_allocation_failure(self):
+        def raise_memory_error():
+            raise MemoryError("custom")
+
+        with pytest.raises(MemoryError) as exc_info:
+            raise_memory_error()
+
+        assert not TaskExecutor._is_allocation_failure(exc_info.value)
+
+    def test_sigxcpu_raises_task_cpu_limit_error(self):
+        with pytest.raises(TaskCpuLimitError) as exc_info:
+            TaskExecutor.raise_for_exit_code(SIGXCPU_EXIT_CODE, cpu_limit=5)
+
+        assert "5 seconds" in str(exc_info.value)
+
+    def test_limit_exit_codes_without_limits_raise_task_subprocess_failed_error(self):
+        for exit_code in (MEMORY_LIMIT_EXIT_CODE, SIGXCPU_EXIT_CODE):
+            with pytest.raises(TaskSubprocessFailedError):
+                TaskExecutor.raise_for_exit_code(exit_code)
+
 
 class TestTaskExecutorPipeCommunication:
-    @patch("os.read")
-    def test_successful_result_communication(self, mock_os_read):
+    def test_successful_result_communication(self):
         result_data: PipeResultMessage = {
             "result": [{"json": {"foo": "bar"}}],
             "print_args": [],
@@ -105,31 +95,15 @@ class TestTaskExecutorPipeCommunication:
         result_json = json.dumps(result_data).encode("utf-8")
         result_length = len(result_json).to_bytes(PIPE_MSG_PREFIX_LENGTH, "big")
 
-        mock_os_read.side_effect = [result_length, result_json]
-
-        process = MagicMock()
-        process.is_alive.return_value = False
-        process.exitcode = 0
-
-        read_conn = MagicMock()
-        write_conn = MagicMock()
-        read_conn.fileno.return_value = 999
-
-        result, print_args, size = TaskExecutor.execute_process(
-            process=process,
-            read_conn=read_conn,
-            write_conn=write_conn,
-            task_timeout=60,
-            pipe_reader_timeout=3.0,
-            continue_on_fail=False,
+        result, print_args, size = TaskExecutor.get_task_result(
+            read_pipe(result_length + result_json)
         )
 
         assert result == [{"json": {"foo": "bar"}}]
         assert print_args == []
         assert size == len(result_json)
 
-    @patch("os.read")
-    def test_successful_error_communication(self, mock_os_read):
+    def test_successful_error_communication(self):
         from src.errors import TaskRuntimeError
 
         error_info: TaskErrorInfo = {
@@ -145,30 +119,77 @@ class TestTaskExecutorPipeCommunication:
         error_json = json.dumps(error_data).encode("utf-8")
         error_length = len(error_json).to_bytes(PIPE_MSG_PREFIX_LENGTH, "big")
 
-        mock_os_read.side_effect = [error_length, error_json]
-
-        process = MagicMock()
-        process.is_alive.return_value = False
-        process.exitcode = 0
-
-        read_conn = MagicMock()
-        write_conn = MagicMock()
-        read_conn.fileno.return_value = 999
-
         with pytest.raises(TaskRuntimeError) as exc_info:
-            TaskExecutor.execute_process(
-                process=process,
-                read_conn=read_conn,
-                write_conn=write_conn,
-                task_timeout=60,
-                pipe_reader_timeout=3.0,
-                continue_on_fail=False,
-            )
+            TaskExecutor.get_task_result(read_pipe(error_length + error_json))
 
         assert str(exc_info.value) == "Test error"
         assert exc_info.value.stack_trace == "traceback..."
 
 
+def read_pipe(data: bytes) -> PipeReader:
+    """Read a message written to a pipe as a subprocess would, returning the finished reader."""
+
+    read_conn, write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+    os.write(write_conn.fileno(), data)
+    write_conn.close()
+
+    pipe_reader = PipeReader(read_conn.fileno(), read_conn)
+    pipe_reader.run()
+    return pipe_reader
+
+
+class TestTaskExecutorPipeFraming:
+    @pytest.fixture
+    def pipe(self):
+        read_fd, write_fd = os.pipe()
+        yield read_fd, write_fd
+        os.close(read_fd)
+        os.close(write_fd)
+
+    @patch("src.pipe_writer.PIPE_FRAME_BATCH_SIZE", 1)
+    def test_result_items_streamed_in_frames_are_reassembled(self, pipe):
+        read_fd, write_fd = pipe
+        writer = PipeWriter(write_fd)
+        writer.write_item({"json": {"index": 0}})
+        writer.write_item({"json": {"index": 1}})
+        TaskExecutor._put_result(
+            writer, [{"json": {"index": 2}}], [["'hi'"]], start_time=1, user_code_time=2
+        )
+
+        message, size = PipeReader.read_message(read_fd)
+        timings = message.pop("timings")
+
+        assert message == {
+            "result": [{"json": {"index": i}} for i in range(3)],
+            "print_args": [["'hi'"]],
+        }
+        assert timings["start_time"] == 1
+        assert timings["user_code"] == 2
+        assert timings["serialize"] == writer.serialize_time > 0
+        assert size > 0
+
+    @patch("src.pipe_writer.PIPE_FRAME_BATCH_SIZE", 1)
+    def test_error_discards_already_streamed_items(self, pipe):
+        read_fd, write_fd = pipe
+        PipeWriter(write_fd).write_item({"json": {"index": 0}})
+        TaskExecutor._put_error(write_fd, ValueError("boom"))
+
+        message, _ = PipeReader.read_message(read_fd)
+
+        assert "result" not in message
+        assert message["error"]["message"] == "boom"
+
+    @patch("src.pipe_writer.PIPE_FRAME_BATCH_SIZE", 1)
+    def test_payload_limit_is_enforced_per_frame(self, pipe):
+        read_fd, write_fd = pipe
+        writer = PipeWriter(write_fd)
+        for index in range(10):
+            writer.write_item({"json": {"index": index}})
+
+        with pytest.raises(TaskResultTooLargeError):
+            PipeReader.read_message(read_fd, max_payload_size=50)
+
+
 class TestTaskExecutorLowLevelIO:
     @patch("os.read")
     def test_read_exact_bytes_single_read(self, mock_os_read):
@@ -201,4 +222,27 @@ class TestTaskExecutorLowLevelIO:
         mock_os_write.return_value = 0
 
         with pytest.raises(OSError, match="Write failed"):
-            TaskExecutor._write_bytes(999, b"test data")
+            PipeWriter._write_bytes(999, b"test data")
+
+
+class TestTaskExecutorForkserverPreload:
+    @patch("src.task_executor.MULTIPROCESSING_CONTEXT")
+    def test_preloads_installed_modules_and_keeps_main(self, mock_context):
+        preloaded = TaskExecutor.preload_modules({"json", "not_installed_module"})
+
+        assert preloaded == ["json"]
+        mock_context.set_forkserver_preload.assert_called_once_with(
+            ["__main__", "json"]
+        )
+        mock_context.Process.return_value.start.assert_called_once()
+
+
+class TestTaskExecutorSplitItems:
+    def test_splits_into_contiguous_shards_with_offsets(self):
+        items = [{"json": {"i": i}} for i in range(7)]
+
+        shards = TaskExecutor.split_items(items, 3)
+
+        assert [offset for offset, _ in shards] == [0, 3, 5]
+        assert [len(shard) for _, shard in shards] == [3, 2, 2]
+        assert [item for _, shard in shards for item in shard] == items
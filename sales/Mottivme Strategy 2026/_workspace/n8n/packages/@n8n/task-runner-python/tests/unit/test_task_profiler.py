@@ -0,0 +1,68 @@
+import os
+
+from src.task_profiler import TaskProfiler
+
+
+def build_rows(count: int) -> list[str]:
+    return [str(i) * 10 for i in range(count)]
+
+
+class TestTaskProfiler:
+    def test_cpu_summary_lists_top_functions(self):
+        profiler = TaskProfiler(modes=frozenset({"cpu"}), top_n=3)
+
+        profiler.start()
+        build_rows(1000)
+        summary = profiler.stop()
+
+        assert summary is not None
+        assert summary.startswith("[Profile] Top 3 functions by cumulative time:")
+        assert "build_rows" in summary
+        assert "allocated memory" not in summary
+
+    def test_memory_summary_lists_top_lines(self):
+        profiler = TaskProfiler(modes=frozenset({"memory"}), top_n=3)
+
+        profiler.start()
+        rows = build_rows(10000)
+        summary = profiler.stop()
+
+        assert summary is not None
+        assert summary.startswith("[Profile] Top 3 lines by allocated memory")
+        assert __file__ in summary
+        assert "src/task_profiler.py" not in summary
+        assert len(rows) == 10000
+
+    def test_stop_is_idempotent(self):
+        profiler = TaskProfiler(modes=frozenset({"cpu", "memory"}))
+
+        assert profiler.stop() is None  # never started
+
+        profiler.start()
+        assert profiler.stop() is not None
+        assert profiler.stop() is None
+
+    def test_writes_summary_and_raw_profile_to_output_path(self, tmp_path):
+        output_path = str(tmp_path / "profiles" / "task-1")
+        profiler = TaskProfiler(modes=frozenset({"cpu"}), output_path=output_path)
+
+        profiler.start()
+        build_rows(1000)
+
+        assert profiler.stop() is None
+        assert os.path.exists(f"{output_path}.prof")
+        with open(f"{output_path}.txt") as f:
+            assert "build_rows" in f.read()
+
+    def test_returns_summary_if_output_path_is_not_writable(self, tmp_path):
+        blocking_file = tmp_path / "not-a-dir"
+        blocking_file.write_text("")
+        profiler = TaskProfiler(
+            modes=frozenset({"cpu"}), output_path=str(blocking_file / "task-1")
+        )
+
+        profiler.start()
+        summary = profiler.stop()
+
+        assert summary is not None
+        assert "[Profile] Failed to write to" in summary
@@ -1,9 +1,27 @@
+import asyncio
+import json
+import time
+
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import AsyncMock, patch, Mock
+import websockets
 from websockets.exceptions import InvalidStatus
 
-from src.task_runner import TaskRunner
+from src.task_runner import TaskOffer, TaskRunner
 from src.config.task_runner_config import TaskRunnerConfig
+from src.message_types.broker import TaskSettings
+from src.task_state import TaskState, TaskStatus
+from src.message_types import (
+    BrokerTaskCancel,
+    BrokerTaskSettings,
+    RunnerTaskDone,
+    RunnerTaskError,
+    RunnerTaskOffer,
+)
+from src.concurrency_controller import HostSample
+from src.constants import METRICS_PREFIX
+from src.metrics import metrics
+from src.errors import TaskRuntimeError
 
 
 class TestTaskRunnerConnectionRetry:
@@ -68,3 +86,573 @@ class TestTaskRunnerConnectionRetry:
             assert "Authentication failed with status 403" in args
 
             assert mock_connect.call_count == 1
+
+
+class TestTaskRunnerOffers:
+    @pytest.fixture
+    def runner(self):
+        config = TaskRunnerConfig(
+            grant_token="test-token",
+            task_broker_uri="http://127.0.0.1:5679",
+            max_concurrency=3,
+            max_payload_size=1024 * 1024,
+            task_timeout=60,
+            auto_shutdown_timeout=0,
+            graceful_shutdown_timeout=10,
+            stdlib_allow=set(),
+            external_allow=set(),
+            builtins_deny=set(),
+            env_deny=False,
+            pipe_reader_timeout=3.0,
+        )
+        runner = TaskRunner(config)
+        runner.can_send_offers = True
+        return runner
+
+    @pytest.mark.asyncio
+    async def test_sends_offers_up_to_capacity_in_one_burst(self, runner):
+        with patch.object(runner, "_send_messages", new=AsyncMock()) as send_messages:
+            await runner._send_offers()
+            await runner._send_offers()
+
+        send_messages.assert_called_once()
+        offers = send_messages.call_args[0][0]
+        assert len(offers) == 3
+        assert {offer.offer_id for offer in offers} == set(runner.open_offers)
+
+    @pytest.mark.asyncio
+    async def test_replaces_expired_offers(self, runner):
+        with patch.object(runner, "_send_messages", new=AsyncMock()) as send_messages:
+            await runner._send_offers()
+            expired_offer_id = runner.offer_expiries[0][1]
+            runner.offer_expiries[0] = (0.0, expired_offer_id)
+
+            await runner._send_offers()
+
+        assert expired_offer_id not in runner.open_offers
+        assert len(runner.open_offers) == 3
+        assert len(send_messages.call_args[0][0]) == 1
+
+    @pytest.mark.asyncio
+    async def test_replaces_offers_expiring_now(self, runner):
+        with patch.object(runner, "_send_messages", new=AsyncMock()) as send_messages:
+            await runner._send_offers()
+            valid_until, expiring_offer_id = runner.offer_expiries[0]
+
+            with patch("src.task_runner.time.time", return_value=valid_until):
+                await runner._send_offers()
+
+        assert expiring_offer_id not in runner.open_offers
+        assert len(send_messages.call_args[0][0]) == 1
+
+    @pytest.mark.asyncio
+    async def test_waits_for_event_instead_of_polling(self, runner):
+        with patch.object(runner, "_send_messages", new=AsyncMock()):
+            await runner._send_offers()
+
+        wait = asyncio.create_task(runner._wait_for_offers_event())
+        await asyncio.sleep(0.3)
+        assert not wait.done()
+
+        runner._notify_offers()
+        await asyncio.wait_for(wait, timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_wakes_up_when_earliest_offer_expires(self, runner):
+        runner.open_offers["offer"] = TaskOffer("offer", time.time() + 0.1)
+        runner.offer_expiries = [(time.time() + 0.1, "offer")]
+
+        await asyncio.wait_for(runner._wait_for_offers_event(), timeout=1)
+
+
+class TestTaskRunnerSharding:
+    @pytest.fixture
+    def runner(self):
+        config = TaskRunnerConfig(
+            grant_token="test-token",
+            task_broker_uri="http://127.0.0.1:5679",
+            max_concurrency=4,
+            max_payload_size=1024 * 1024,
+            task_timeout=60,
+            auto_shutdown_timeout=0,
+            graceful_shutdown_timeout=10,
+            stdlib_allow=set(),
+            external_allow=set(),
+            builtins_deny=set(),
+            env_deny=False,
+            pipe_reader_timeout=3.0,
+            per_item_max_shards=3,
+            per_item_min_shard_size=10,
+        )
+        return TaskRunner(config)
+
+    def task_settings(self, item_count: int, node_mode="per_item") -> TaskSettings:
+        return TaskSettings(
+            code="return _item",
+            node_mode=node_mode,
+            continue_on_fail=False,
+            items=[{"json": {}}] * item_count,
+            workflow_name="workflow",
+            workflow_id="workflow-id",
+            node_name="node",
+            node_id="node-id",
+        )
+
+    def test_shard_count_is_bounded_by_max_shards_and_items(self, runner):
+        assert runner._get_shard_count(self.task_settings(1000)) == 3
+        assert runner._get_shard_count(self.task_settings(25)) == 2
+        assert runner._get_shard_count(self.task_settings(9)) == 1
+        assert runner._get_shard_count(self.task_settings(1000, "all_items")) == 1
+
+    def test_shard_count_is_bounded_by_free_slots(self, runner):
+        for task_id in ("a", "b", "c"):
+            runner.running_tasks[task_id] = TaskState(task_id)
+
+        assert runner._get_shard_count(self.task_settings(1000)) == 2
+
+    @pytest.mark.asyncio
+    async def test_shards_take_slots_from_offers(self, runner):
+        task_state = TaskState("task")
+        task_state.shard_processes = [Mock(), Mock(), Mock()]
+        runner.running_tasks["task"] = task_state
+        runner.can_send_offers = True
+
+        with patch.object(runner, "_send_messages", new=AsyncMock()):
+            await runner._send_offers()
+
+        assert runner.used_slots == 3
+        assert len(runner.open_offers) == 1
+
+
+class TestTaskRunnerTaskDone:
+    @pytest.fixture
+    def runner(self):
+        config = TaskRunnerConfig(
+            grant_token="test-token",
+            task_broker_uri="http://127.0.0.1:5679",
+            max_concurrency=1,
+            max_payload_size=1024 * 1024,
+            task_timeout=60,
+            auto_shutdown_timeout=0,
+            graceful_shutdown_timeout=10,
+            stdlib_allow=set(),
+            external_allow=set(),
+            builtins_deny=set(),
+            env_deny=False,
+            pipe_reader_timeout=3.0,
+        )
+        return TaskRunner(config)
+
+    @pytest.mark.asyncio
+    async def test_sends_print_output_and_task_done_in_one_write(self, runner):
+        runner.running_tasks["task"] = TaskState("task")
+        task_settings = TaskSettings(
+            code="return []",
+            node_mode="all_items",
+            continue_on_fail=False,
+            items=[],
+            workflow_name="workflow",
+            workflow_id="workflow-id",
+            node_name="node",
+            node_id="node-id",
+        )
+        print_args = [[f"'line {i}'"] for i in range(100)]
+
+        with (
+            patch.object(
+                runner.executor,
+                "create_process",
+                return_value=(Mock(), Mock(), Mock(), None),
+            ),
+            patch.object(
+                runner.supervisor,
+                "execute_process",
+                new=AsyncMock(return_value=([{"json": {}}], print_args, 10)),
+            ),
+            patch.object(runner, "_send_messages", new=AsyncMock()) as send_messages,
+            patch.object(runner, "_send_message", new=AsyncMock()) as send_message,
+        ):
+            await runner._execute_task("task", task_settings)
+
+        send_message.assert_not_called()
+        send_messages.assert_called_once()
+        messages = send_messages.call_args[0][0]
+        assert [message.params for message in messages[:-1]] == print_args
+        assert len({message.call_id for message in messages[:-1]}) == 100
+        assert messages[-1] == RunnerTaskDone(
+            task_id="task", data={"result": [{"json": {}}]}
+        )
+
+    @pytest.mark.asyncio
+    async def test_failed_print_flush_keeps_task_error(self, runner):
+        runner.running_tasks["task"] = TaskState("task")
+        task_settings = TaskSettings(
+            code="return []",
+            node_mode="all_items",
+            continue_on_fail=False,
+            items=[],
+            workflow_name="workflow",
+            workflow_id="workflow-id",
+            node_name="node",
+            node_id="node-id",
+        )
+
+        with (
+            patch.object(
+                runner.executor,
+                "create_process",
+                return_value=(Mock(), Mock(), Mock(), None),
+            ),
+            patch.object(
+                runner.supervisor,
+                "execute_process",
+                new=AsyncMock(side_effect=TaskRuntimeError({"message": "boom"})),
+            ),
+            patch(
+                "src.task_runner.PrintForwarder.finish",
+                new=AsyncMock(side_effect=ConnectionError("connection closed")),
+            ),
+            patch.object(runner, "_send_message", new=AsyncMock()) as send_message,
+            patch.object(runner, "logger") as logger,
+        ):
+            await runner._execute_task("task", task_settings)
+
+        assert send_message.call_args[0][0].error["message"] == "boom"
+        assert "connection closed" in logger.warning.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_closes_created_shards_when_creating_later_shard_fails(self, runner):
+        runner.config.max_concurrency = 2
+        runner.config.per_item_max_shards = 2
+        runner.config.per_item_min_shard_size = 1
+        runner.running_tasks["task"] = TaskState("task")
+        task_settings = TaskSettings(
+            code="return _item",
+            node_mode="per_item",
+            continue_on_fail=False,
+            items=[{"json": {}}, {"json": {}}],
+            workflow_name="workflow",
+            workflow_id="workflow-id",
+            node_name="node",
+            node_id="node-id",
+        )
+        first_shard = (Mock(), Mock(), Mock(), Mock())
+
+        with (
+            patch.object(
+                runner.executor,
+                "create_process",
+                side_effect=[first_shard, OSError("Too many open files")],
+            ),
+            patch.object(runner, "_send_message", new=AsyncMock()) as send_message,
+        ):
+            await runner._execute_task("task", task_settings)
+
+        _, read_conn, write_conn, shared_items = first_shard
+        read_conn.close.assert_called_once()
+        write_conn.close.assert_called_once()
+        shared_items.close.assert_called_once()
+        assert "Too many open files" in send_message.call_args[0][0].error["message"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_sharded_tasks_stay_within_max_concurrency(self, runner):
+        runner.config.max_concurrency = 4
+        runner.config.per_item_max_shards = 4
+        runner.config.per_item_min_shard_size = 1
+        task_settings = TaskSettings(
+            code="return _item",
+            node_mode="per_item",
+            continue_on_fail=False,
+            items=[{"json": {}}] * 4,
+            workflow_name="workflow",
+            workflow_id="workflow-id",
+            node_name="node",
+            node_id="node-id",
+        )
+        for task_id in ("a", "b"):
+            runner.running_tasks[task_id] = TaskState(task_id)
+
+        with (
+            patch.object(
+                runner.executor,
+                "create_process",
+                side_effect=lambda **_: (Mock(), Mock(), Mock(), None),
+            ) as create_process,
+            patch.object(
+                runner.supervisor,
+                "execute_shards",
+                new=AsyncMock(return_value=([], [], 0)),
+            ),
+            patch.object(
+                runner.supervisor,
+                "execute_process",
+                new=AsyncMock(return_value=([], [], 0)),
+            ),
+            patch.object(runner, "_send_messages", new=AsyncMock()),
+        ):
+            await asyncio.gather(
+                runner._execute_task("a", task_settings),
+                runner._execute_task("b", task_settings),
+            )
+
+        assert create_process.call_count == 4
+
+    @pytest.mark.asyncio
+    async def test_logs_actual_shard_sizes(self, runner):
+        runner.config.max_concurrency = 3
+        runner.config.per_item_max_shards = 3
+        runner.config.per_item_min_shard_size = 1
+        runner.running_tasks["task"] = TaskState("task")
+        task_settings = TaskSettings(
+            code="return _item",
+            node_mode="per_item",
+            continue_on_fail=False,
+            items=[{"json": {}}] * 10,
+            workflow_name="workflow",
+            workflow_id="workflow-id",
+            node_name="node",
+            node_id="node-id",
+        )
+
+        with (
+            patch.object(
+                runner.executor,
+                "create_process",
+                side_effect=lambda **_: (Mock(), Mock(), Mock(), None),
+            ),
+            patch.object(
+                runner.supervisor,
+                "execute_shards",
+                new=AsyncMock(return_value=([], [], 0)),
+            ),
+            patch.object(runner, "_send_messages", new=AsyncMock()),
+            patch.object(runner, "logger") as logger,
+        ):
+            await runner._execute_task("task", task_settings)
+
+        logger.debug.assert_any_call("Running task task in 3 shards of 4, 3, 3 items")
+
+    @pytest.mark.asyncio
+    async def test_sends_messages_in_order_over_websocket(self, runner):
+        received: asyncio.Queue = asyncio.Queue()
+
+        async def handler(connection):
+            async for message in connection:
+                received.put_nowait(json.loads(message)["offerId"])
+
+        messages = [
+            RunnerTaskOffer(offer_id=f"offer-{i}", task_type="python", valid_for=5000)
+            for i in range(3)
+        ]
+
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            async with websockets.connect(f"ws://127.0.0.1:{port}") as connection:
+                runner.websocket_connection = connection
+                await runner._send_messages(messages)
+
+                offer_ids = [
+                    await asyncio.wait_for(received.get(), timeout=5) for _ in messages
+                ]
+
+        assert offer_ids == ["offer-0", "offer-1", "offer-2"]
+
+
+class TestTaskRunnerAdaptiveConcurrency:
+    @pytest.fixture
+    def config(self):
+        return TaskRunnerConfig(
+            grant_token="test-token",
+            task_broker_uri="http://127.0.0.1:5679",
+            max_concurrency=4,
+            max_payload_size=1024 * 1024,
+            task_timeout=60,
+            auto_shutdown_timeout=0,
+            graceful_shutdown_timeout=10,
+            stdlib_allow=set(),
+            external_allow=set(),
+            builtins_deny=set(),
+            env_deny=False,
+            pipe_reader_timeout=3.0,
+            adaptive_concurrency=True,
+            min_concurrency=1,
+        )
+
+    def test_fixed_concurrency_when_disabled(self, config):
+        config.adaptive_concurrency = False
+        runner = TaskRunner(config)
+
+        assert runner.concurrency_controller is None
+        assert runner.concurrency_limit == 4
+
+    @pytest.mark.asyncio
+    async def test_offers_follow_concurrency_limit(self, config):
+        runner = TaskRunner(config)
+        runner.can_send_offers = True
+        runner._send_messages = AsyncMock()
+
+        assert runner.concurrency_limit == 1
+
+        await runner._send_offers()
+
+        assert len(runner.open_offers) == 1
+
+        assert runner.concurrency_controller is not None
+        runner.concurrency_controller.limit = 3
+        await runner._send_offers()
+
+        assert len(runner.open_offers) == 3
+
+    def test_raised_limit_notifies_offers(self, config):
+        runner = TaskRunner(config)
+        assert runner.concurrency_controller is not None
+
+        with patch.object(
+            runner.concurrency_controller.sampler,
+            "sample",
+            return_value=HostSample(0.1, 8 * 1024**3, 10 * 1024**3, []),
+        ):
+            runner._adapt_concurrency()
+
+        assert runner.concurrency_limit == 2
+        assert runner.offers_event.is_set()
+
+    def test_abandoned_subinterpreters_take_slots(self, config):
+        config.adaptive_concurrency = False
+        runner = TaskRunner(config)
+        runner.subinterpreter_pool = Mock(abandoned_interpreters={1})
+
+        assert runner.concurrency_limit == 3
+
+    @pytest.mark.asyncio
+    async def test_shuts_down_at_max_abandoned_subinterpreters(self, config):
+        runner = TaskRunner(config)
+        runner.on_subinterpreters_abandoned = AsyncMock()
+        runner.subinterpreter_pool = Mock(abandoned_interpreters={1})
+
+        runner._check_abandoned_interpreters()
+        await asyncio.sleep(0)
+
+        runner.on_subinterpreters_abandoned.assert_not_awaited()
+
+        runner.subinterpreter_pool.abandoned_interpreters.add(2)
+        runner._check_abandoned_interpreters()
+        await asyncio.sleep(0)
+
+        runner.on_subinterpreters_abandoned.assert_awaited_once()
+
+
+class TestTaskRunnerWorkflowScheduling:
+    @pytest.fixture
+    def runner(self):
+        config = TaskRunnerConfig(
+            grant_token="test-token",
+            task_broker_uri="http://127.0.0.1:5679",
+            max_concurrency=2,
+            max_payload_size=1024 * 1024,
+            task_timeout=60,
+            auto_shutdown_timeout=0,
+            graceful_shutdown_timeout=10,
+            stdlib_allow=set(),
+            external_allow=set(),
+            builtins_deny=set(),
+            env_deny=False,
+            pipe_reader_timeout=3.0,
+            workflow_max_concurrency=1,
+            max_deferred_tasks=1,
+        )
+        runner = TaskRunner(config)
+        runner._send_message = AsyncMock()
+        runner._execute_task = AsyncMock()
+        return runner
+
+    async def receive_settings(self, runner: TaskRunner, task_id: str, workflow_id):
+        runner.running_tasks[task_id] = TaskState(task_id)
+        await runner._handle_task_settings(
+            BrokerTaskSettings(
+                task_id=task_id,
+                settings=TaskSettings(
+                    code="return []",
+                    node_mode="all_items",
+                    continue_on_fail=False,
+                    items=[],
+                    workflow_name="workflow",
+                    workflow_id=workflow_id,
+                    node_name="node",
+                    node_id="node-id",
+                ),
+            )
+        )
+
+    def test_accepts_deferred_tasks_beyond_concurrency(self, runner):
+        assert runner.task_capacity == 3
+
+    @pytest.mark.asyncio
+    async def test_defers_task_of_workflow_at_quota(self, runner):
+        await self.receive_settings(runner, "a1", "wf-a")
+        await self.receive_settings(runner, "a2", "wf-a")
+
+        assert runner.running_tasks["a1"].status == TaskStatus.RUNNING
+        assert runner.running_tasks["a2"].status == TaskStatus.DEFERRED
+        assert runner.deferred_tasks.keys() == {"a2"}
+
+    @pytest.mark.asyncio
+    async def test_exposes_running_tasks_by_workflow_if_opted_in(self, runner):
+        runner.config.metrics_workflow_labels = True
+        runner = TaskRunner(runner.config)
+        runner._send_message = AsyncMock()
+        runner._execute_task = AsyncMock()
+
+        await self.receive_settings(runner, "a1", "wf-a")
+
+        assert (
+            METRICS_PREFIX + 'workflow_running_tasks{workflow_id="wf-a"} 1'
+            in metrics.render()
+        )
+
+    @pytest.mark.asyncio
+    async def test_rejects_task_of_workflow_at_quota_if_too_many_deferred(self, runner):
+        await self.receive_settings(runner, "a1", "wf-a")
+        await self.receive_settings(runner, "a2", "wf-a")
+        await self.receive_settings(runner, "a3", "wf-a")
+
+        assert "a3" not in runner.running_tasks
+        response = runner._send_message.call_args[0][0]
+        assert isinstance(response, RunnerTaskError)
+        assert response.task_id == "a3"
+        assert "max of 1 tasks" in response.error["message"]
+
+    @pytest.mark.asyncio
+    async def test_other_workflow_runs_while_one_is_at_quota(self, runner):
+        await self.receive_settings(runner, "a1", "wf-a")
+        await self.receive_settings(runner, "a2", "wf-a")
+        await self.receive_settings(runner, "b1", "wf-b")
+
+        assert runner.running_tasks["b1"].status == TaskStatus.RUNNING
+        assert runner.workflow_scheduler is not None
+        assert runner.workflow_scheduler.running == {"wf-a": 1, "wf-b": 1}
+
+    @pytest.mark.asyncio
+    async def test_deferred_task_starts_when_workflow_task_finishes(self, runner):
+        await self.receive_settings(runner, "a1", "wf-a")
+        await self.receive_settings(runner, "a2", "wf-a")
+
+        assert runner.workflow_scheduler is not None
+        runner.running_tasks.pop("a1")
+        runner.workflow_scheduler.finish("wf-a")
+        runner._start_deferred_tasks()
+
+        assert runner.running_tasks["a2"].status == TaskStatus.RUNNING
+        assert runner.deferred_tasks == {}
+
+    @pytest.mark.asyncio
+    async def test_cancel_deferred_task(self, runner):
+        await self.receive_settings(runner, "a1", "wf-a")
+        await self.receive_settings(runner, "a2", "wf-a")
+
+        await runner._handle_task_cancel(BrokerTaskCancel(task_id="a2", reason=""))
+
+        assert "a2" not in runner.running_tasks
+        assert runner.deferred_tasks == {}
+        assert runner.workflow_scheduler is not None
+        assert runner.workflow_scheduler.deferred_count == 0
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from src.config.security_config import SecurityConfig
+from src.process_supervisor import ProcessSupervisor
+from src.task_executor import TaskExecutor
+from src.tracing import Span, TaskTracer, tracer
+
+
+class CollectingExporter:
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def shutdown(self) -> None:
+        pass
+
+    def get(self, name: str) -> Span:
+        return next(span for span in self.spans if span.name == name)
+
+
+class TestTaskTracer:
+    @pytest.fixture
+    def exporter(self):
+        return CollectingExporter()
+
+    @pytest.fixture
+    def task_tracer(self, exporter):
+        task_tracer = TaskTracer()
+        task_tracer.exporter = exporter
+        return task_tracer
+
+    def test_is_noop_without_exporter(self):
+        task_tracer = TaskTracer()
+
+        span = task_tracer.start_span("task", task_id="t1")
+        with task_tracer.span("validate") as child:
+            pass
+        task_tracer.end_span(span)
+
+        assert span is None
+        assert child is None
+
+    def test_nests_spans_and_inherits_attributes(self, task_tracer, exporter):
+        task_span = task_tracer.start_span("task", task_id="t1", workflow_id=None)
+        with task_tracer.span("validate", cached=True):
+            pass
+        task_tracer.end_span(task_span)
+
+        validate, task = exporter.spans
+
+        assert task.parent_id is None
+        assert task.attributes == {"task_id": "t1"}
+        assert validate.trace_id == task.trace_id
+        assert validate.parent_id == task.span_id
+        assert validate.attributes == {"task_id": "t1", "cached": True}
+        assert task.start_time <= validate.start_time <= validate.end_time
+        assert validate.end_time <= task.end_time
+
+    def test_records_error_of_span(self, task_tracer, exporter):
+        with pytest.raises(ValueError), task_tracer.span("validate"):
+            raise ValueError("boom")
+
+        with task_tracer.span("send"):
+            pass
+
+        failed, succeeded = exporter.spans
+
+        assert failed.error == "boom"
+        assert succeeded.error is None
+        assert succeeded.parent_id is None
+
+    @pytest.mark.asyncio
+    async def test_keeps_spans_of_concurrent_tasks_apart(self, task_tracer, exporter):
+        async def run(task_id: str):
+            task_span = task_tracer.start_span("task", task_id=task_id)
+            with task_tracer.span("execute"):
+                await asyncio.sleep(0.01)
+            task_tracer.end_span(task_span)
+
+        await asyncio.gather(run("t1"), run("t2"))
+
+        tasks = {span.attributes["task_id"]: span for span in exporter.spans}
+        for span in exporter.spans:
+            assert span.trace_id == tasks[span.attributes["task_id"]].trace_id
+
+    def test_records_subprocess_timings_after_user_code(self, task_tracer, exporter):
+        with task_tracer.span("execute") as execute_span:
+            pass
+
+        task_tracer.record_timings(
+            execute_span, {"start_time": 1_000, "user_code": 500, "serialize": 200}
+        )
+
+        user_code, serialize = exporter.spans[1:]
+
+        assert (user_code.start_time, user_code.end_time) == (1_000, 1_500)
+        assert (serialize.start_time, serialize.end_time) == (1_500, 1_700)
+        assert user_code.parent_id == serialize.parent_id == execute_span.span_id
+
+
+class TestTaskSpans:
+    security_config = SecurityConfig(
+        stdlib_allow=set(),
+        external_allow=set(),
+        builtins_deny=set(),
+        runner_env_deny=True,
+    )
+
+    @pytest.fixture
+    def exporter(self):
+        exporter = CollectingExporter()
+        tracer.exporter = exporter
+        yield exporter
+        tracer.exporter = None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("node_mode", ["all_items", "per_item"])
+    async def test_records_phases_with_subprocess_timings(self, exporter, node_mode):
+        code = (
+            "return [{'json': {'a': i}} for i in range(100)]"
+            if node_mode == "all_items"
+            else "return {'a': _item['json']['a']}"
+        )
+        process, read_conn, write_conn, shared_items = TaskExecutor.create_process(
+            code=code,
+            node_mode=node_mode,
+            items=[{"json": {"a": i}} for i in range(100)],
+            security_config=self.security_config,
+        )
+
+        task_span = tracer.start_span("task", task_id="t1")
+        await ProcessSupervisor.execute_process(
+            process=process,
+            read_conn=read_conn,
+            write_conn=write_conn,
+            task_timeout=10,
+            pipe_reader_timeout=3.0,
+            continue_on_fail=False,
+            shared_items=shared_items,
+        )
+        tracer.end_span(task_span)
+
+        names = [span.name for span in exporter.spans]
+        execute = exporter.get("execute")
+        user_code = exporter.get("user_code")
+        serialize = exporter.get("serialize")
+
+        assert names == [
+            "spawn",
+            "execute",
+            "pipe_read",
+            "user_code",
+            "serialize",
+            "task",
+        ]
+        assert all(span.attributes == {"task_id": "t1"} for span in exporter.spans)
+        assert user_code.parent_id == serialize.parent_id == execute.span_id
+        assert execute.start_time <= user_code.start_time
+        assert serialize.end_time <= execute.end_time
+        assert serialize.end_time > user_code.end_time
@@ -0,0 +1,114 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.trace.status import StatusCode
+
+from src.config.tracing_config import TracingConfig
+from src.constants import (
+    LOG_TRACING_MISSING,
+    LOG_TRACING_SETUP_FAILED,
+    TRACING_SERVICE_NAME,
+)
+from src.tracing import Span, tracer
+from src.tracing_exporter import OpenTelemetryExporter, setup_tracing
+
+
+@pytest.fixture
+def tracing_config():
+    return TracingConfig(enabled=True, n8n_version="1.0.0")
+
+
+class TestOpenTelemetryExporter:
+    def test_converts_spans_keeping_ids(self, tracing_config):
+        exporter = OpenTelemetryExporter(tracing_config)
+        span = Span(
+            name="execute",
+            trace_id=2**100,
+            span_id=2,
+            parent_id=1,
+            start_time=1_000,
+            end_time=2_000,
+            attributes={"task_id": "t1", "workflow_id": "wf-1"},
+            error="Task timed out",
+        )
+
+        with patch.object(exporter.processor, "on_end") as mock_on_end:
+            exporter.export(span)
+
+        exporter.shutdown()
+
+        [readable_span] = mock_on_end.call_args[0]
+        assert readable_span.name == "execute"
+        assert readable_span.context.trace_id == 2**100
+        assert readable_span.context.span_id == 2
+        assert readable_span.parent.span_id == 1
+        assert (readable_span.start_time, readable_span.end_time) == (1_000, 2_000)
+        assert dict(readable_span.attributes) == {
+            "task_id": "t1",
+            "workflow_id": "wf-1",
+        }
+        assert readable_span.status.status_code == StatusCode.ERROR
+        assert readable_span.resource.attributes["service.name"] == (
+            TRACING_SERVICE_NAME
+        )
+
+    def test_root_span_has_no_parent(self, tracing_config):
+        exporter = OpenTelemetryExporter(tracing_config)
+        span = Span("task", trace_id=1, span_id=1, parent_id=None, start_time=0)
+        span.end_time = 1
+
+        with patch.object(exporter.processor, "on_end") as mock_on_end:
+            exporter.export(span)
+
+        exporter.shutdown()
+
+        [readable_span] = mock_on_end.call_args[0]
+        assert readable_span.parent is None
+        assert readable_span.status.status_code == StatusCode.UNSET
+
+
+class TestSetupTracing:
+    def test_disabled_returns_none(self):
+        assert setup_tracing(TracingConfig(enabled=False, n8n_version="")) is None
+        assert not tracer.is_enabled
+
+    def test_enabled_sets_exporter_of_tracer(self, tracing_config):
+        exporter = setup_tracing(tracing_config)
+
+        try:
+            assert exporter is not None
+            assert tracer.exporter is exporter
+        finally:
+            tracer.exporter = None
+            if exporter:
+                exporter.shutdown()
+
+    def test_missing_dependency_logs_warning(self, tracing_config, caplog):
+        with (
+            patch(
+                "src.tracing_exporter.OpenTelemetryExporter",
+                side_effect=ImportError("No module named 'opentelemetry'"),
+            ),
+            caplog.at_level(logging.WARNING),
+        ):
+            assert setup_tracing(tracing_config) is None
+
+        assert LOG_TRACING_MISSING in caplog.text
+        assert not tracer.is_enabled
+
+    def test_setup_failure_logs_warning(self, tracing_config, caplog):
+        with (
+            patch(
+                "src.tracing_exporter.OpenTelemetryExporter",
+                side_effect=ValueError("boom"),
+            ),
+            caplog.at_level(logging.WARNING),
+        ):
+            assert setup_tracing(tracing_config) is None
+
+        assert LOG_TRACING_SETUP_FAILED.format(error="boom") in caplog.text
+        assert not tracer.is_enabled
@@ -0,0 +1,106 @@
+import os
+import stat
+
+import pytest
+
+from src.task_analyzer import TaskAnalyzer
+from src.validation_cache import PersistentValidationCache
+from src.config.security_config import SecurityConfig
+from src.errors import SecurityViolationError
+
+ALLOWLISTS = (("json",), ())
+
+
+class TestPersistentValidationCache:
+    @pytest.fixture
+    def cache_path(self, tmp_path):
+        return str(tmp_path / "validation-cache.db")
+
+    def test_returns_stored_violations_and_counts_hits(self, cache_path):
+        cache = PersistentValidationCache(cache_path, max_size=10)
+
+        assert cache.get(("hash", ALLOWLISTS)) is None
+        cache.set(("hash", ALLOWLISTS), ["Line 1: violation"])
+
+        assert cache.get(("hash", ALLOWLISTS)) == ["Line 1: violation"]
+        assert cache.get(("hash", (("os",), ()))) is None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_is_shared_between_processes(self, cache_path):
+        writer = PersistentValidationCache(cache_path, max_size=10)
+        reader = PersistentValidationCache(cache_path, max_size=10)
+
+        writer.set(("hash", ALLOWLISTS), [])
+
+        assert reader.get(("hash", ALLOWLISTS)) == []
+
+    def test_evicts_least_recently_used(self, cache_path):
+        cache = PersistentValidationCache(cache_path, max_size=2)
+
+        cache.set(("first", ALLOWLISTS), [])
+        cache.set(("second", ALLOWLISTS), [])
+        cache.get(("first", ALLOWLISTS))
+        cache.set(("third", ALLOWLISTS), [])
+
+        assert cache.get(("first", ALLOWLISTS)) == []
+        assert cache.get(("second", ALLOWLISTS)) is None
+        assert cache.get(("third", ALLOWLISTS)) == []
+
+    def test_lookups_do_not_write(self, cache_path):
+        cache = PersistentValidationCache(cache_path, max_size=10)
+        cache.set(("hash", ALLOWLISTS), [])
+        changes = cache.connection.total_changes
+
+        cache.get(("hash", ALLOWLISTS))
+
+        assert cache.connection.total_changes == changes
+        assert len(cache.pending_touches) == 1
+
+    def test_evicts_in_batches(self, cache_path):
+        cache = PersistentValidationCache(cache_path, max_size=20)
+
+        for i in range(21):
+            cache.set((f"hash-{i}", ALLOWLISTS), [])
+        count = "SELECT COUNT(*) FROM validations"
+
+        assert cache.connection.execute(count).fetchone()[0] == 21
+
+        cache.set(("hash-21", ALLOWLISTS), [])
+
+        assert cache.connection.execute(count).fetchone()[0] == 20
+
+    def test_creates_file_private_to_owner(self, cache_path):
+        PersistentValidationCache(cache_path, max_size=10)
+
+        assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+
+    def test_refuses_file_writable_by_others(self, cache_path):
+        PersistentValidationCache(cache_path, max_size=10)
+        os.chmod(cache_path, 0o666)
+
+        with pytest.raises(PermissionError):
+            PersistentValidationCache(cache_path, max_size=10)
+
+    def test_analyzer_reuses_results_after_restart(self, cache_path):
+        security_config = SecurityConfig(
+            stdlib_allow={"json"},
+            external_allow=set(),
+            builtins_deny=set(),
+            runner_env_deny=True,
+        )
+        code = "import os"
+
+        first_analyzer = TaskAnalyzer(
+            security_config, PersistentValidationCache(cache_path, max_size=10)
+        )
+        with pytest.raises(SecurityViolationError):
+            first_analyzer.validate(code)
+
+        TaskAnalyzer._cache.clear()  # as on restart
+
+        restarted_cache = PersistentValidationCache(cache_path, max_size=10)
+        restarted_analyzer = TaskAnalyzer(security_config, restarted_cache)
+        with pytest.raises(SecurityViolationError):
+            restarted_analyzer.validate(code)
+
+        assert restarted_cache.hits == 1
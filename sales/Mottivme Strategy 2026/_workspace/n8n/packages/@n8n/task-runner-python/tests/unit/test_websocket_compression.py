@@ -0,0 +1,132 @@
+import json
+
+import pytest
+import websockets
+from websockets.extensions.permessage_deflate import PerMessageDeflate
+from websockets.frames import Frame, Opcode
+
+from src.metrics import metrics
+from src.websocket_compression import (
+    ThresholdPerMessageDeflate,
+    create_compression_factory,
+)
+
+RESULT = json.dumps([{"json": {"name": "item", "value": i}} for i in range(1000)])
+
+
+class TestThresholdPerMessageDeflate:
+    @pytest.fixture
+    def extension(self):
+        return ThresholdPerMessageDeflate(False, False, 15, 15, min_size=1024)
+
+    @pytest.fixture
+    def decoder(self):
+        return PerMessageDeflate(False, False, 15, 15)
+
+    def test_sends_small_messages_uncompressed(self, extension):
+        frame = Frame(Opcode.TEXT, b'{"type": "runner:taskaccepted"}')
+
+        assert extension.encode(frame) is frame
+
+    def test_compresses_large_messages(self, extension, decoder):
+        frame = Frame(Opcode.TEXT, RESULT.encode())
+
+        encoded = extension.encode(frame)
+
+        assert encoded.rsv1
+        assert len(encoded.data) < len(frame.data) / 10
+        assert decoder.decode(encoded).data == frame.data
+
+    def test_keeps_context_across_skipped_messages(self, extension, decoder):
+        frames = [
+            Frame(Opcode.TEXT, RESULT.encode()),
+            Frame(Opcode.TEXT, b"small"),
+            Frame(Opcode.TEXT, RESULT.encode()),
+        ]
+
+        decoded = [decoder.decode(extension.encode(frame)).data for frame in frames]
+
+        assert decoded == [frame.data for frame in frames]
+
+    def test_compresses_all_frames_of_fragmented_messages(self, extension, decoder):
+        frames = [
+            Frame(Opcode.TEXT, b"small", fin=False),
+            Frame(Opcode.CONT, b"small", fin=False),
+            Frame(Opcode.CONT, b"small"),
+        ]
+
+        encoded = [extension.encode(frame) for frame in frames]
+
+        assert [frame.rsv1 for frame in encoded] == [True, False, False]
+        assert b"".join(decoder.decode(frame).data for frame in encoded) == (
+            b"smallsmallsmall"
+        )
+
+    def test_skips_control_frames(self):
+        extension = ThresholdPerMessageDeflate(False, False, 15, 15, min_size=0)
+        frame = Frame(Opcode.PING, b"x" * 100)
+
+        assert extension.encode(frame) is frame
+
+    def test_records_bytes_before_and_after_compression(self, extension):
+        input_bytes = metrics.websocket_compression_input.get()
+        output_bytes = metrics.websocket_compression_output.get()
+
+        encoded = extension.encode(Frame(Opcode.TEXT, RESULT.encode()))
+        extension.encode(Frame(Opcode.TEXT, b"small"))
+
+        assert metrics.websocket_compression_input.get() - input_bytes == len(RESULT)
+        assert metrics.websocket_compression_output.get() - output_bytes == len(
+            encoded.data
+        )
+
+
+class TestCompressionNegotiation:
+    @pytest.mark.asyncio
+    async def test_negotiates_with_server_and_delivers_messages(self):
+        received = []
+
+        async def handler(connection):
+            async for message in connection:
+                received.append(message)
+
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            factory = create_compression_factory(
+                window_bits=12, memory_level=8, min_size=1024
+            )
+
+            async with websockets.connect(
+                f"ws://127.0.0.1:{port}", extensions=[factory], compression=None
+            ) as connection:
+                [extension] = connection.protocol.extensions
+                await connection.send(RESULT)
+                await connection.send("small")
+
+        assert isinstance(extension, ThresholdPerMessageDeflate)
+        assert extension.local_max_window_bits == 12
+        assert received == [RESULT, "small"]
+
+    @pytest.mark.asyncio
+    async def test_sends_uncompressed_when_server_declines(self):
+        received = []
+
+        async def handler(connection):
+            async for message in connection:
+                received.append(message)
+
+        async with websockets.serve(
+            handler, "127.0.0.1", 0, compression=None
+        ) as server:
+            port = server.sockets[0].getsockname()[1]
+            factory = create_compression_factory(
+                window_bits=15, memory_level=5, min_size=1024
+            )
+
+            async with websockets.connect(
+                f"ws://127.0.0.1:{port}", extensions=[factory], compression=None
+            ) as connection:
+                assert connection.protocol.extensions == []
+                await connection.send(RESULT)
+
+        assert received == [RESULT]
@@ -0,0 +1,164 @@
+import os
+import time
+
+import pytest
+
+from src.constants import PIPE_MSG_PREFIX_LENGTH
+from src.task_executor import MULTIPROCESSING_CONTEXT
+from src.worker_pool import Worker, WorkerPool
+from src.task_analyzer import TaskAnalyzer
+from src.config.security_config import SecurityConfig
+from src.errors import TaskRuntimeError, TaskTimeoutError
+
+
+class TestWorkerPool:
+    @pytest.fixture
+    def pool(self):
+        security_config = SecurityConfig(
+            stdlib_allow={"json"},
+            external_allow=set(),
+            builtins_deny=set(),
+            runner_env_deny=True,
+        )
+        pool = WorkerPool(
+            size=1, max_tasks_per_worker=2, security_config=security_config
+        )
+        pool.start()
+        yield pool
+        pool.stop()
+
+    def execute(self, pool: WorkerPool, code: str, **kwargs):
+        worker = pool.acquire()
+        result = pool.execute_task(
+            worker=worker,
+            code=code,
+            code_hash=TaskAnalyzer.hash_code(code),
+            node_mode=kwargs.get("node_mode", "all_items"),
+            items=kwargs.get("items", []),
+            task_timeout=kwargs.get("task_timeout", 5),
+            continue_on_fail=kwargs.get("continue_on_fail", False),
+        )
+        return worker, result
+
+    def test_executes_tasks_in_both_modes(self, pool):
+        _, (result, print_args, size) = self.execute(
+            pool, "print('hi')\nreturn [{'json': {'a': 1}}]"
+        )
+
+        assert result == [{"json": {"a": 1}}]
+        assert print_args == [["'hi'"]]
+        assert size > 0
+
+        _, (result, _, _) = self.execute(
+            pool,
+            "return {'doubled': _item['json']['v'] * 2}",
+            node_mode="per_item",
+            items=[{"json": {"v": 1}}, {"json": {"v": 2}}],
+        )
+
+        assert result == [
+            {"json": {"doubled": 2}, "pairedItem": {"item": 0}},
+            {"json": {"doubled": 4}, "pairedItem": {"item": 1}},
+        ]
+
+    def test_reuses_worker_until_max_tasks(self, pool):
+        first, _ = self.execute(pool, "return []")
+        second, _ = self.execute(pool, "return []")
+        third, _ = self.execute(pool, "return []")
+
+        assert first is second
+        assert third is not first
+        assert not first.process.is_alive()
+
+    def test_recycles_worker_after_failure(self, pool):
+        failed = pool.acquire()
+        with pytest.raises(TaskRuntimeError):
+            pool.execute_task(
+                worker=failed,
+                code="raise ValueError('boom')",
+                code_hash="boom",
+                node_mode="all_items",
+                items=[],
+                task_timeout=5,
+                continue_on_fail=False,
+            )
+
+        worker, (result, _, _) = self.execute(pool, "return [{'ok': True}]")
+
+        assert worker is not failed
+        assert result == [{"ok": True}]
+
+    def test_timeout_stops_worker(self, pool):
+        worker = pool.acquire()
+        with pytest.raises(TaskTimeoutError):
+            pool.execute_task(
+                worker=worker,
+                code="while True:\n    pass",
+                code_hash="loop",
+                node_mode="all_items",
+                items=[],
+                task_timeout=1,
+                continue_on_fail=False,
+            )
+
+        assert not worker.process.is_alive()
+
+    def test_timeout_stops_worker_hanging_mid_frame(self, pool):
+        task_read_conn, task_write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+        result_read_conn, result_write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+        process = MULTIPROCESSING_CONTEXT.Process(
+            target=_write_partial_frame_and_hang,
+            args=(task_read_conn, result_write_conn),
+            daemon=True,
+        )
+        process.start()
+        task_read_conn.close()
+        result_write_conn.close()
+        worker = Worker(process, task_write_conn, result_read_conn)
+
+        with pytest.raises(TaskTimeoutError):
+            pool.execute_task(
+                worker=worker,
+                code="return []",
+                code_hash="partial",
+                node_mode="all_items",
+                items=[],
+                task_timeout=1,
+                continue_on_fail=False,
+            )
+
+        assert not process.is_alive()
+
+    def test_timeout_stops_worker_not_reading_task(self, pool):
+        task_read_conn, task_write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+        result_read_conn, result_write_conn = MULTIPROCESSING_CONTEXT.Pipe(duplex=False)
+        process = MULTIPROCESSING_CONTEXT.Process(
+            target=_hang, args=(task_read_conn, result_write_conn), daemon=True
+        )
+        process.start()
+        task_read_conn.close()
+        result_write_conn.close()
+        worker = Worker(process, task_write_conn, result_read_conn)
+
+        with pytest.raises(TaskTimeoutError):
+            pool.execute_task(
+                worker=worker,
+                code="return []",
+                code_hash="unread",
+                node_mode="all_items",
+                items=[{"json": {"value": "x" * 1024 * 1024}}],  # beyond pipe buffer
+                task_timeout=1,
+                continue_on_fail=False,
+            )
+
+        assert not process.is_alive()
+
+
+def _hang(task_conn, result_conn):
+    time.sleep(60)
+
+
+def _write_partial_frame_and_hang(task_conn, result_conn):
+    os.write(result_conn.fileno(), (100).to_bytes(PIPE_MSG_PREFIX_LENGTH, "big"))
+    os.write(result_conn.fileno(), b"[")
+    time.sleep(60)
@@ -0,0 +1,86 @@
+from src.workflow_scheduler import WorkflowScheduler
+
+
+class TestWorkflowScheduler:
+    def test_quota_limits_running_tasks_per_workflow(self):
+        scheduler = WorkflowScheduler(max_concurrency_per_workflow=2)
+
+        scheduler.start("wf-a")
+        assert not scheduler.is_over_quota("wf-a")
+
+        scheduler.start("wf-a")
+        assert scheduler.is_over_quota("wf-a")
+        assert not scheduler.is_over_quota("wf-b")
+
+        scheduler.finish("wf-a")
+        assert not scheduler.is_over_quota("wf-a")
+
+    def test_no_quota_by_default(self):
+        scheduler = WorkflowScheduler()
+
+        for _ in range(100):
+            scheduler.start("wf-a")
+
+        assert not scheduler.is_over_quota("wf-a")
+
+    def test_next_task_is_fifo_within_workflow(self):
+        scheduler = WorkflowScheduler()
+        scheduler.defer("task-1", "wf-a")
+        scheduler.defer("task-2", "wf-a")
+
+        assert scheduler.next_task() == ("task-1", "wf-a")
+        assert scheduler.next_task() == ("task-2", "wf-a")
+        assert scheduler.next_task() is None
+        assert scheduler.deferred_count == 0
+
+    def test_next_task_is_from_workflow_with_fewest_running_tasks(self):
+        scheduler = WorkflowScheduler()
+        scheduler.start("wf-a")
+        scheduler.start("wf-a")
+        scheduler.start("wf-b")
+        scheduler.defer("task-a", "wf-a")
+        scheduler.defer("task-b", "wf-b")
+        scheduler.defer("task-c", "wf-c")
+
+        assert scheduler.next_task() == ("task-c", "wf-c")
+        assert scheduler.next_task() == ("task-b", "wf-b")
+        assert scheduler.next_task() == ("task-a", "wf-a")
+
+    def test_weights_share_slots_proportionally(self):
+        scheduler = WorkflowScheduler(weights={"wf-a": 3})
+        for index in range(6):
+            scheduler.defer(f"task-a{index}", "wf-a")
+            scheduler.defer(f"task-b{index}", "wf-b")
+
+        started = []
+        for _ in range(8):
+            next_task = scheduler.next_task()
+            assert next_task is not None
+            scheduler.start(next_task[1])
+            started.append(next_task[1])
+
+        assert started.count("wf-a") == 6
+        assert started.count("wf-b") == 2
+
+    def test_next_task_skips_workflows_over_quota(self):
+        scheduler = WorkflowScheduler(max_concurrency_per_workflow=1)
+        scheduler.start("wf-a")
+        scheduler.defer("task-a", "wf-a")
+
+        assert scheduler.next_task() is None
+
+        scheduler.defer("task-b", "wf-b")
+
+        assert scheduler.next_task() == ("task-b", "wf-b")
+        assert scheduler.deferred_count == 1
+
+    def test_remove_deferred_task(self):
+        scheduler = WorkflowScheduler()
+        scheduler.defer("task-1", "wf-a")
+        scheduler.defer("task-2", "wf-a")
+
+        scheduler.remove("task-1", "wf-a")
+        scheduler.remove("unknown", "wf-a")
+
+        assert scheduler.deferred_count == 1
+        assert scheduler.next_task() == ("task-2", "wf-a")